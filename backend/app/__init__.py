@@ -7,7 +7,18 @@ from .routes.auth_routes import auth_blp
 from .routes.event_routes import event_blp
 from .routes.reservation_routes import reservation_blp
 from app.commands.seed_admin import seed_admin_command
+from app.commands.email_worker import email_worker_command
+from app.commands.email_resend import email_resend_command
+from app.commands.qr_prewarm import qr_prewarm_command
+from app.commands.access_scans_aggregate import access_scans_aggregate_command
+from app.commands.event_stats_reconcile import event_stats_reconcile_command
+from app.commands.checkin_journal_replay import checkin_journal_replay_command
+from app.commands.guest_search_reindex import guest_search_reindex_command
 from .routes.event_access_routes import event_access_blp, access_check_blp
+from .routes.door_routes import door_blp
+from .common.debounce import debounce_stats
+from .common.json_provider import FastJSONProvider
+from .services.checkin_journal import checkin_journal_stats
 
 
 
@@ -17,6 +28,8 @@ def create_app():
 
     app = Flask(__name__)
     app.config.from_object(Config)
+    # jsonify / respuestas de flask-smorest con orjson (si no está instalado, json de la stdlib)
+    app.json = FastJSONProvider(app)
 
     # Swagger/OpenAPI
     app.config["API_TITLE"] = "Reservas API"
@@ -43,13 +56,29 @@ def create_app():
     api.register_blueprint(reservation_blp)
     api.register_blueprint(event_access_blp)
     api.register_blueprint(access_check_blp)
+    api.register_blueprint(door_blp)
 
     app.cli.add_command(seed_admin_command)
+    app.cli.add_command(email_worker_command)
+    app.cli.add_command(email_resend_command)
+    app.cli.add_command(qr_prewarm_command)
+    app.cli.add_command(access_scans_aggregate_command)
+    app.cli.add_command(event_stats_reconcile_command)
+    app.cli.add_command(checkin_journal_replay_command)
+    app.cli.add_command(guest_search_reindex_command)
 
 
 
     @app.get("/health")
     def health():
-        return jsonify(ok=True)
+        try:
+            scan_debounce = debounce_stats()
+        except Exception as e:
+            scan_debounce = {"error": str(e)}
+        try:
+            checkin = checkin_journal_stats()
+        except Exception as e:
+            checkin = {"error": str(e)}
+        return jsonify(ok=True, scan_debounce=scan_debounce, checkin=checkin)
 
     return app
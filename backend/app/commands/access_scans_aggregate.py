@@ -0,0 +1,35 @@
+# app/commands/access_scans_aggregate.py
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions import db
+from app.services.event_access_service import EventAccessService
+
+
+@click.command("access-scans-aggregate")
+@click.option("--grace", type=int, default=None, help="Segundos que se dejan sin agregar (commits en vuelo).")
+@click.option("--interval", type=float, default=30.0, help="Segundos entre agregaciones.")
+@click.option("--once", is_flag=True, help="Agrega una vez y termina.")
+@with_appcontext
+def access_scans_aggregate_command(grace, interval, once):
+    """
+    Suma access_scans a scan_count/last_scan_at de los códigos de acceso.
+    """
+    if grace is None:
+        grace = int(current_app.config.get("ACCESS_SCAN_AGGREGATE_GRACE_SECONDS", 60))
+
+    while True:
+        try:
+            codes, hi = EventAccessService.aggregate_scans(grace)
+            if codes:
+                click.echo(f"aggregated: {codes} códigos (hasta scan {hi})")
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("ACCESS SCANS aggregate error")
+
+        if once:
+            return
+        time.sleep(interval)
@@ -0,0 +1,29 @@
+# app/commands/checkin_journal_replay.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.services.checkin_journal import CheckinJournal, replay
+
+
+@click.command("checkin-journal-replay")
+@click.option("--path", default=None, help="Journal SQLite (default CHECKIN_JOURNAL_PATH).")
+@click.option("--batch", "batch_size", type=int, default=200, help="Entradas por transacción.")
+@with_appcontext
+def checkin_journal_replay_command(path, batch_size):
+    """
+    Reproduce en la DB los check-ins hechos en modo degradado y lista los conflictos.
+    """
+    path = path or current_app.config.get("CHECKIN_JOURNAL_PATH")
+    if not path:
+        raise click.ClickException("CHECKIN_JOURNAL_PATH no configurado")
+
+    journal = CheckinJournal(path)
+    applied, conflicts = replay(journal, batch_size=batch_size)
+    click.echo(f"replayed: {applied} aplicados, {conflicts} conflictos")
+
+    for c in journal.conflicts():
+        click.echo(
+            f"  #{c['id']} reservation {c['reservation_id']} (event {c['event_id']}) "
+            f"{c['scanned_at']} device={c['device_id'] or '-'} worker={c['worker']}: {c['result']}"
+        )
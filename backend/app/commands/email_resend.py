@@ -0,0 +1,22 @@
+# app/commands/email_resend.py
+import click
+from flask.cli import with_appcontext
+
+from app.extensions import db
+from app.models import Event
+from app.services.email_outbox_service import EmailOutboxService
+
+
+@click.command("email-resend")
+@click.option("--event", "event_id", type=int, required=True, help="ID del evento.")
+@click.option("--all", "include_sent", is_flag=True, help="Incluye también los ya enviados.")
+@with_appcontext
+def email_resend_command(event_id, include_sent):
+    """
+    Encola re-envío de invitaciones de un evento (lo procesa flask email-worker).
+    """
+    if not db.session.get(Event, event_id):
+        raise click.ClickException("EVENT_NOT_FOUND")
+
+    n = EmailOutboxService.enqueue_for_event(event_id, include_sent=include_sent)
+    click.echo(f"QUEUED: {n} invitaciones (evento {event_id})")
@@ -0,0 +1,30 @@
+# app/commands/email_worker.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.services.email_outbox_service import EmailOutboxService
+
+
+@click.command("email-worker")
+@click.option("--workers", type=int, default=None, help="Senders SMTP en paralelo.")
+@click.option("--batch", "batch_size", type=int, default=None, help="Correos por lote.")
+@click.option("--interval", type=float, default=2.0, help="Segundos entre lotes vacíos.")
+@click.option("--once", is_flag=True, help="Drena lo pendiente y termina.")
+@with_appcontext
+def email_worker_command(workers, batch_size, interval, once):
+    """
+    Procesa el outbox de emails (invitaciones con QR).
+    """
+    cfg = current_app.config
+    workers = workers or int(cfg.get("MAIL_OUTBOX_WORKERS", 4))
+    batch_size = batch_size or int(cfg.get("MAIL_OUTBOX_BATCH_SIZE", 50))
+
+    click.echo(f"email-worker: workers={workers} batch={batch_size}")
+    EmailOutboxService.run(
+        workers=workers,
+        batch_size=batch_size,
+        interval=interval,
+        once=once,
+        echo=click.echo,
+    )
@@ -0,0 +1,23 @@
+# app/commands/event_stats_reconcile.py
+import click
+from flask.cli import with_appcontext
+
+from app.services.event_stats_service import EventStatsService
+
+
+@click.command("event-stats-reconcile")
+@click.option("--event", "event_id", type=int, default=None, help="Solo este evento (default: todos).")
+@with_appcontext
+def event_stats_reconcile_command(event_id):
+    """
+    Recalcula event_stats desde reservations y muestra las diferencias encontradas.
+    """
+    drift = EventStatsService.reconcile(event_id)
+    if not drift:
+        click.echo("event_stats OK (sin diferencias)")
+        return
+
+    for eid, diff in sorted(drift.items()):
+        detail = ", ".join(f"{col} {stored} -> {actual}" for col, (stored, actual) in diff.items())
+        click.echo(f"event {eid}: {detail}")
+    click.echo(f"corregidos: {len(drift)} eventos")
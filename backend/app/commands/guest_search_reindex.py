@@ -0,0 +1,18 @@
+# app/commands/guest_search_reindex.py
+import click
+from flask.cli import with_appcontext
+
+from app.services.guest_search_service import GuestSearchService
+
+
+@click.command("guest-search-reindex")
+@click.option("--event", "event_id", type=int, default=None, help="Solo este evento (default: todos).")
+@click.option("--batch-size", type=int, default=2000, show_default=True)
+@with_appcontext
+def guest_search_reindex_command(event_id, batch_size):
+    """
+    Recalcula reservations.search_key (y reservation_search_terms sin pg_trgm).
+    Necesario si cambian las reglas de normalización o se editan datos a mano.
+    """
+    done = GuestSearchService.reindex(event_id, batch_size)
+    click.echo(f"backend={GuestSearchService.backend()} reindexadas: {done} reservas")
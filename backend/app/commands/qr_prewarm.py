@@ -0,0 +1,53 @@
+# app/commands/qr_prewarm.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Event, Reservation
+from app.services.event_service import EventService
+from app.services.qr_cache import get_qr_cache
+from app.services.reservation_service import NO_QR_STATUSES, ReservationService
+
+
+@click.command("qr-prewarm")
+@click.option("--event", "event_id", type=int, required=True, help="ID del evento.")
+@click.option("--processes", type=int, default=None, help="Procesos para renderizar (default QR_RENDER_PROCESSES).")
+@click.option("--force", is_flag=True, help="Re-renderiza aunque ya exista el asset.")
+@with_appcontext
+def qr_prewarm_command(event_id, processes, force):
+    """
+    Pre-genera los QR (PNG) de todas las reservas de un evento en el directorio de assets.
+    """
+    ev = db.session.get(Event, event_id)
+    if not ev:
+        raise click.ClickException("EVENT_NOT_FOUND")
+
+    cache = get_qr_cache()
+    if not cache.disk_dir:
+        raise click.ClickException("QR_CACHE_DIR no configurado")
+
+    if processes is None:
+        processes = int(current_app.config.get("QR_RENDER_PROCESSES", 0))
+
+    rows = db.session.execute(
+        select(Reservation.id, Reservation.event_id, Reservation.reservation_code)
+        .where(Reservation.event_id == event_id, Reservation.status.not_in(NO_QR_STATUSES))
+        .execution_options(yield_per=1000)
+    )
+
+    items = [
+        (
+            ReservationService.qr_asset_alias(row.id),
+            ReservationService._checkin_url(row),
+            "png",
+            None,
+            "reservation",
+        )
+        for row in rows
+    ]
+    items.append((f"events/{ev.id}.png", EventService._public_url(ev.public_code), "png", None, "event"))
+
+    rendered = cache.prewarm(items, processes=processes, force=force)
+    click.echo(f"OK: {len(items)} QRs ({rendered} renderizados) en {cache.disk_dir}")
@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import hmac
+
+from flask import current_app
+
+# QR firmado: r1.<event_id>.<reservation_id>.<firma>
+#   firma = HMAC-SHA256(clave del evento, "r1.<event_id>.<reservation_id>")[:12] en base64url
+#   clave del evento = HMAC-SHA256(CHECKIN_SIGNING_KEY, "checkin-event:<event_id>")
+# Los códigos legacy (32 hex) nunca tienen ".": no hay ambigüedad.
+PREFIX = "r1"
+SIG_BYTES = 12
+_MAX_LEN = 64
+
+
+def signing_key() -> bytes | None:
+    key = current_app.config.get("CHECKIN_SIGNING_KEY") or ""
+    return key.encode("utf-8") if key else None
+
+
+def event_key(event_id: int, master: bytes | None = None) -> bytes | None:
+    """
+    Clave derivada por evento: es la que se le da a los escáneres de puerta
+    (una clave filtrada solo sirve para ese evento).
+    """
+    master = master or signing_key()
+    if master is None:
+        return None
+    return hmac.new(master, f"checkin-event:{event_id}".encode("ascii"), hashlib.sha256).digest()
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _signature(key: bytes, event_id: int, reservation_id: int) -> str:
+    msg = f"{PREFIX}.{event_id}.{reservation_id}".encode("ascii")
+    return _b64(hmac.new(key, msg, hashlib.sha256).digest()[:SIG_BYTES])
+
+
+def encode_event_key(key: bytes) -> str:
+    return _b64(key)
+
+
+def is_signed(code: str) -> bool:
+    return code.startswith(PREFIX + ".")
+
+
+def sign(event_id: int, reservation_id: int) -> str | None:
+    key = event_key(event_id)
+    if key is None:
+        return None
+    return f"{PREFIX}.{event_id}.{reservation_id}.{_signature(key, event_id, reservation_id)}"
+
+
+def payload_for(event_id: int, reservation_id: int, reservation_code: str) -> str:
+    """
+    Lo que va en el QR: firmado si hay CHECKIN_SIGNING_KEY, si no el código legacy.
+    """
+    return sign(event_id, reservation_id) or reservation_code
+
+
+def payload_builder(event_id: int):
+    """
+    payload_for para muchas reservas del mismo evento (listados): la clave se deriva una sola vez.
+    """
+    key = event_key(event_id)
+    if key is None:
+        return lambda reservation_id, reservation_code: reservation_code
+    prefix = f"{PREFIX}.{event_id}."
+    return lambda reservation_id, reservation_code: f"{prefix}{reservation_id}.{_signature(key, event_id, reservation_id)}"
+
+
+def verify(token: str) -> tuple[int, int]:
+    """
+    (event_id, reservation_id) de un QR firmado, sin tocar la DB.
+    ValueError("INVALID_SIGNATURE") si el formato o la firma no cierran.
+    """
+    parts = token.split(".") if len(token) <= _MAX_LEN else []
+    if len(parts) != 4 or parts[0] != PREFIX:
+        raise ValueError("INVALID_SIGNATURE")
+
+    eid, rid, sig = parts[1], parts[2], parts[3]
+    if not (eid.isascii() and eid.isdigit() and rid.isascii() and rid.isdigit()):
+        raise ValueError("INVALID_SIGNATURE")
+
+    event_id, reservation_id = int(eid), int(rid)
+    key = event_key(event_id)
+    if key is None or not hmac.compare_digest(sig, _signature(key, event_id, reservation_id)):
+        raise ValueError("INVALID_SIGNATURE")
+    return event_id, reservation_id
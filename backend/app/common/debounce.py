@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+from .ttl_cache import TTLCache
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return {"$dt": o.isoformat()}
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def _object_hook(d: dict):
+    if len(d) == 1 and "$dt" in d:
+        return datetime.fromisoformat(d["$dt"])
+    return d
+
+
+class MemoryScanDebouncer:
+    """
+    Por proceso: resultado del primer escaneo por (dispositivo, código) durante unos segundos.
+    Disparos concurrentes esperan al que está en curso (un Event por key, como idempotency).
+    """
+
+    # tope de espera a un escaneo en curso; pasado eso se ejecuta igual
+    WAIT_SECONDS = 5.0
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 20000):
+        self._cache = TTLCache(ttl_seconds, max_entries)
+        self._inflight: dict[str, threading.Event] = {}
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> tuple[dict | None, object | None]:
+        """
+        (resultado, None) → repetido: devolver ese resultado.
+        (None, owner) → el llamador es dueño de la key: ejecutar y complete() / release() con owner.
+        (None, None) → el dueño tardó demasiado: ejecutar y add().
+        """
+        deadline = time.monotonic() + self.WAIT_SECONDS
+        while True:
+            with self._lock:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._suppressed += 1
+                    return hit, None
+
+                current = self._inflight.get(key)
+                if current is None:
+                    owner = self._inflight[key] = threading.Event()
+                    return None, owner
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not current.wait(remaining):
+                return None, None
+
+    def add(self, key: str, body: dict):
+        # el primer resultado no se pisa (un ALREADY_USED posterior no reemplaza al OK)
+        self._cache.add(key, body)
+
+    def complete(self, key: str, body: dict, owner: threading.Event):
+        with self._lock:
+            self._cache.add(key, body)
+            if self._inflight.get(key) is owner:
+                del self._inflight[key]
+        owner.set()
+
+    def release(self, key: str, owner: threading.Event):
+        with self._lock:
+            if self._inflight.get(key) is owner:
+                del self._inflight[key]
+        owner.set()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "suppressed": self._suppressed, "entries": len(self._cache)}
+
+
+class RedisScanDebouncer:
+    """
+    Compartido entre workers (redis opcional: solo se importa si se configura).
+    SET NX de un marcador "pending:<token>" es el lock del escaneo en curso;
+    el dueño lo reemplaza por el resultado solo si el marcador sigue siendo suyo.
+    """
+
+    PREFIX = "scan-debounce:"
+    PENDING = b"pending:"
+    WAIT_SECONDS = 5.0
+    POLL_SECONDS = 0.02
+
+    # reemplaza / borra la key solo si todavía tiene nuestro marcador
+    _COMPLETE = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('set', KEYS[1], ARGV[2], 'PX', ARGV[3])
+    end
+    return redis.call('set', KEYS[1], ARGV[2], 'PX', ARGV[3], 'NX')
+    """
+    _RELEASE = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, ttl_seconds: float):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SCAN_DEBOUNCE_BACKEND=redis requiere el paquete redis")
+
+        self._redis = redis.Redis.from_url(url)
+        self._ttl_ms = max(1, int(ttl_seconds * 1000))
+        self._complete = self._redis.register_script(self._COMPLETE)
+        self._release = self._redis.register_script(self._RELEASE)
+
+    def claim(self, key: str) -> tuple[dict | None, bytes | None]:
+        """
+        Mismo contrato que MemoryScanDebouncer.claim; el dueño recibe su marcador.
+        """
+        rkey = self.PREFIX + key
+        token = self.PENDING + uuid.uuid4().hex.encode("ascii")
+        deadline = time.monotonic() + self.WAIT_SECONDS
+        while True:
+            if self._redis.set(rkey, token, px=int(self.WAIT_SECONDS * 1000), nx=True):
+                return None, token
+
+            raw = self._redis.get(rkey)
+            if raw is not None and not raw.startswith(self.PENDING):
+                self._redis.incr(self.PREFIX + "suppressed")
+                return json.loads(raw, object_hook=_object_hook), None
+            if raw is not None and time.monotonic() >= deadline:
+                return None, None
+            time.sleep(self.POLL_SECONDS)
+
+    def add(self, key: str, body: dict):
+        self._redis.set(self.PREFIX + key, json.dumps(body, default=_default), px=self._ttl_ms, nx=True)
+
+    def complete(self, key: str, body: dict, owner: bytes):
+        self._complete(keys=[self.PREFIX + key], args=[owner, json.dumps(body, default=_default), self._ttl_ms])
+
+    def release(self, key: str, owner: bytes):
+        self._release(keys=[self.PREFIX + key], args=[owner])
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "suppressed": int(self._redis.get(self.PREFIX + "suppressed") or 0)}
+
+
+_debouncer_lock = threading.Lock()
+
+
+def get_scan_debouncer():
+    """
+    Debouncer por proceso según SCAN_DEBOUNCE_BACKEND (None si está apagado).
+    """
+    app = current_app._get_current_object()
+    if float(app.config.get("SCAN_DEBOUNCE_SECONDS", 0)) <= 0:
+        return None
+
+    debouncer = app.extensions.get("scan_debounce")
+    if debouncer is not None:
+        return debouncer
+
+    with _debouncer_lock:
+        debouncer = app.extensions.get("scan_debounce")
+        if debouncer is not None:
+            return debouncer
+
+        cfg = app.config
+        ttl = float(cfg["SCAN_DEBOUNCE_SECONDS"])
+        if cfg.get("SCAN_DEBOUNCE_BACKEND", "memory") == "redis":
+            debouncer = RedisScanDebouncer(cfg.get("SCAN_DEBOUNCE_REDIS_URL") or "redis://localhost:6379/0", ttl)
+        else:
+            debouncer = MemoryScanDebouncer(ttl)
+        app.extensions["scan_debounce"] = debouncer
+        return debouncer
+
+
+def debounced_scan(kind: str, code: str, fn) -> dict:
+    """
+    Re-escaneo del mismo QR desde el mismo dispositivo (o usuario) dentro de la ventana:
+    devuelve el resultado original sin tocar la DB.
+    Dispositivo = header X-Device-Id; si no viene, el usuario del JWT.
+    """
+    debouncer = get_scan_debouncer()
+    if debouncer is None:
+        return fn()
+
+    device = request.headers.get("X-Device-Id") or f"user:{get_jwt_identity()}"
+    key = f"{kind}:{device}:{code}"
+
+    # disparos simultáneos: uno va a la DB, el resto espera su resultado
+    hit, owner = debouncer.claim(key)
+    if hit is not None:
+        return hit
+
+    try:
+        body = fn()
+    except Exception:
+        if owner is not None:
+            debouncer.release(key, owner)
+        raise
+
+    if owner is not None:
+        debouncer.complete(key, body, owner)
+    else:
+        debouncer.add(key, body)
+    return body
+
+
+def debounce_stats() -> dict | None:
+    debouncer = get_scan_debouncer()
+    return debouncer.stats() if debouncer is not None else None
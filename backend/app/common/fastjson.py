@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+
+from flask import Response
+
+# orjson es opcional: sin el paquete se usa json de la stdlib (misma salida, más lento)
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default(obj):
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # naive datetime → "YYYY-MM-DDTHH:MM:SS[.ffffff]" igual que isoformat(); Enum → value nativo
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=default)
+
+    def loads(data):
+        return orjson.loads(data)
+
+else:
+    _encoder = json.JSONEncoder(default=default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    def loads(data):
+        return json.loads(data)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """
+    Respuesta JSON ya serializada. Con @blp.response(Schema) de flask-smorest
+    el schema queda en la doc OpenAPI pero no se vuelve a recorrer el payload
+    (un Response se devuelve tal cual): el payload tiene que respetar el schema.
+    """
+    return Response(dumps(payload), status=status, mimetype="application/json")
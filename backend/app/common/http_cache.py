@@ -0,0 +1,29 @@
+from flask import Response, request
+
+
+def conditional_response(
+    etag: str,
+    build_body,
+    mimetype: str,
+    download_name: str | None = None,
+    max_age: int = 86400,
+    private: bool = False,
+):
+    """
+    Respuesta con ETag fuerte + Cache-Control.
+    Si el cliente manda If-None-Match igual → 304 sin construir el body.
+    Sin immutable: las URLs son por id, no por contenido, y al vencer max-age se revalida con el ETag.
+    """
+    scope = "private" if private else "public"
+    cache_control = f"{scope}, max-age={max_age}"
+
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(build_body(), mimetype=mimetype)
+        if download_name:
+            resp.headers["Content-Disposition"] = f'inline; filename="{download_name}"'
+
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = cache_control
+    return resp
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import IdempotencyKey
+from .ttl_cache import TTLCache
+
+MAX_KEY_LENGTH = 255
+
+# errores → código HTTP (los mapean las rutas)
+IDEMPOTENCY_ERRORS = {
+    "INVALID_IDEMPOTENCY_KEY": 400,
+    "IDEMPOTENCY_KEY_REUSED": 422,
+    "IDEMPOTENCY_IN_PROGRESS": 409,
+}
+
+
+def _sha256(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+
+
+class MemoryIdempotencyStore:
+    """
+    Por proceso: respuestas en un TTLCache + requests en curso con un Event
+    (los duplicados concurrentes esperan al primero en vez de ejecutar de nuevo).
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, wait_seconds: float):
+        self.wait_seconds = wait_seconds
+        self._done = TTLCache(ttl_seconds, max_entries)
+        self._inflight: dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key_hash: str, fingerprint: str) -> tuple[int, dict] | None:
+        """
+        None → el llamador es dueño de la key y debe ejecutar.
+        (status, body) → respuesta guardada para re-enviar.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            with self._lock:
+                hit = self._done.get(key_hash)
+                if hit is not None:
+                    fp, status, body = hit
+                    if fp != fingerprint:
+                        raise ValueError("IDEMPOTENCY_KEY_REUSED")
+                    return status, body
+
+                current = self._inflight.get(key_hash)
+                if current is None:
+                    self._inflight[key_hash] = _InFlight(fingerprint)
+                    return None
+
+            if current.fingerprint != fingerprint:
+                raise ValueError("IDEMPOTENCY_KEY_REUSED")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not current.done.wait(remaining):
+                raise ValueError("IDEMPOTENCY_IN_PROGRESS")
+
+    def complete(self, key_hash: str, status: int, body: dict):
+        with self._lock:
+            current = self._inflight.pop(key_hash, None)
+            if current is not None:
+                self._done.set(key_hash, (current.fingerprint, status, body))
+        if current is not None:
+            current.done.set()
+
+    def release(self, key_hash: str):
+        with self._lock:
+            current = self._inflight.pop(key_hash, None)
+        if current is not None:
+            current.done.set()
+
+
+class DatabaseIdempotencyStore:
+    """
+    Compartido entre workers (tabla idempotency_keys).
+    El INSERT de la key es el lock: la PK garantiza un solo dueño.
+    """
+
+    POLL_SECONDS = 0.05
+    # request original que murió sin completar → otro puede tomar la key
+    IN_FLIGHT_LEASE = timedelta(seconds=60)
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, ttl_seconds: int, wait_seconds: float):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.wait_seconds = wait_seconds
+
+    def _try_insert(self, key_hash: str, fingerprint: str, now: datetime) -> bool:
+        try:
+            db.session.add(IdempotencyKey(
+                key_hash=key_hash,
+                fingerprint=fingerprint,
+                created_at=now,
+                expires_at=now + self.ttl,
+            ))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+        if random.random() < self.PURGE_PROBABILITY:
+            db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+            db.session.commit()
+        return True
+
+    def _take_over(self, key_hash: str, fingerprint: str, condition, now: datetime) -> bool:
+        taken = db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash)
+            .where(condition)
+            .values(
+                fingerprint=fingerprint,
+                status_code=None,
+                response=None,
+                created_at=now,
+                expires_at=now + self.ttl,
+            )
+        ).rowcount == 1
+        db.session.commit()
+        return taken
+
+    def claim(self, key_hash: str, fingerprint: str) -> tuple[int, dict] | None:
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            now = datetime.utcnow()
+            row = db.session.execute(
+                select(
+                    IdempotencyKey.fingerprint,
+                    IdempotencyKey.status_code,
+                    IdempotencyKey.response,
+                    IdempotencyKey.created_at,
+                    IdempotencyKey.expires_at,
+                ).where(IdempotencyKey.key_hash == key_hash)
+            ).first()
+
+            if row is None:
+                if self._try_insert(key_hash, fingerprint, now):
+                    return None
+                continue
+
+            if row.expires_at <= now:
+                if self._take_over(key_hash, fingerprint, IdempotencyKey.expires_at <= now, now):
+                    return None
+                continue
+
+            if row.fingerprint != fingerprint:
+                db.session.rollback()
+                raise ValueError("IDEMPOTENCY_KEY_REUSED")
+
+            if row.status_code is not None:
+                db.session.rollback()
+                return row.status_code, json.loads(row.response)
+
+            if row.created_at <= now - self.IN_FLIGHT_LEASE:
+                stale = (IdempotencyKey.status_code.is_(None)) & (IdempotencyKey.created_at == row.created_at)
+                if self._take_over(key_hash, fingerprint, stale, now):
+                    return None
+                continue
+
+            # el primero sigue en curso: transacción nueva en cada vuelta para ver su commit
+            db.session.rollback()
+            if time.monotonic() >= deadline:
+                raise ValueError("IDEMPOTENCY_IN_PROGRESS")
+            time.sleep(self.POLL_SECONDS)
+
+    def complete(self, key_hash: str, status: int, body: dict):
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash)
+            .values(status_code=status, response=json.dumps(body, separators=(",", ":")))
+        )
+        db.session.commit()
+
+    def release(self, key_hash: str):
+        db.session.rollback()
+        db.session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash)
+            .where(IdempotencyKey.status_code.is_(None))
+        )
+        db.session.commit()
+
+
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store():
+    """
+    Store por proceso según IDEMPOTENCY_BACKEND, guardado en app.extensions.
+    """
+    app = current_app._get_current_object()
+    store = app.extensions.get("idempotency")
+    if store is not None:
+        return store
+
+    with _store_lock:
+        store = app.extensions.get("idempotency")
+        if store is not None:
+            return store
+
+        cfg = app.config
+        ttl = int(cfg.get("IDEMPOTENCY_TTL_SECONDS", 86400))
+        wait = float(cfg.get("IDEMPOTENCY_WAIT_SECONDS", 10))
+        if cfg.get("IDEMPOTENCY_BACKEND", "memory") == "db":
+            store = DatabaseIdempotencyStore(ttl, wait)
+        else:
+            store = MemoryIdempotencyStore(ttl, int(cfg.get("IDEMPOTENCY_MAX_ENTRIES", 50000)), wait)
+        app.extensions["idempotency"] = store
+        return store
+
+
+def run_idempotent(scope: str, key: str | None, payload: dict, fn) -> tuple[dict, int, bool]:
+    """
+    Ejecuta fn() -> (body, status) una sola vez por (scope, Idempotency-Key).
+    Un reintento con la misma key y el mismo body recibe la respuesta original
+    sin volver a ejecutar; solo se guardan respuestas exitosas.
+    Devuelve (body, status, replayed).
+    """
+    if not key:
+        body, status = fn()
+        return body, status, False
+
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValueError("INVALID_IDEMPOTENCY_KEY")
+
+    store = get_idempotency_store()
+    key_hash = _sha256(scope, key)
+    fingerprint = _sha256(json.dumps(payload, sort_keys=True, default=str))
+
+    stored = store.claim(key_hash, fingerprint)
+    if stored is not None:
+        status, body = stored
+        return body, status, True
+
+    try:
+        body, status = fn()
+    except BaseException:
+        store.release(key_hash)
+        raise
+
+    store.complete(key_hash, status, body)
+    return body, status, False
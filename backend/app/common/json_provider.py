@@ -0,0 +1,55 @@
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+
+from . import fastjson
+from .fastjson import orjson
+
+
+def _default(obj):
+    """
+    datetime / date → ISO 8601 (el DefaultJSONProvider de Flask usa fecha HTTP), Enum → value,
+    Decimal → str; el resto (UUID, dataclass, __html__) como Flask.
+    """
+    try:
+        return fastjson.default(obj)
+    except TypeError:
+        return flask_default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    jsonify / flask-smorest / request.get_json con orjson (C) si está instalado.
+    Sin orjson es el provider de Flask con el mismo default (misma salida, más lento).
+    Mantiene sort_keys y compact / indent de Flask.
+    """
+
+    default = staticmethod(_default)
+
+    def _options(self, pretty: bool = False) -> int:
+        # dict con claves no-str (ej. {event_id: ...}) igual que json.dumps
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        # argumentos propios de json.dumps (indent, cls, ...) → camino de Flask
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        # bytes directo al Response (sin pasar por str)
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty)) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
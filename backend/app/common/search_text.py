@@ -0,0 +1,62 @@
+import re
+import unicodedata
+
+# búsqueda de invitados en puerta: todo se compara normalizado
+# (minúsculas, sin acentos, teléfono solo dígitos, instagram sin @)
+_NON_WORD = re.compile(r"[^a-z0-9@._+-]+")
+_NON_DIGIT = re.compile(r"\D+")
+
+MAX_TERM = 120
+# en puerta se tipea el teléfono sin país / característica: también se indexan sus últimos dígitos
+PHONE_SUFFIXES = (10, 8, 4)
+
+
+def normalize(text: str | None) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _phone(phone: str | None) -> str:
+    return _NON_DIGIT.sub("", phone or "")
+
+
+def _instagram(handle: str | None) -> str:
+    return normalize(handle).lstrip("@")
+
+
+def search_key(first_name: str, last_name: str, email: str, phone: str, instagram: str | None) -> str:
+    """
+    Texto único por reserva para el índice trigram (y el ranking).
+    """
+    parts = [normalize(first_name), normalize(last_name), normalize(email), _phone(phone), _instagram(instagram)]
+    return " ".join(p for p in parts if p)
+
+
+def search_terms(first_name: str, last_name: str, email: str, phone: str, instagram: str | None) -> set[str]:
+    """
+    Términos para el índice de prefijos (sin pg_trgm): cada palabra del nombre,
+    el email y su parte local, el teléfono (y sus finales) y el instagram.
+    """
+    terms = set(normalize(first_name).split()) | set(normalize(last_name).split())
+    mail = normalize(email).replace(" ", "")
+    if mail:
+        terms.add(mail)
+        terms.add(mail.split("@", 1)[0])
+    digits = _phone(phone)
+    terms.update(digits[-n:] for n in PHONE_SUFFIXES if len(digits) > n)
+    for extra in (digits, _instagram(instagram)):
+        if extra:
+            terms.add(extra)
+    return {t[:MAX_TERM] for t in terms if t}
+
+
+def query_tokens(q: str) -> list[str]:
+    """
+    Lo que escribe seguridad → tokens normalizados (un teléfono con espacios / guiones queda junto).
+    """
+    if _phone(q) and not re.search(r"[a-zA-Z@]", q):
+        return [_phone(q)]
+    return [t.lstrip("@") for t in normalize(q).split() if t.lstrip("@")]
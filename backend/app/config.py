@@ -18,3 +18,84 @@ class Config:
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", MAIL_USERNAME)
     
     PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://localhost:8080")
+
+    # outbox de emails (flask email-worker)
+    MAIL_OUTBOX_WORKERS = int(os.getenv("MAIL_OUTBOX_WORKERS", "4"))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", "50"))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("MAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+    MAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("MAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+    MAIL_OUTBOX_LOCK_TIMEOUT_SECONDS = int(os.getenv("MAIL_OUTBOX_LOCK_TIMEOUT_SECONDS", "300"))
+
+    # pool de sesiones SMTP (por proceso)
+    MAIL_SMTP_POOL_SIZE = int(os.getenv("MAIL_SMTP_POOL_SIZE", str(MAIL_OUTBOX_WORKERS)))
+    MAIL_SMTP_KEEPALIVE_SECONDS = int(os.getenv("MAIL_SMTP_KEEPALIVE_SECONDS", "30"))
+    MAIL_SMTP_MAX_IDLE_SECONDS = int(os.getenv("MAIL_SMTP_MAX_IDLE_SECONDS", "240"))
+    MAIL_SMTP_MAX_MESSAGES_PER_SESSION = int(os.getenv("MAIL_SMTP_MAX_MESSAGES_PER_SESSION", "100"))
+    MAIL_SMTP_TIMEOUT = int(os.getenv("MAIL_SMTP_TIMEOUT", "30"))
+
+    # mensaje MIME compacto (QR en base64 una sola vez)
+    MAIL_COMPACT_MIME = os.getenv("MAIL_COMPACT_MIME", "True").lower() in ("true", "1", "yes")
+
+    # cache de QR (LRU en memoria + disco compartido entre workers)
+    QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", "/tmp/reservas-qr-cache")
+    QR_CACHE_MAX_ENTRIES = int(os.getenv("QR_CACHE_MAX_ENTRIES", "1024"))
+    QR_CACHE_MAX_AGE = int(os.getenv("QR_CACHE_MAX_AGE", "86400"))
+
+    # procesos para renderizar QRs fuera de los hilos de request (0 = en el hilo)
+    QR_RENDER_PROCESSES = int(os.getenv("QR_RENDER_PROCESSES", "0"))
+
+    # prefijo interno de nginx para X-Accel-Redirect (vacío = sin nginx, se sirve desde Python)
+    QR_ACCEL_PREFIX = os.getenv("QR_ACCEL_PREFIX", "")
+
+    # cache de lookup de eventos por public_code (segundos)
+    EVENT_CACHE_TTL_SECONDS = float(os.getenv("EVENT_CACHE_TTL_SECONDS", "10"))
+
+    # Idempotency-Key en POST públicos: memory (por proceso) | db (compartido entre workers)
+    IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "50000"))
+    # cuánto espera un duplicado a que termine el request original
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+    # manifiesto offline de puerta: solapamiento del cursor ?since= (transacciones que
+    # commitean después de tomar su updated_at) y tope de check-ins por lote
+    DOOR_MANIFEST_OVERLAP_SECONDS = int(os.getenv("DOOR_MANIFEST_OVERLAP_SECONDS", "30"))
+    CHECKIN_BATCH_MAX = int(os.getenv("CHECKIN_BATCH_MAX", "500"))
+
+    # QR de reserva firmados (r1.<evento>.<reserva>.<firma HMAC>): vacío = código legacy.
+    # Los códigos legacy siguen valiendo; al activarlo los escáneres offline necesitan un snapshot completo.
+    CHECKIN_SIGNING_KEY = os.getenv("CHECKIN_SIGNING_KEY", "")
+
+    # check-in con la DB caída: journal SQLite local (vacío = apagado; mismo archivo para
+    # todos los workers del host). Manifiesto en memoria de los eventos en curso, refrescado
+    # cada REFRESH y no usado si tiene más de MAX_AGE; con la DB caída se prueba cada PROBE.
+    CHECKIN_JOURNAL_PATH = os.getenv("CHECKIN_JOURNAL_PATH", "")
+    CHECKIN_JOURNAL_REFRESH_SECONDS = float(os.getenv("CHECKIN_JOURNAL_REFRESH_SECONDS", "60"))
+    CHECKIN_JOURNAL_MAX_AGE_SECONDS = float(os.getenv("CHECKIN_JOURNAL_MAX_AGE_SECONDS", "1800"))
+    CHECKIN_JOURNAL_PROBE_SECONDS = float(os.getenv("CHECKIN_JOURNAL_PROBE_SECONDS", "5"))
+    CHECKIN_JOURNAL_LEAD_HOURS = float(os.getenv("CHECKIN_JOURNAL_LEAD_HOURS", "6"))
+
+    # búsqueda manual en puerta: trigram (Postgres con pg_trgm, índice GIN) | prefix
+    # (tabla reservation_search_terms) | auto (trigram si la extensión está instalada)
+    GUEST_SEARCH_BACKEND = os.getenv("GUEST_SEARCH_BACKEND", "auto")
+
+    # agregación de access_scans → event_access_codes.scan_count:
+    # solo escaneos más viejos que el grace (transacciones que commitean fuera de orden)
+    ACCESS_SCAN_AGGREGATE_GRACE_SECONDS = int(os.getenv("ACCESS_SCAN_AGGREGATE_GRACE_SECONDS", "60"))
+    # tope de pendientes que cuenta cada escaneo (costo fijo aunque la agregación esté atrasada);
+    # pasado el tope el scan_count que ve la puerta es un mínimo hasta que la agregación alcance
+    ACCESS_SCAN_PENDING_CAP = int(os.getenv("ACCESS_SCAN_PENDING_CAP", "1000"))
+
+    # re-escaneos del mismo QR por el mismo dispositivo: ventana en segundos (0 = apagado)
+    # memory (por worker) | redis (compartido, requiere el paquete redis)
+    SCAN_DEBOUNCE_SECONDS = float(os.getenv("SCAN_DEBOUNCE_SECONDS", "2"))
+    SCAN_DEBOUNCE_BACKEND = os.getenv("SCAN_DEBOUNCE_BACKEND", "memory")
+    SCAN_DEBOUNCE_REDIS_URL = os.getenv("SCAN_DEBOUNCE_REDIS_URL", "")
+
+    # GET /api/events/<id>/live (SSE): cada dashboard ocupa un hilo de gunicorn,
+    # por eso hay tope por worker y el stream se corta (y el cliente reconecta)
+    LIVE_TICK_SECONDS = float(os.getenv("LIVE_TICK_SECONDS", "1"))
+    LIVE_REFRESH_SECONDS = float(os.getenv("LIVE_REFRESH_SECONDS", "5"))
+    LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+    LIVE_MAX_STREAM_SECONDS = float(os.getenv("LIVE_MAX_STREAM_SECONDS", "600"))
+    LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "20"))
@@ -2,3 +2,8 @@ from .user import User, Role
 from .event import Event, EventStatus
 from .reservation import Reservation, ReservationStatus
 from .event_access_code import EventAccessCode
+from .email_outbox import EmailOutbox, EmailOutboxStatus
+from .idempotency_key import IdempotencyKey
+from .access_scan import AccessScan
+from .event_stats import EventStats
+from .reservation_search_term import ReservationSearchTerm
@@ -0,0 +1,24 @@
+from datetime import datetime
+from ..extensions import db
+
+class AccessScan(db.Model):
+    """
+    Log append-only de escaneos de códigos de acceso (solo INSERT, sin locks).
+    scan_count / last_scan_at de event_access_codes se agregan de acá.
+    """
+    __tablename__ = "access_scans"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    access_code_id = db.Column(db.Integer, db.ForeignKey("event_access_codes.id", ondelete="CASCADE"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+
+    scanned_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    scanned_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        # escaneos pendientes de agregar por código: WHERE access_code_id=:id AND id > :watermark
+        db.Index("ix_access_scans_access_code_id_id", "access_code_id", "id"),
+        # escaneos/min del tablero en vivo (y todo lo filtrado por event_id)
+        db.Index("ix_access_scans_event_id_scanned_at", "event_id", "scanned_at"),
+    )
@@ -0,0 +1,82 @@
+import base64
+import binascii
+import secrets
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Códigos de reserva / acceso: bytes en la DB (bytea, índice chico), base32 en URLs y QR.
+# base32 en mayúsculas + dígitos entra en el modo alfanumérico del QR (5.5 bits por
+# carácter en vez de 8): URL más corta → versión de QR más baja.
+MAX_BYTES = 16
+
+
+def new_code(nbytes: int = MAX_BYTES) -> str:
+    return encode(secrets.token_bytes(nbytes))
+
+
+def encode(raw: bytes) -> str:
+    return base64.b32encode(raw).decode("ascii").rstrip("=")
+
+
+def decode(text: str, legacy: str | None = None) -> bytes | None:
+    """
+    base32 (sin padding, mayúsculas o minúsculas) o el formato legacy de la columna:
+    "hex" (reservas: token_hex(16)) / "urlsafe" (accesos: token_urlsafe(10)).
+    None si no es un código válido (no matchea ninguna fila).
+    """
+    if not text or len(text) > 64:
+        return None
+
+    if legacy == "hex" and len(text) == 2 * MAX_BYTES:
+        try:
+            return bytes.fromhex(text)
+        except ValueError:
+            return None
+
+    try:
+        raw = base64.b32decode(text.upper() + "=" * (-len(text) % 8))
+        if encode(raw) == text.upper() and len(raw) <= MAX_BYTES:
+            return raw
+    except (binascii.Error, ValueError):
+        pass
+
+    if legacy == "urlsafe":
+        try:
+            raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        return raw if 0 < len(raw) <= MAX_BYTES else None
+    return None
+
+
+def canonical(text: str, legacy: str | None = None) -> str | None:
+    """
+    Forma de texto canónica (la que devuelve la DB) de cualquier forma aceptada.
+    """
+    raw = decode(text, legacy)
+    return encode(raw) if raw is not None else None
+
+
+class CompactCode(TypeDecorator):
+    """
+    Código guardado como binario (<= 16 bytes); en Python siempre texto base32.
+    Acepta también el formato legacy al comparar (QR ya enviados siguen valiendo).
+    """
+
+    impl = LargeBinary(MAX_BYTES)
+    cache_ok = True
+
+    def __init__(self, legacy: str | None = None):
+        super().__init__()
+        self.legacy = legacy
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return decode(value, self.legacy)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return encode(bytes(value))
@@ -0,0 +1,38 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Enum, ForeignKey
+from ..extensions import db
+
+class EmailOutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    failed = "failed"
+
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    reservation_id = db.Column(db.Integer, ForeignKey("reservations.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # tipo de correo (por ahora solo "invitation")
+    kind = db.Column(db.String(30), nullable=False, default="invitation")
+
+    status = db.Column(Enum(EmailOutboxStatus, name="email_outbox_status_enum"), nullable=False, default=EmailOutboxStatus.pending)
+
+    # reintentos con backoff
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    sent_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    reservation = db.relationship("Reservation", backref=db.backref("email_outbox", lazy="dynamic"))
+
+    __table_args__ = (
+        # el worker busca por (status, next_attempt_at)
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
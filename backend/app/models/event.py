@@ -24,7 +24,16 @@ class Event(db.Model):
 
     public_code = db.Column(db.String(32), unique=True, nullable=False, index=True)
 
+    # cupo (None = sin límite); reserved_count se reclama con UPDATE condicional
+    capacity = db.Column(db.Integer, nullable=True)
+    reserved_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # HTML de invitación propio del evento (None → template por defecto)
+    # marcadores: {{guest_name}}, {{event_name}}
+    email_template = db.Column(db.Text, nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     def to_dict(self):
         return {
@@ -35,4 +44,6 @@ class Event(db.Model):
             "end_at": self.end_at.isoformat(),
             "status": self.status.value,
             "public_code": self.public_code,
+            "capacity": self.capacity,
+            "reserved_count": self.reserved_count,
         }
@@ -1,5 +1,6 @@
 from datetime import datetime
 from ..extensions import db
+from .compact_code import CompactCode
 
 class EventAccessCode(db.Model):
     __tablename__ = "event_access_codes"
@@ -8,13 +9,17 @@ class EventAccessCode(db.Model):
 
     event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False, index=True)
 
-    access_code = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    # binario (base32 en URLs; acepta el token_urlsafe legacy al buscar)
+    access_code = db.Column(CompactCode(legacy="urlsafe"), nullable=False, unique=True, index=True)
     label = db.Column(db.String(120), nullable=True)
 
     is_enabled = db.Column(db.Boolean, nullable=False, default=True)
 
+    # agregados desde access_scans hasta el id scans_aggregated_through (inclusive);
+    # lo posterior se suma al leer (ver EventAccessService.pending_scans)
     scan_count = db.Column(db.Integer, nullable=False, default=0)
     last_scan_at = db.Column(db.DateTime, nullable=True)
+    scans_aggregated_through = db.Column(db.Integer, nullable=False, default=0)
 
     created_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
 
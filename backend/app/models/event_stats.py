@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import ForeignKey
+from ..extensions import db
+
+class EventStats(db.Model):
+    """
+    Contadores por evento, mantenidos en la misma transacción que cada cambio
+    (reserva, check-in, cancelación, promoción). Se recalculan con flask event-stats-reconcile.
+    """
+    __tablename__ = "event_stats"
+
+    event_id = db.Column(db.Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+
+    # con cupo: created + checked_in
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+    checked_in = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+    waitlisted = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "event_id": self.event_id,
+            "reserved": self.reserved,
+            "checked_in": self.checked_in,
+            "cancelled": self.cancelled,
+            "waitlisted": self.waitlisted,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
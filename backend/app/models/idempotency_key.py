@@ -0,0 +1,18 @@
+from datetime import datetime
+from ..extensions import db
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+
+    # sha256(scope + Idempotency-Key) en hex: largo fijo, no guarda lo que mandó el cliente
+    key_hash = db.Column(db.String(64), primary_key=True)
+
+    # sha256 del body: la misma key con otro body es un error del cliente
+    fingerprint = db.Column(db.String(64), nullable=False)
+
+    # NULL mientras el primer request sigue en curso
+    status_code = db.Column(db.Integer, nullable=True)
+    response = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -2,11 +2,14 @@ import enum
 from datetime import datetime
 from sqlalchemy import Enum, ForeignKey
 from ..extensions import db
+from .compact_code import CompactCode
 
 class ReservationStatus(str, enum.Enum):
     created = "created"
     cancelled = "cancelled"
     checked_in = "checked_in"
+    # evento lleno: en cola (por id) hasta que se libere un cupo
+    waitlisted = "waitlisted"
 
 class Reservation(db.Model):
     __tablename__ = "reservations"
@@ -22,9 +25,11 @@ class Reservation(db.Model):
     email = db.Column(db.String(180), nullable=False, index=True)  # NO UNIQUE
     phone = db.Column(db.String(40), nullable=False)
     instagram = db.Column(db.String(120), nullable=True)
+    # nombre + email + teléfono + instagram normalizados (búsqueda en puerta, ver GuestSearchService)
+    search_key = db.Column(db.String(400), nullable=True)
 
-    # QR único por reserva
-    reservation_code = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    # QR único por reserva: 16 bytes (base32 en URLs; acepta el hex legacy al buscar)
+    reservation_code = db.Column(CompactCode(legacy="hex"), unique=True, nullable=False, index=True)
 
     status = db.Column(Enum(ReservationStatus, name="reservation_status_enum"), nullable=False, default=ReservationStatus.created)
 
@@ -33,13 +38,17 @@ class Reservation(db.Model):
     scanned_by_user_id = db.Column(db.Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     scan_count = db.Column(db.Integer, nullable=False, default=0)
     last_scan_at = db.Column(db.DateTime, nullable=True)
+    # escáner que hizo el check-in (lotes / offline)
+    checkin_device_id = db.Column(db.String(64), nullable=True)
 
     # email audit
     email_sent_at = db.Column(db.DateTime, nullable=True)
-    email_send_status = db.Column(db.String(30), nullable=True)  # sent/failed
+    email_send_status = db.Column(db.String(30), nullable=True)  # queued/sent/failed
     email_error = db.Column(db.Text, nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # cualquier cambio (check-in, cancelación, promoción, email) → delta del manifiesto de puerta
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     def to_dict(self):
         return {
@@ -59,3 +68,20 @@ class Reservation(db.Model):
             "email_send_status": self.email_send_status,
             "created_at": self.created_at.isoformat(),
         }
+
+    __table_args__ = (
+        # cola de espera por evento: el siguiente es el menor id (índice parcial, chico)
+        db.Index(
+            "ix_reservations_waitlist",
+            "event_id",
+            "id",
+            postgresql_where=db.text("status = 'waitlisted'"),
+            sqlite_where=db.text("status = 'waitlisted'"),
+        ),
+        # GET /door-manifest?since=
+        db.Index("ix_reservations_event_updated_at", "event_id", "updated_at"),
+        # listado paginado por keyset (created_at, id) DESC
+        db.Index("ix_reservations_event_created_at_id", "event_id", "created_at", "id"),
+        # check-ins del último minuto (tablero en vivo)
+        db.Index("ix_reservations_event_used_at", "event_id", "used_at"),
+    )
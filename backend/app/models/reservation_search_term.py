@@ -0,0 +1,23 @@
+from sqlalchemy import ForeignKey
+from ..extensions import db
+
+class ReservationSearchTerm(db.Model):
+    """
+    Índice de prefijos para buscar invitados cuando Postgres no tiene pg_trgm:
+    un término normalizado por palabra del nombre / email / teléfono / instagram.
+    """
+    __tablename__ = "reservation_search_terms"
+
+    reservation_id = db.Column(db.Integer, ForeignKey("reservations.id", ondelete="CASCADE"), primary_key=True)
+    term = db.Column(db.String(120), primary_key=True)
+    event_id = db.Column(db.Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+
+    __table_args__ = (
+        # term LIKE 'abc%' por evento (text_pattern_ops: prefijo con índice sin importar la collation)
+        db.Index(
+            "ix_reservation_search_terms_event_term",
+            "event_id",
+            "term",
+            postgresql_ops={"term": "text_pattern_ops"},
+        ),
+    )
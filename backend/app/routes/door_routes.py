@@ -0,0 +1,83 @@
+from flask import Response, current_app, stream_with_context
+from flask.views import MethodView
+from flask_smorest import Blueprint, abort
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from ..common import checkin_token
+from ..common.rbac import roles_required
+from ..extensions import db
+from ..schemas.door_schemas import DoorManifestQuerySchema
+from ..schemas.reservation_schemas import CheckinBatchSchema, CheckinBatchResponseSchema
+from ..services.door_manifest_service import DoorManifestService
+from ..services.event_service import EventService
+from ..services.reservation_service import ReservationService
+
+door_blp = Blueprint(
+    "Door",
+    "door",
+    url_prefix="/api/events",
+    description="Manifiesto offline para escáneres de puerta"
+)
+
+# ✅ SEGURIDAD/ADMIN: snapshot o delta de códigos válidos (binario gzip)
+@door_blp.route("/<int:event_id>/door-manifest")
+class DoorManifestView(MethodView):
+    @door_blp.doc(
+        security=[{"bearerAuth": []}],
+        responses={"200": {
+            "description": "RDM2 gzip: sha256(payload del QR)[:8] + estado (0 revocada, 1 válida, 2 usada). "
+                           "Cursor para ?since= en X-Manifest-Cursor. Con QR firmados, "
+                           "X-Checkin-Key trae la clave del evento (base64url) para verificarlos offline.",
+            "content": {"application/gzip": {"schema": {"type": "string", "format": "binary"}}},
+        }},
+    )
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @door_blp.arguments(DoorManifestQuerySchema, location="query")
+    def get(self, args, event_id: int):
+        since = args.get("since")
+        try:
+            cursor, chunks = DoorManifestService.stream(event_id, since)
+        except ValueError as e:
+            msg = str(e)
+            abort(404 if msg == "EVENT_NOT_FOUND" else 400, message=msg)
+
+        headers = {
+            "X-Manifest-Cursor": cursor,
+            "X-Manifest-Mode": "delta" if since else "full",
+            "Cache-Control": "no-store",
+        }
+        # clave derivada solo de este evento: el escáner valida la firma sin red
+        key = checkin_token.event_key(event_id)
+        if key is not None:
+            headers["X-Checkin-Key"] = checkin_token.encode_event_key(key)
+
+        return Response(stream_with_context(chunks), mimetype="application/gzip", headers=headers)
+
+
+# ✅ SEGURIDAD/ADMIN: subir los check-ins hechos offline (reconciliación)
+@door_blp.route("/<int:event_id>/door-manifest/checkins")
+class DoorOfflineCheckinsView(MethodView):
+    @door_blp.doc(security=[{"bearerAuth": []}])
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @door_blp.arguments(CheckinBatchSchema, location="json")
+    @door_blp.response(200, CheckinBatchResponseSchema)
+    def post(self, data, event_id: int):
+        if len(data["items"]) > int(current_app.config.get("CHECKIN_BATCH_MAX", 500)):
+            abort(400, message="BATCH_TOO_LARGE")
+
+        if not EventService.get(event_id):
+            abort(404, message="EVENT_NOT_FOUND")
+
+        scanned_by = get_jwt_identity()
+        try:
+            items = ReservationService.checkin_batch(
+                data["items"],
+                scanned_by_user_id=int(scanned_by) if scanned_by is not None else None,
+                event_id=event_id,
+            )
+        except Exception:
+            db.session.rollback()
+            abort(500, message="SERVER_ERROR")
+        return {"items": items}
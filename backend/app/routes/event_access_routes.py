@@ -1,10 +1,9 @@
-import io
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from flask import send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from ..common.rbac import roles_required
+from ..common.debounce import debounced_scan
 from ..schemas.event_access_schemas import (
     EventAccessCodeCreateSchema,
     EventAccessCodeSchema,
@@ -12,6 +11,8 @@ from ..schemas.event_access_schemas import (
     AccessCheckResponseSchema,
 )
 from ..services.event_access_service import EventAccessService
+from ..services.qr_cache import qr_response
+from ..schemas.qr_schemas import QRQuerySchema
 
 # 1) Admin: crear/listar/qr dentro del evento
 event_access_blp = Blueprint(
@@ -30,7 +31,8 @@ class EventAccessCodesView(MethodView):
     def get(self, event_id: int):
         try:
             items = EventAccessService.list_by_event(event_id)
-            return {"items": [EventAccessService.serialize(a) for a in items]}
+            pending = EventAccessService.pending_scans([a.id for a in items])
+            return {"items": [EventAccessService.serialize(a, pending.get(a.id)) for a in items]}
         except ValueError as e:
             abort(404, message=str(e))
 
@@ -58,19 +60,20 @@ class EventAccessCodeQRView(MethodView):
     @event_access_blp.doc(security=[{"bearerAuth": []}])
     @jwt_required()
     @roles_required("admin")
-    def get(self, event_id: int, access_id: int):
+    @event_access_blp.arguments(QRQuerySchema, location="query")
+    def get(self, args, event_id: int, access_id: int):
         try:
-            png = EventAccessService.qr_png_for_access(event_id, access_id)
+            url = EventAccessService.qr_data_for_access(event_id, access_id)
         except ValueError:
             abort(404, message="NOT_FOUND")
 
-        buf = io.BytesIO(png)
-        buf.seek(0)
-        return send_file(
-            buf,
-            mimetype="image/png",
-            as_attachment=False,
-            download_name=f"event_{event_id}_access_{access_id}_qr.png",
+        return qr_response(
+            url,
+            download_name=f"event_{event_id}_access_{access_id}_qr",
+            profile="access",
+            fmt=args["format"],
+            size=args.get("size"),
+            private=True,
         )
 
 # 2) Seguridad/Admin: check (autoriza + incrementa)
@@ -88,25 +91,32 @@ class AccessCheckView(MethodView):
     @roles_required("seguridad", "admin")
     @access_check_blp.response(200, AccessCheckResponseSchema)
     def post(self, access_code: str):
-        ok, ev, a, msg = EventAccessService.check_access_atomic(access_code)
+        scanned_by = get_jwt_identity()
 
-        return {
-            "ok": bool(ok),
-            "message": msg,
-            "event": {
-                "id": ev.id,
-                "name": ev.name,
-                "status": ev.status.value,
-                "start_at": ev.start_at,
-                "end_at": ev.end_at,
-            } if ev else None,
-            "access": {
-                "id": a.id,
-                "event_id": a.event_id,
-                "label": a.label,
-                "scan_count": a.scan_count,
-                "last_scan_at": a.last_scan_at,
-                "is_enabled": a.is_enabled,
-            } if a else None,
-        }
+        def scan():
+            ok, ev, a, msg = EventAccessService.check_access_atomic(
+                access_code,
+                scanned_by_user_id=int(scanned_by) if scanned_by is not None else None,
+            )
+
+            return {
+                "ok": bool(ok),
+                "message": msg,
+                "event": {
+                    "id": ev.id,
+                    "name": ev.name,
+                    "status": ev.status.value,
+                    "start_at": ev.start_at,
+                    "end_at": ev.end_at,
+                } if ev else None,
+                "access": {
+                    "id": a.id,
+                    "event_id": a.event_id,
+                    "label": a.label,
+                    "scan_count": a.scan_count,
+                    "last_scan_at": a.last_scan_at,
+                    "is_enabled": a.is_enabled,
+                } if a else None,
+            }
 
+        return debounced_scan("access", access_code, scan)
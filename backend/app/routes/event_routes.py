@@ -1,7 +1,6 @@
-import io
+from flask import Response, current_app, stream_with_context
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from flask import send_file
 from flask_jwt_extended import jwt_required
 
 from ..schemas.event_schemas import (
@@ -9,11 +8,17 @@ from ..schemas.event_schemas import (
     EventUpdateSchema,
     EventSchema,
     EventListSchema,
+    EventStatsSchema,
 )
 from ..services.event_service import EventService
+from ..services.event_stats_service import EventStatsService
+from ..services.qr_cache import qr_response
+from ..services.live_service import get_live_broadcaster
+from ..schemas.qr_schemas import QRQuerySchema
 from ..models import Event
 from ..extensions import db
 from ..common.rbac import roles_required
+from ..common.fastjson import json_response
 
 event_blp = Blueprint(
     "Events",
@@ -25,10 +30,11 @@ event_blp = Blueprint(
 @event_blp.route("")
 class EventsView(MethodView):
     # ✅ PUBLICO: listar eventos (si quieres, luego filtramos solo active)
+    # filas Core + fastjson: EventListSchema queda solo para la doc
     @event_blp.response(200, EventListSchema)
     def get(self):
-        events = EventService.list()
-        return {"items": [EventService.serialize(e) for e in events]}
+        dump = EventService.row_serializer()
+        return json_response({"items": [dump(row) for row in EventService.list_rows()]})
 
     # ✅ SOLO ADMIN: crear evento
     @event_blp.doc(security=[{"bearerAuth": []}])
@@ -51,10 +57,10 @@ class EventDetailView(MethodView):
     # ✅ PUBLICO: ver detalle por ID
     @event_blp.response(200, EventSchema)
     def get(self, event_id: int):
-        ev = EventService.get(event_id)
-        if not ev:
+        row = EventService.get_row(event_id=event_id)
+        if not row:
             abort(404, message="NOT_FOUND")
-        return EventService.serialize(ev)
+        return json_response(EventService.row_serializer()(row))
 
     # ✅ SOLO ADMIN: actualizar (PUT/PATCH)
     @event_blp.doc(security=[{"bearerAuth": []}])
@@ -100,32 +106,87 @@ class EventPublicView(MethodView):
     # ✅ PUBLICO: ver evento por public_code (para el scan)
     @event_blp.response(200, EventSchema)
     def get(self, public_code: str):
-        ev = Event.query.filter_by(public_code=public_code).first()
-        if not ev:
+        row = EventService.get_row(public_code=public_code)
+        if not row:
             abort(404, message="NOT_FOUND")
-        return EventService.serialize(ev)
+        return json_response(EventService.row_serializer()(row))
 
 
 @event_blp.route("/<int:event_id>/qr")
 class EventQRView(MethodView):
-    # ✅ PUBLICO: QR PNG
-    def get(self, event_id: int):
-        import qrcode
-
+    # ✅ PUBLICO: QR PNG / SVG
+    @event_blp.arguments(QRQuerySchema, location="query")
+    def get(self, args, event_id: int):
         ev = db.session.get(Event, event_id)
         if not ev:
             abort(404, message="NOT_FOUND")
 
         url = EventService._public_url(ev.public_code)
 
-        img = qrcode.make(url)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
+        return qr_response(
+            url,
+            download_name=f"event_{event_id}_qr",
+            profile="event",
+            fmt=args["format"],
+            size=args.get("size"),
+        )
+
+
+# ✅ SEGURIDAD/ADMIN: contadores del evento (una fila de event_stats, sin contar reservas)
+@event_blp.route("/<int:event_id>/stats")
+class EventStatsView(MethodView):
+    @event_blp.doc(security=[{"bearerAuth": []}])
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @event_blp.response(200, EventStatsSchema)
+    def get(self, event_id: int):
+        try:
+            return EventStatsService.get(event_id)
+        except ValueError as e:
+            abort(404, message=str(e))
+
+
+# ✅ SEGURIDAD/ADMIN: contadores en vivo (SSE) en vez de recargar la lista de invitados
+@event_blp.route("/<int:event_id>/live")
+class EventLiveView(MethodView):
+    @event_blp.doc(
+        security=[{"bearerAuth": []}],
+        responses={"200": {
+            "description": "text/event-stream: event 'counters' con checked_in, reserved y scans_per_min",
+            "content": {"text/event-stream": {"schema": {"type": "string"}}},
+        }},
+    )
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    def get(self, event_id: int):
+        if not EventService.get(event_id):
+            abort(404, message="EVENT_NOT_FOUND")
+        # la conexión del request no queda tomada mientras dura el stream
+        db.session.remove()
 
-        return send_file(
-            buf,
-            mimetype="image/png",
-            as_attachment=False,
-            download_name=f"event_{event_id}_qr.png",
+        cfg = current_app.config
+        broadcaster = get_live_broadcaster()
+        try:
+            chunks = broadcaster.stream(
+                event_id,
+                heartbeat_seconds=float(cfg.get("LIVE_HEARTBEAT_SECONDS", 15)),
+                max_seconds=float(cfg.get("LIVE_MAX_STREAM_SECONDS", 600)),
+            )
+            # subscribe() corre en el primer next(): acá se valida el tope de suscriptores
+            first = next(chunks)
+        except RuntimeError as e:
+            abort(503, message=str(e))
+
+        def generate():
+            yield first
+            yield from chunks
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                # nginx: no bufferear el stream
+                "X-Accel-Buffering": "no",
+            },
         )
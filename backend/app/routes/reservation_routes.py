@@ -1,19 +1,35 @@
-import io
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from flask import send_file, jsonify
+from flask import Response, jsonify, current_app, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from ..schemas.reservation_schemas import (
     ReservationCreateSchema,
     ReservationSchema,
+    CheckinQuerySchema,
     CheckinResponseSchema,
+    CancelResponseSchema,
+    CheckinBatchSchema,
+    CheckinBatchResponseSchema,
+    ReservationListQuerySchema,
+    ReservationExportQuerySchema,
     ReservationListSchema,
+    GuestSearchQuerySchema,
+    GuestSearchResponseSchema,
 )
 from ..services.reservation_service import ReservationService
+from ..services.checkin_journal import checkin_with_fallback
+from ..services.event_stats_service import EventStatsService
+from ..services.guest_search_service import GuestSearchService
+from ..services.reservation_export_service import ReservationExportService, FORMATS as EXPORT_FORMATS
+from ..services.qr_cache import qr_response, qr_accel_response, get_qr_cache
+from ..schemas.qr_schemas import QRQuerySchema
 from ..extensions import db
-from ..models import Reservation
+from ..models import Event, Reservation
 from ..common.rbac import roles_required
+from ..common.idempotency import run_idempotent, IDEMPOTENCY_ERRORS
+from ..common.debounce import debounced_scan
+from ..common.fastjson import json_response
 
 reservation_blp = Blueprint(
     "Reservations",
@@ -27,61 +43,148 @@ reservation_blp = Blueprint(
 class PublicReservationCreateView(MethodView):
     @reservation_blp.arguments(ReservationCreateSchema, location="json")
     @reservation_blp.response(201, ReservationSchema)
+    @reservation_blp.doc(parameters=[{
+        "in": "header",
+        "name": "Idempotency-Key",
+        "required": False,
+        "schema": {"type": "string", "maxLength": 255},
+        "description": "Reintentos con la misma key devuelven la reserva original",
+    }])
     def post(self, data, public_code: str):
-        try:
+        def create():
             r = ReservationService.create_public_reservation(public_code, data)
-            return ReservationService.serialize(r)
+            return ReservationService.serialize(r), 201
+
+        try:
+            body, status, replayed = run_idempotent(
+                f"reservation:{public_code}",
+                request.headers.get("Idempotency-Key"),
+                data,
+                create,
+            )
         except ValueError as e:
-            abort(400, message=str(e))
+            msg = str(e)
+            abort(IDEMPOTENCY_ERRORS.get(msg, 400), message=msg)
         except Exception:
             abort(500, message="SERVER_ERROR")
 
+        if replayed:
+            return body, status, {"Idempotent-Replayed": "true"}
+        return body, status
+
 
 # ✅ PUBLICO: QR PNG de la reserva (para descargar/preview)
 @reservation_blp.route("/<int:reservation_id>/qr")
 class ReservationQRView(MethodView):
-    def get(self, reservation_id: int):
+    @reservation_blp.arguments(QRQuerySchema, location="query")
+    def get(self, args, reservation_id: int):
+        download_name = f"reservation_{reservation_id}_qr"
+
         try:
-            png = ReservationService.qr_png_for_reservation(reservation_id)
+            url = ReservationService.qr_data_for_reservation(reservation_id)
         except ValueError:
             abort(404, message="NOT_FOUND")
 
-        buf = io.BytesIO(png)
-        buf.seek(0)
-        return send_file(
-            buf,
-            mimetype="image/png",
-            as_attachment=False,
-            download_name=f"reservation_{reservation_id}_qr.png",
+        # PNG por defecto + nginx delante → X-Accel-Redirect al asset pre-generado
+        # (el alias se re-apunta si el contenido del QR cambió)
+        if current_app.config.get("QR_ACCEL_PREFIX") and args["format"] == "png" and not args.get("size"):
+            alias = ReservationService.qr_asset_alias(reservation_id)
+            get_qr_cache().link_alias(alias, url, profile="reservation")
+            return qr_accel_response(alias, download_name=download_name)
+
+        return qr_response(
+            url,
+            download_name=download_name,
+            profile="reservation",
+            fmt=args["format"],
+            size=args.get("size"),
         )
 
 
+# ✅ SEGURIDAD/ADMIN: escaneos encolados por el escáner, un request y una transacción por lote
+@reservation_blp.route("/checkin/batch")
+class ReservationCheckinBatchView(MethodView):
+    @reservation_blp.doc(security=[{"bearerAuth": []}])
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @reservation_blp.arguments(CheckinBatchSchema, location="json")
+    @reservation_blp.response(200, CheckinBatchResponseSchema)
+    def post(self, data):
+        if len(data["items"]) > int(current_app.config.get("CHECKIN_BATCH_MAX", 500)):
+            abort(400, message="BATCH_TOO_LARGE")
+
+        scanned_by = get_jwt_identity()
+        try:
+            items = ReservationService.checkin_batch(
+                data["items"],
+                scanned_by_user_id=int(scanned_by) if scanned_by is not None else None,
+            )
+        except Exception:
+            db.session.rollback()
+            abort(500, message="SERVER_ERROR")
+        return {"items": items}
+
+
 @reservation_blp.route("/checkin/<string:reservation_code>")
 class ReservationCheckinView(MethodView):
     @reservation_blp.doc(security=[{"bearerAuth": []}])
     @jwt_required()
     @roles_required("seguridad", "admin")
+    @reservation_blp.arguments(CheckinQuerySchema, location="query")
     @reservation_blp.response(200, CheckinResponseSchema)
-    def post(self, reservation_code: str):
+    def post(self, args, reservation_code: str):
         scanned_by = get_jwt_identity()
 
-        ok, r, msg = ReservationService.checkin_atomic(
-            reservation_code=reservation_code,
-            scanned_by_user_id=int(scanned_by) if scanned_by is not None else None,
-        )
+        def scan():
+            # QR firmado: firma / evento inválidos se rechazan antes de consultar la DB.
+            # DB caída + CHECKIN_JOURNAL_PATH: se valida contra el manifiesto en memoria (OK_DEGRADED)
+            ok, r, msg = checkin_with_fallback(
+                reservation_code,
+                scanned_by_user_id=int(scanned_by) if scanned_by is not None else None,
+                event_id=args.get("event_id"),
+                device_id=request.headers.get("X-Device-Id"),
+            )
+
+            return {
+                "ok": bool(ok),
+                "message": msg,
+                "reservation_id": r.id if r else None,
+                "used_at": r.used_at if (r and r.used_at) else None,
+                "reservation": {
+                    "id": r.id,
+                    "first_name": r.first_name,
+                    "last_name": r.last_name,
+                    "status": r.status.value if getattr(r.status, "value", None) else str(r.status),
+                    "used_at": r.used_at if r.used_at else None,
+                } if r else None,
+            }
+
+        # el mismo QR disparado 2-3 veces seguidas → mismo resultado, sin ir a la DB
+        return debounced_scan("checkin", reservation_code, scan)
+
+# ✅ ADMIN: cancelar reserva (si liberaba cupo, se promueve el siguiente en espera)
+@reservation_blp.route("/<int:reservation_id>/cancel")
+class ReservationCancelView(MethodView):
+    @reservation_blp.doc(security=[{"bearerAuth": []}])
+    @jwt_required()
+    @roles_required("admin")
+    @reservation_blp.response(200, CancelResponseSchema)
+    def post(self, reservation_id: int):
+        try:
+            r, promoted_id = ReservationService.cancel(reservation_id)
+        except ValueError as e:
+            msg = str(e)
+            if msg == "NOT_FOUND":
+                abort(404, message=msg)
+            abort(409, message=msg)
+        except Exception:
+            db.session.rollback()
+            abort(500, message="SERVER_ERROR")
 
         return {
-            "ok": bool(ok),
-            "message": msg,
-            "reservation_id": r.id if r else None,
-            "used_at": r.used_at if (r and r.used_at) else None,
-            "reservation": {
-                "id": r.id,
-                "first_name": r.first_name,
-                "last_name": r.last_name,
-                "status": r.status.value if getattr(r.status, "value", None) else str(r.status),
-                "used_at": r.used_at if r.used_at else None,
-            } if r else None,
+            "ok": True,
+            "reservation": ReservationService.serialize(r),
+            "promoted_reservation_id": promoted_id,
         }
 
 @reservation_blp.route("/event/<int:event_id>")
@@ -89,17 +192,93 @@ class ReservationsByEventView(MethodView):
     @reservation_blp.doc(security=[{"bearerAuth": []}])
     @jwt_required()
     @roles_required("seguridad", "admin")
+    @reservation_blp.arguments(ReservationListQuerySchema, location="query")
     @reservation_blp.response(200, ReservationListSchema)
-    def get(self, event_id: int):
+    def get(self, args, event_id: int):
         try:
-            items = ReservationService.list_by_event(event_id)
-            return {
-                "total": len(items),
-                "items": [ReservationService.serialize(r) for r in items],
-            }
+            # una fila de event_stats: existe el evento + totales, sin contar la lista
+            stats = EventStatsService.get(event_id)
+            rows, next_cursor = ReservationService.list_page(event_id, **args)
+            dump = ReservationService.row_serializer(event_id)
+            # filas Core + fastjson: ReservationListSchema queda solo para la doc
+            return json_response({
+                "total": None if args["email_send_status"] else ReservationService.page_total(
+                    stats, args["status"], args["checked_in"]
+                ),
+                "items": [dump(row) for row in rows],
+                "next_cursor": next_cursor,
+                "stats": stats,
+            })
         except ValueError as e:
             if str(e) == "EVENT_NOT_FOUND":
                 abort(404, message="EVENT_NOT_FOUND")
             abort(400, message=str(e))
         except Exception:
-            abort(500, message="SERVER_ERROR")
\ No newline at end of file
+            abort(500, message="SERVER_ERROR")
+
+# ✅ SEGURIDAD/ADMIN: búsqueda manual en puerta (invitado sin QR)
+@reservation_blp.route("/event/<int:event_id>/search")
+class ReservationSearchView(MethodView):
+    @reservation_blp.doc(security=[{"bearerAuth": []}])
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @reservation_blp.arguments(GuestSearchQuerySchema, location="query")
+    @reservation_blp.response(200, GuestSearchResponseSchema)
+    def get(self, args, event_id: int):
+        if db.session.get(Event, event_id) is None:
+            abort(404, message="EVENT_NOT_FOUND")
+        try:
+            rows = GuestSearchService.search(event_id, args["q"], args["limit"])
+        except Exception:
+            abort(500, message="SERVER_ERROR")
+        return {
+            "backend": GuestSearchService.backend(),
+            "items": [{**row._asdict(), "status": row.status.value} for row in rows],
+        }
+
+# ✅ SEGURIDAD/ADMIN: lista de invitados completa (CSV / NDJSON) en streaming
+@reservation_blp.route("/event/<int:event_id>/export")
+class ReservationsExportView(MethodView):
+    @reservation_blp.doc(
+        security=[{"bearerAuth": []}],
+        responses={"200": {
+            "description": (
+                "Una fila por reserva (chunked). Con ?gzip=true: Content-Encoding: gzip si el cliente "
+                "manda Accept-Encoding: gzip; si no, application/gzip con nombre .gz."
+            ),
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+            },
+        }},
+    )
+    @jwt_required()
+    @roles_required("seguridad", "admin")
+    @reservation_blp.arguments(ReservationExportQuerySchema, location="query")
+    def get(self, args, event_id: int):
+        fmt = args["format"]
+        try:
+            chunks = ReservationExportService.stream(event_id, fmt, compress=args["gzip"])
+        except ValueError as e:
+            msg = str(e)
+            abort(404 if msg == "EVENT_NOT_FOUND" else 400, message=msg)
+
+        filename = f"event_{event_id}_reservations.{fmt}"
+        mimetype = EXPORT_FORMATS[fmt]
+        headers = {
+            "Cache-Control": "no-store",
+            # nginx: entregar cada chunk apenas sale
+            "X-Accel-Buffering": "no",
+        }
+        if args["gzip"]:
+            # con gzip la respuesta depende de Accept-Encoding
+            headers["Vary"] = "Accept-Encoding"
+            if request.accept_encodings["gzip"]:
+                headers["Content-Encoding"] = "gzip"
+            else:
+                # el cliente no acepta gzip como encoding: se baja el .gz tal cual
+                filename, mimetype = f"{filename}.gz", "application/gzip"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
@@ -0,0 +1,5 @@
+from marshmallow import Schema, fields
+
+class DoorManifestQuerySchema(Schema):
+    # cursor devuelto en X-Manifest-Cursor por la descarga anterior
+    since = fields.Str(required=False, load_default=None, allow_none=True)
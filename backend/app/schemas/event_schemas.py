@@ -6,6 +6,8 @@ class EventCreateSchema(Schema):
     start_at = fields.DateTime(required=True) 
     end_at = fields.DateTime(required=True)
     status = fields.String(required=False)  
+    email_template = fields.String(required=False, allow_none=True)
+    capacity = fields.Int(required=False, allow_none=True, validate=validate.Range(min=1))
 
     @validates_schema
     def validate_dates(self, data, **kwargs):
@@ -18,6 +20,8 @@ class EventUpdateSchema(Schema):
     start_at = fields.DateTime(required=False)
     end_at = fields.DateTime(required=False)
     status = fields.String(required=False)
+    email_template = fields.String(required=False, allow_none=True)
+    capacity = fields.Int(required=False, allow_none=True, validate=validate.Range(min=1))
 
     @validates_schema
     def validate_dates(self, data, **kwargs):
@@ -33,8 +37,19 @@ class EventSchema(Schema):
     end_at = fields.String(required=True)
     status = fields.String(required=True)
     public_code = fields.String(required=True)
+    capacity = fields.Int(allow_none=True)
+    reserved_count = fields.Int(required=True)
     public_url = fields.String(required=True)
     qr_url = fields.String(required=True)
 
 class EventListSchema(Schema):
     items = fields.List(fields.Nested(EventSchema), required=True)
+
+class EventStatsSchema(Schema):
+    event_id = fields.Int(required=True)
+    capacity = fields.Int(allow_none=True)
+    reserved = fields.Int(required=True)
+    checked_in = fields.Int(required=True)
+    cancelled = fields.Int(required=True)
+    waitlisted = fields.Int(required=True)
+    updated_at = fields.DateTime(allow_none=True)
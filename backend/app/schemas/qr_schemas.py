@@ -0,0 +1,13 @@
+from marshmallow import Schema, fields, validate
+
+from ..services.qr_render import FORMATS, MIN_SIZE, MAX_SIZE
+
+class QRQuerySchema(Schema):
+    format = fields.String(required=False, load_default="png", validate=validate.OneOf(FORMATS))
+    size = fields.Int(
+        required=False,
+        load_default=None,
+        allow_none=True,
+        validate=validate.Range(min=MIN_SIZE, max=MAX_SIZE),
+        metadata={"description": "Lado exacto de la imagen en px (default: 10 px por módulo)."},
+    )
@@ -1,5 +1,7 @@
 from marshmallow import Schema, fields, validate
 
+from .event_schemas import EventStatsSchema
+
 class ReservationCreateSchema(Schema):
     first_name = fields.String(required=True, validate=validate.Length(min=2, max=120))
     last_name = fields.String(required=True, validate=validate.Length(min=2, max=120))
@@ -29,8 +31,9 @@ class ReservationSchema(Schema):
 
     created_at = fields.String(required=True)
 
-    checkin_url = fields.String(required=True)
-    qr_url = fields.String(required=True)
+    # null en espera o cancelada (sin QR)
+    checkin_url = fields.String(required=True, allow_none=True)
+    qr_url = fields.String(required=True, allow_none=True)
 
 class ReservationListSchema(Schema):
     items = fields.List(fields.Nested(ReservationSchema), required=True)
@@ -44,6 +47,10 @@ class CheckinReservationMiniSchema(Schema):
     status = fields.Str()
     used_at = fields.DateTime(allow_none=True)
 
+class CheckinQuerySchema(Schema):
+    # evento de la puerta que escanea: un QR de otro evento se rechaza (WRONG_EVENT)
+    event_id = fields.Int(required=False, load_default=None)
+
 class CheckinResponseSchema(Schema):
     ok = fields.Bool(required=True)                
     message = fields.Str(required=True)
@@ -52,6 +59,74 @@ class CheckinResponseSchema(Schema):
     reservation = fields.Nested(CheckinReservationMiniSchema, allow_none=True) 
 
 
+class CheckinBatchItemSchema(Schema):
+    reservation_code = fields.Str(required=True, validate=validate.Length(min=1, max=64))
+    # hora del escaneo en el dispositivo (si falta, la del servidor)
+    scanned_at = fields.DateTime(required=False, allow_none=True)
+    device_id = fields.Str(required=False, allow_none=True, validate=validate.Length(max=64))
+
+class CheckinBatchSchema(Schema):
+    items = fields.List(fields.Nested(CheckinBatchItemSchema), required=True, validate=validate.Length(min=1))
+
+class CheckinBatchResultSchema(Schema):
+    reservation_code = fields.Str(required=True)
+    result = fields.Str(required=True)
+    reservation_id = fields.Int(allow_none=True)
+    used_at = fields.DateTime(allow_none=True)
+
+class CheckinBatchResponseSchema(Schema):
+    items = fields.List(fields.Nested(CheckinBatchResultSchema), required=True)
+
+
+class CancelResponseSchema(Schema):
+    ok = fields.Bool(required=True)
+    reservation = fields.Nested(ReservationSchema, required=True)
+    promoted_reservation_id = fields.Int(allow_none=True)
+
+
+class ReservationListQuerySchema(Schema):
+    limit = fields.Int(required=False, load_default=100, validate=validate.Range(min=1, max=500))
+    # next_cursor de la página anterior
+    cursor = fields.Str(required=False, load_default=None, allow_none=True)
+    status = fields.Str(
+        required=False,
+        load_default=None,
+        validate=validate.OneOf(["created", "cancelled", "checked_in", "waitlisted"], error="INVALID_STATUS"),
+    )
+    checked_in = fields.Bool(required=False, load_default=None, allow_none=True)
+    email_send_status = fields.Str(required=False, load_default=None, validate=validate.Length(max=30))
+
+class ReservationExportQuerySchema(Schema):
+    format = fields.Str(required=False, load_default="csv", validate=validate.OneOf(["csv", "ndjson"]))
+    # gzip: Content-Encoding si el cliente lo acepta, si no archivo .gz (application/gzip)
+    gzip = fields.Bool(required=False, load_default=False)
+
 class ReservationListSchema(Schema):
-    total = fields.Int(required=True)
+    # total de los filtros según event_stats (None si filtra por email_send_status)
+    total = fields.Int(allow_none=True)
     items = fields.List(fields.Nested(ReservationSchema), required=True)
+    next_cursor = fields.Str(allow_none=True)
+    stats = fields.Nested(EventStatsSchema)
+
+
+class GuestSearchQuerySchema(Schema):
+    # nombre, apellido, email, teléfono o instagram (parcial)
+    q = fields.Str(required=True, validate=validate.Length(min=2, max=120))
+    limit = fields.Int(required=False, load_default=10, validate=validate.Range(min=1, max=50))
+
+class GuestSearchItemSchema(Schema):
+    id = fields.Int(required=True)
+    first_name = fields.Str(required=True)
+    last_name = fields.Str(required=True)
+    email = fields.Str(required=True)
+    phone = fields.Str(required=True)
+    instagram = fields.Str(allow_none=True)
+    reservation_code = fields.Str(required=True)
+    status = fields.Str(required=True)
+    used_at = fields.DateTime(allow_none=True)
+    # similitud trigram (None con el índice de prefijos)
+    score = fields.Float(allow_none=True)
+
+class GuestSearchResponseSchema(Schema):
+    backend = fields.Str(required=True)
+    items = fields.List(fields.Nested(GuestSearchItemSchema), required=True)
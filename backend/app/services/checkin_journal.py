@@ -0,0 +1,427 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, text
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from ..common import checkin_token
+from ..extensions import db
+from ..models import Event, EventStatus, Reservation, ReservationStatus
+from ..models.compact_code import canonical
+
+# errores que significan "la DB no está" (no errores de datos)
+DB_DOWN_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reservation_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    reservation_code TEXT NOT NULL,
+    scanned_at TEXT NOT NULL,
+    scanned_by_user_id INTEGER,
+    device_id TEXT,
+    worker INTEGER NOT NULL,
+    replayed_at TEXT,
+    result TEXT
+);
+-- una reserva se usa una sola vez: un segundo escaneo en cualquier worker del host choca acá
+CREATE UNIQUE INDEX IF NOT EXISTS ux_checkins_reservation ON checkins (reservation_id);
+CREATE INDEX IF NOT EXISTS ix_checkins_pending ON checkins (id) WHERE replayed_at IS NULL;
+"""
+
+
+class CheckinJournal:
+    """
+    Journal local (SQLite, WAL + synchronous=FULL: cada append queda en disco antes de responder).
+    Compartido por los workers del host: mismo archivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def append(self, entry: dict) -> bool:
+        """
+        False si la reserva ya estaba en el journal (re-escaneo / otro worker).
+        """
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO checkins (reservation_id, event_id, reservation_code, scanned_at,"
+                    " scanned_by_user_id, device_id, worker) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry["reservation_id"],
+                        entry["event_id"],
+                        entry["reservation_code"],
+                        entry["scanned_at"].isoformat(),
+                        entry.get("scanned_by_user_id"),
+                        entry.get("device_id"),
+                        os.getpid(),
+                    ),
+                )
+            except sqlite3.IntegrityError:
+                return False
+        return True
+
+    def pending(self, limit: int) -> list[dict]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, reservation_id, event_id, reservation_code, scanned_at, scanned_by_user_id, device_id"
+                " FROM checkins WHERE replayed_at IS NULL ORDER BY id LIMIT ?",
+                (limit,),
+            )
+            cols = [c[0] for c in cur.description]
+            rows = [dict(zip(cols, row)) for row in cur.fetchall()]
+        for row in rows:
+            row["scanned_at"] = datetime.fromisoformat(row["scanned_at"])
+        return rows
+
+    def mark(self, results: dict[int, str]):
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "UPDATE checkins SET replayed_at = ?, result = ? WHERE id = ?",
+                [(now, result, jid) for jid, result in results.items()],
+            )
+            self._conn.execute("COMMIT")
+
+    def conflicts(self, limit: int = 100) -> list[dict]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, reservation_id, event_id, scanned_at, device_id, worker, result"
+                " FROM checkins WHERE result IS NOT NULL AND result != 'OK' ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def counts(self) -> dict:
+        with self._lock:
+            pending, conflicts = self._conn.execute(
+                "SELECT COALESCE(SUM(replayed_at IS NULL), 0),"
+                " COALESCE(SUM(result IS NOT NULL AND result != 'OK'), 0) FROM checkins"
+            ).fetchone()
+        return {"pending": int(pending), "conflicts": int(conflicts)}
+
+
+class DegradedCheckin:
+    """
+    Modo degradado del check-in (por worker):
+    - con la DB sana, un hilo mantiene en memoria el manifiesto de los eventos en curso
+    - si checkin_atomic falla por la DB, se entra en modo degradado: se valida contra ese
+      manifiesto y se anota en el journal (sin volver a esperar timeouts de la DB)
+    - el mismo hilo prueba la DB cada probe_seconds; al volver, sale del modo y reproduce
+      el journal en orden (conflictos quedan anotados en el journal)
+    """
+
+    def __init__(self, app, journal: CheckinJournal, refresh_seconds: float, max_age_seconds: float,
+                 probe_seconds: float, lead_hours: float):
+        self.app = app
+        self.journal = journal
+        self.refresh_seconds = refresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.probe_seconds = probe_seconds
+        self.lead_hours = lead_hours
+
+        self._lock = threading.Lock()
+        self._degraded_since: datetime | None = None
+        self._last_transition: datetime | None = None
+        self._by_id: dict[int, dict] = {}
+        self._by_code: dict[str, int] = {}
+        self._events: dict[int, tuple[datetime, EventStatus]] = {}
+        self._loaded_at: float | None = None
+        self._thread: threading.Thread | None = None
+
+    # --- estado ---
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded_since is not None
+
+    def enter(self, error: Exception):
+        with self._lock:
+            if self._degraded_since is not None:
+                return
+            self._degraded_since = self._last_transition = datetime.utcnow()
+        current_app.logger.warning("CHECKIN degraded mode ON: %s", error)
+
+    def _leave(self):
+        with self._lock:
+            self._degraded_since = None
+            self._last_transition = datetime.utcnow()
+        current_app.logger.warning("CHECKIN degraded mode OFF")
+
+    def stats(self) -> dict:
+        age = time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+        return {
+            "mode": "degraded" if self.degraded else "normal",
+            "degraded_since": self._degraded_since.isoformat() if self._degraded_since else None,
+            "last_transition": self._last_transition.isoformat() if self._last_transition else None,
+            "manifest_reservations": len(self._by_id),
+            "manifest_age_seconds": round(age, 1) if age is not None else None,
+            **self.journal.counts(),
+        }
+
+    # --- manifiesto en memoria ---
+
+    def refresh(self):
+        """
+        Reservas de los eventos en curso (o que empiezan en lead_hours), una lectura.
+        """
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(
+                Reservation.id,
+                Reservation.event_id,
+                Reservation.reservation_code,
+                Reservation.status,
+                Reservation.first_name,
+                Reservation.last_name,
+                Event.end_at,
+                Event.status.label("event_status"),
+            )
+            .join(Event, Event.id == Reservation.event_id)
+            .where(Event.start_at <= now + timedelta(hours=self.lead_hours))
+            .where(Event.end_at > now)
+            .where(Event.status.not_in([EventStatus.ended, EventStatus.cancelled]))
+            .execution_options(yield_per=5000)
+        )
+
+        by_id, by_code, events = {}, {}, {}
+        for row in rows:
+            by_id[row.id] = {
+                "event_id": row.event_id,
+                "reservation_code": row.reservation_code,
+                "status": row.status,
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+            }
+            by_code[row.reservation_code] = row.id
+            events[row.event_id] = (row.end_at, row.event_status)
+
+        with self._lock:
+            self._by_id, self._by_code, self._events = by_id, by_code, events
+            self._loaded_at = time.monotonic()
+
+    def _lookup(self, reservation_code: str, event_id: int | None) -> tuple[int | None, str | None]:
+        if checkin_token.is_signed(reservation_code):
+            try:
+                signed_event_id, rid = checkin_token.verify(reservation_code)
+            except ValueError as e:
+                return None, str(e)
+            if event_id is not None and signed_event_id != event_id:
+                return None, "WRONG_EVENT"
+            item = self._by_id.get(rid)
+            return (rid, None) if item and item["event_id"] == signed_event_id else (None, "NOT_FOUND")
+
+        code = canonical(reservation_code, "hex")
+        rid = self._by_code.get(code) if code else None
+        if rid is None:
+            return None, "NOT_FOUND"
+        if event_id is not None and self._by_id[rid]["event_id"] != event_id:
+            return None, "WRONG_EVENT"
+        return rid, None
+
+    def checkin(self, reservation_code: str, scanned_by_user_id: int | None, event_id: int | None = None,
+                device_id: str | None = None) -> tuple[bool, Reservation | None, str]:
+        """
+        Mismo contrato que ReservationService.checkin_atomic, sin DB.
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age_seconds:
+            return False, None, "DEGRADED_NO_MANIFEST"
+
+        rid, error = self._lookup(reservation_code, event_id)
+        if error:
+            return False, None, error
+
+        item = self._by_id[rid]
+        r = Reservation(id=rid, first_name=item["first_name"], last_name=item["last_name"], status=item["status"])
+        now = datetime.utcnow()
+
+        end_at, event_status = self._events[item["event_id"]]
+        if end_at <= now:
+            return False, r, "EVENT_ENDED"
+        if event_status in (EventStatus.ended, EventStatus.cancelled):
+            return False, r, "EVENT_NOT_AVAILABLE"
+        if item["status"] != ReservationStatus.created:
+            return False, r, "ALREADY_USED" if item["status"] == ReservationStatus.checked_in else "NOT_VALID"
+
+        appended = self.journal.append({
+            "reservation_id": rid,
+            "event_id": item["event_id"],
+            "reservation_code": item["reservation_code"],
+            "scanned_at": now,
+            "scanned_by_user_id": scanned_by_user_id,
+            "device_id": device_id,
+        })
+        item["status"] = ReservationStatus.checked_in
+        if not appended:
+            return False, r, "ALREADY_USED"
+
+        r.status = ReservationStatus.checked_in
+        r.used_at = now
+        return True, r, "OK_DEGRADED"
+
+    def note_checked_in(self, reservation_id: int):
+        # check-in normal: el manifiesto en memoria no espera al próximo refresco
+        item = self._by_id.get(reservation_id)
+        if item is not None:
+            item["status"] = ReservationStatus.checked_in
+
+    # --- hilo: refresco / prueba de la DB / replay ---
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="checkin-journal", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            last_refresh = None
+            while True:
+                try:
+                    if self.degraded:
+                        db.session.execute(text("SELECT 1"))
+                        db.session.rollback()
+                        self._leave()
+                        replay(self.journal)
+                        last_refresh = None
+                    if last_refresh is None or time.monotonic() - last_refresh >= self.refresh_seconds:
+                        self.refresh()
+                        last_refresh = time.monotonic()
+                    elif self.journal.counts()["pending"]:
+                        # entradas de otro worker que quedaron sin reproducir
+                        replay(self.journal)
+                except DB_DOWN_ERRORS as e:
+                    self._rollback()
+                    self.enter(e)
+                except Exception:
+                    self._rollback()
+                    current_app.logger.exception("CHECKIN journal thread error")
+                finally:
+                    db.session.remove()
+                time.sleep(self.probe_seconds)
+
+    @staticmethod
+    def _rollback():
+        try:
+            db.session.rollback()
+        except Exception:
+            pass
+
+
+def replay(journal: CheckinJournal, batch_size: int = 200) -> tuple[int, int]:
+    """
+    Reproduce el journal en orden (por id) con checkin_batch: una transacción por lote y usuario.
+    - OK: aplicado
+    - ALREADY_USED con used_at == hora del escaneo: ya se había aplicado (replay interrumpido)
+    - cualquier otro resultado queda como CONFLICT_<resultado> (p. ej. doble uso entre hosts)
+    Devuelve (aplicados, conflictos).
+    """
+    from .reservation_service import ReservationService
+
+    applied = conflicts = 0
+    while True:
+        rows = journal.pending(batch_size)
+        if not rows:
+            return applied, conflicts
+
+        by_user: dict[int | None, list[dict]] = {}
+        for row in rows:
+            by_user.setdefault(row["scanned_by_user_id"], []).append(row)
+
+        results: dict[int, str] = {}
+        for user_id, entries in by_user.items():
+            out = ReservationService.checkin_batch(
+                [
+                    {"reservation_code": e["reservation_code"], "scanned_at": e["scanned_at"], "device_id": e["device_id"]}
+                    for e in entries
+                ],
+                scanned_by_user_id=user_id,
+            )
+            for e, res in zip(entries, out):
+                if res["result"] == "OK" or (res["result"] == "ALREADY_USED" and res["used_at"] == e["scanned_at"]):
+                    results[e["id"]] = "OK"
+                    applied += 1
+                else:
+                    results[e["id"]] = f"CONFLICT_{res['result']}"
+                    conflicts += 1
+                    current_app.logger.warning(
+                        "CHECKIN journal conflict: reservation %s (%s)", e["reservation_id"], res["result"]
+                    )
+        journal.mark(results)
+
+
+def checkin_with_fallback(reservation_code: str, scanned_by_user_id: int | None, event_id: int | None = None,
+                          device_id: str | None = None) -> tuple[bool, Reservation | None, str]:
+    """
+    checkin_atomic; si la DB no responde (y hay journal configurado), modo degradado.
+    """
+    from .reservation_service import ReservationService
+
+    degraded = get_degraded_checkin()
+    if degraded is None:
+        return ReservationService.checkin_atomic(reservation_code, scanned_by_user_id, event_id=event_id)
+
+    degraded.ensure_started()
+    if not degraded.degraded:
+        try:
+            ok, r, msg = ReservationService.checkin_atomic(reservation_code, scanned_by_user_id, event_id=event_id)
+        except DB_DOWN_ERRORS as e:
+            DegradedCheckin._rollback()
+            degraded.enter(e)
+        else:
+            if ok:
+                degraded.note_checked_in(r.id)
+            return ok, r, msg
+    return degraded.checkin(reservation_code, scanned_by_user_id, event_id=event_id, device_id=device_id)
+
+
+_degraded_lock = threading.Lock()
+
+
+def get_degraded_checkin() -> DegradedCheckin | None:
+    """
+    Por proceso; None si CHECKIN_JOURNAL_PATH no está configurado.
+    """
+    app = current_app._get_current_object()
+    path = app.config.get("CHECKIN_JOURNAL_PATH")
+    if not path:
+        return None
+
+    degraded = app.extensions.get("checkin_journal")
+    if degraded is not None:
+        return degraded
+
+    with _degraded_lock:
+        degraded = app.extensions.get("checkin_journal")
+        if degraded is None:
+            cfg = app.config
+            degraded = DegradedCheckin(
+                app,
+                CheckinJournal(path),
+                refresh_seconds=float(cfg.get("CHECKIN_JOURNAL_REFRESH_SECONDS", 60)),
+                max_age_seconds=float(cfg.get("CHECKIN_JOURNAL_MAX_AGE_SECONDS", 1800)),
+                probe_seconds=float(cfg.get("CHECKIN_JOURNAL_PROBE_SECONDS", 5)),
+                lead_hours=float(cfg.get("CHECKIN_JOURNAL_LEAD_HOURS", 6)),
+            )
+            app.extensions["checkin_journal"] = degraded
+        return degraded
+
+
+def checkin_journal_stats() -> dict | None:
+    degraded = current_app.extensions.get("checkin_journal")
+    return degraded.stats() if degraded is not None else None
@@ -0,0 +1,97 @@
+import hashlib
+import zlib
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..common import checkin_token
+from ..extensions import db
+from ..models import Event, Reservation, ReservationStatus
+
+# Formato (gzip):
+#   cabecera: b"RDM2" + 1 byte con el largo del hash
+#   registros de largo fijo: sha256(payload del QR)[:8] + 1 byte de estado
+#   payload = QR firmado (r1.…) si hay CHECKIN_SIGNING_KEY, si no reservation_code en base32
+#   (RDM2: un QR legacy en hex se pasa a base32 en el escáner antes de hashear)
+MAGIC = b"RDM2"
+HASH_BYTES = 8
+
+STATUS_REVOKED = 0  # cancelada / en espera: no entra
+STATUS_VALID = 1
+STATUS_USED = 2
+
+_STATUS_BYTES = {
+    ReservationStatus.created: STATUS_VALID,
+    ReservationStatus.checked_in: STATUS_USED,
+}
+
+# se flushea al compresor cada ~64KB de registros
+_CHUNK = 64 * 1024
+_EPOCH = datetime(1970, 1, 1)
+
+
+class DoorManifestService:
+    @staticmethod
+    def code_hash(reservation_code: str) -> bytes:
+        return hashlib.sha256(reservation_code.encode("utf-8")).digest()[:HASH_BYTES]
+
+    @staticmethod
+    def encode_cursor(dt: datetime) -> str:
+        # microsegundos desde epoch (UTC): opaco para el dispositivo
+        return str((dt - _EPOCH) // timedelta(microseconds=1))
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> datetime:
+        try:
+            return _EPOCH + timedelta(microseconds=int(cursor))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError("INVALID_CURSOR")
+
+    @staticmethod
+    def stream(event_id: int, since: str | None = None) -> tuple[str, Iterator[bytes]]:
+        """
+        Snapshot (sin since: solo códigos válidos o usados) o delta
+        (con since: todo lo que cambió, incluidas revocaciones).
+        Devuelve (cursor para el próximo ?since=, generador de bytes gzip).
+        Lee con yield_per: no hidrata objetos Reservation ni arma la lista en memoria.
+        """
+        if db.session.get(Event, event_id) is None:
+            raise ValueError("EVENT_NOT_FOUND")
+
+        now = datetime.utcnow()
+        cursor = DoorManifestService.encode_cursor(now)
+
+        stmt = select(Reservation.id, Reservation.reservation_code, Reservation.status).where(
+            Reservation.event_id == event_id
+        )
+        if since:
+            # solapamiento: filas con updated_at anterior al cursor que commitearon después
+            overlap = int(current_app.config.get("DOOR_MANIFEST_OVERLAP_SECONDS", 30))
+            stmt = stmt.where(
+                Reservation.updated_at >= DoorManifestService.decode_cursor(since) - timedelta(seconds=overlap)
+            )
+        else:
+            stmt = stmt.where(Reservation.status.in_(list(_STATUS_BYTES)))
+
+        rows = db.session.execute(stmt.execution_options(yield_per=5000))
+
+        def generate():
+            comp = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            buf = bytearray(MAGIC)
+            buf.append(HASH_BYTES)
+            try:
+                for rid, code, status in rows:
+                    buf += DoorManifestService.code_hash(checkin_token.payload_for(event_id, rid, code))
+                    buf.append(_STATUS_BYTES.get(status, STATUS_REVOKED))
+                    if len(buf) >= _CHUNK:
+                        out = comp.compress(bytes(buf))
+                        buf.clear()
+                        if out:
+                            yield out
+            finally:
+                rows.close()
+            yield comp.compress(bytes(buf)) + comp.flush()
+
+        return cursor, generate()
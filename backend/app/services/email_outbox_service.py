@@ -0,0 +1,231 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, insert, update, literal, cast
+
+from ..extensions import db
+from ..models import EmailOutbox, EmailOutboxStatus, Reservation, ReservationStatus
+from .reservation_service import ReservationService
+from .mail_transport import get_mail_transport
+
+
+class EmailOutboxService:
+    @staticmethod
+    def _backoff(attempts: int) -> timedelta:
+        # 30s, 60s, 120s, ... (tope 1h)
+        base = int(current_app.config.get("MAIL_OUTBOX_BACKOFF_SECONDS", 30))
+        seconds = min(base * (2 ** max(attempts - 1, 0)), 3600)
+        return timedelta(seconds=seconds)
+
+    @staticmethod
+    def enqueue_for_event(event_id: int, include_sent: bool = False) -> int:
+        """
+        Re-envío masivo: encola invitaciones de un evento en un solo INSERT ... SELECT.
+        Por defecto solo las que no salieron (queued/failed/None).
+        Salta reservas que ya tienen un envío pendiente.
+        """
+        now = datetime.utcnow()
+
+        in_flight = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.reservation_id == Reservation.id)
+            .where(EmailOutbox.status.in_([EmailOutboxStatus.pending, EmailOutboxStatus.sending]))
+            .exists()
+        )
+
+        conds = [
+            Reservation.event_id == event_id,
+            Reservation.status == ReservationStatus.created,
+            ~in_flight,
+        ]
+        if not include_sent:
+            conds.append(or_(Reservation.email_send_status.is_(None), Reservation.email_send_status != "sent"))
+
+        ids = list(db.session.execute(select(Reservation.id).where(*conds)).scalars())
+        if not ids:
+            return 0
+
+        db.session.execute(
+            insert(EmailOutbox).from_select(
+                ["reservation_id", "kind", "status", "attempts", "next_attempt_at", "created_at"],
+                select(
+                    Reservation.id,
+                    literal("invitation"),
+                    cast(literal(EmailOutboxStatus.pending, EmailOutbox.status.type), EmailOutbox.status.type),
+                    literal(0),
+                    literal(now),
+                    literal(now),
+                ).where(Reservation.id.in_(ids)),
+            )
+        )
+        db.session.execute(
+            update(Reservation)
+            .where(Reservation.id.in_(ids))
+            .values(email_send_status="queued", email_error=None)
+        )
+        db.session.commit()
+        return len(ids)
+
+    @staticmethod
+    def claim_batch(limit: int) -> list[EmailOutbox]:
+        """
+        Toma hasta `limit` correos listos para enviar:
+        - pending con next_attempt_at vencido
+        - sending con lock viejo (worker que murió a mitad de envío)
+        FOR UPDATE SKIP LOCKED → varios workers no se pisan.
+        """
+        now = datetime.utcnow()
+        lock_timeout = int(current_app.config.get("MAIL_OUTBOX_LOCK_TIMEOUT_SECONDS", 300))
+        stale = now - timedelta(seconds=lock_timeout)
+
+        stmt = (
+            select(EmailOutbox)
+            .where(
+                or_(
+                    and_(
+                        EmailOutbox.status == EmailOutboxStatus.pending,
+                        EmailOutbox.next_attempt_at <= now,
+                    ),
+                    and_(
+                        EmailOutbox.status == EmailOutboxStatus.sending,
+                        EmailOutbox.locked_at < stale,
+                    ),
+                )
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        items = list(db.session.execute(stmt).scalars())
+
+        for item in items:
+            item.status = EmailOutboxStatus.sending
+            item.locked_at = now
+            item.attempts = int(item.attempts or 0) + 1
+
+        db.session.commit()
+        return items
+
+    @staticmethod
+    def _mark_sent(item: EmailOutbox):
+        now = datetime.utcnow()
+        item.status = EmailOutboxStatus.sent
+        item.sent_at = now
+        item.locked_at = None
+        item.last_error = None
+
+        r = item.reservation
+        r.email_sent_at = now
+        r.email_send_status = "sent"
+        r.email_error = None
+
+    @staticmethod
+    def _mark_failed(item: EmailOutbox, error: str):
+        max_attempts = int(current_app.config.get("MAIL_OUTBOX_MAX_ATTEMPTS", 6))
+
+        item.locked_at = None
+        item.last_error = error
+
+        r = item.reservation
+        r.email_error = error
+
+        if item.attempts >= max_attempts:
+            item.status = EmailOutboxStatus.failed
+            r.email_send_status = "failed"
+        else:
+            item.status = EmailOutboxStatus.pending
+            item.next_attempt_at = datetime.utcnow() + EmailOutboxService._backoff(item.attempts)
+
+    @staticmethod
+    def process_batch(pool: ThreadPoolExecutor, limit: int, sessions: int = 1) -> tuple[int, int]:
+        """
+        Envía un lote. La DB se toca solo desde este hilo;
+        el pool solo arma los mensajes y hace SMTP: el lote se reparte en `sessions`
+        tandas y cada tanda sale por una sola sesión (send_many).
+        Devuelve (enviados, fallidos).
+        """
+        items = EmailOutboxService.claim_batch(limit)
+        if not items:
+            return 0, 0
+
+        app = current_app._get_current_object()
+
+        def _send(chunk: list[tuple[int, dict]]) -> dict[int, Exception | None]:
+            with app.app_context():
+                errors: dict[int, Exception | None] = {}
+                ready, messages = [], []
+                for item_id, payload in chunk:
+                    try:
+                        sender, message = ReservationService._invitation_message(**payload)
+                    except Exception as e:
+                        errors[item_id] = e
+                        continue
+                    ready.append(item_id)
+                    messages.append((sender, [payload["to_email"]], message))
+                if messages:
+                    errors.update(zip(ready, get_mail_transport().send_many(messages)))
+                return errors
+
+        payloads = []
+        failed = {}
+        for item in items:
+            try:
+                payloads.append((item.id, ReservationService.build_invitation(item.reservation)))
+            except Exception as e:
+                failed[item.id] = str(e)
+
+        sessions = max(1, min(sessions, len(payloads)))
+        chunks = [payloads[i::sessions] for i in range(sessions)]
+        futures = [(chunk, pool.submit(_send, chunk)) for chunk in chunks if chunk]
+        for chunk, fut in futures:
+            try:
+                errors = fut.result()
+            except Exception as e:
+                errors = {item_id: e for item_id, _ in chunk}
+            failed.update((item_id, str(e)) for item_id, e in errors.items() if e is not None)
+
+        sent = 0
+        for item in items:
+            error = failed.get(item.id)
+
+            if error is None:
+                EmailOutboxService._mark_sent(item)
+                sent += 1
+            else:
+                current_app.logger.warning("EMAIL OUTBOX %s failed: %s", item.id, error)
+                EmailOutboxService._mark_failed(item, error)
+
+        db.session.commit()
+        return sent, len(items) - sent
+
+    @staticmethod
+    def run(workers: int, batch_size: int, interval: float, once: bool = False, echo=None):
+        """
+        Loop del worker: drena el outbox con un pool acotado de senders.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-sender") as pool:
+                while True:
+                    try:
+                        sent, failed = EmailOutboxService.process_batch(pool, batch_size, sessions=workers)
+                    except Exception:
+                        db.session.rollback()
+                        current_app.logger.exception("EMAIL OUTBOX batch error")
+                        sent, failed = 0, 0
+
+                    if echo and (sent or failed):
+                        echo(f"sent={sent} failed={failed}")
+
+                    if once and not (sent or failed):
+                        return
+
+                    # lote lleno → seguimos sin dormir
+                    if not once and sent + failed < batch_size:
+                        time.sleep(interval)
+        finally:
+            # QUIT a las sesiones SMTP abiertas (--once o Ctrl+C / SIGTERM)
+            transport = current_app.extensions.get("mail_transport")
+            if transport is not None:
+                transport.close_all()
@@ -1,10 +1,17 @@
 import os
-import io
-import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, case, func, insert, or_, select, update
 
 from ..extensions import db
-from ..models import Event, EventAccessCode
+from ..models import Event, EventAccessCode, AccessScan
+from ..models.compact_code import canonical, new_code
+from .qr_cache import get_qr_cache
+from .live_service import publish_live
+
+# pg_advisory_xact_lock: una sola agregación a la vez
+_AGGREGATE_LOCK_ID = 0x5C4A6E
 
 class EventAccessService:
     @staticmethod
@@ -25,19 +32,27 @@ class EventAccessService:
 
     @staticmethod
     def _new_code() -> str:
-        # Corto, URL-safe, único
-        return secrets.token_urlsafe(10)
+        # Corto (80 bits → 16 caracteres base32), único
+        return new_code(10)
+
+    @staticmethod
+    def _with_pending(scan_count, last_scan_at, pending: tuple[int, datetime | None] | None):
+        n, last = pending or (0, None)
+        if last is not None and (last_scan_at is None or last > last_scan_at):
+            last_scan_at = last
+        return int(scan_count or 0) + int(n or 0), last_scan_at
 
     @classmethod
-    def serialize(cls, a: EventAccessCode) -> dict:
+    def serialize(cls, a: EventAccessCode, pending: tuple[int, datetime | None] | None = None) -> dict:
+        scan_count, last_scan_at = cls._with_pending(a.scan_count, a.last_scan_at, pending)
         return {
             "id": a.id,
             "event_id": a.event_id,
             "access_code": a.access_code,
             "label": a.label,
             "is_enabled": bool(a.is_enabled),
-            "scan_count": int(a.scan_count or 0),
-            "last_scan_at": a.last_scan_at,
+            "scan_count": scan_count,
+            "last_scan_at": last_scan_at,
             "created_by_user_id": a.created_by_user_id,
             "created_at": a.created_at,
             "access_url": cls._access_url(a.access_code),
@@ -82,57 +97,175 @@ class EventAccessService:
             .all()
         )
 
+    @staticmethod
+    def _pending_filter():
+        # escaneos que la agregación todavía no sumó a la fila del código
+        return and_(
+            AccessScan.access_code_id == EventAccessCode.id,
+            AccessScan.id > EventAccessCode.scans_aggregated_through,
+        )
+
+    @classmethod
+    def pending_scans(cls, access_ids: list[int]) -> dict[int, tuple[int, datetime | None]]:
+        """
+        Escaneos no agregados por código, en una sola consulta: {id: (cantidad, último)}.
+        """
+        if not access_ids:
+            return {}
+        rows = db.session.execute(
+            select(AccessScan.access_code_id, func.count(AccessScan.id), func.max(AccessScan.scanned_at))
+            .join(EventAccessCode, cls._pending_filter())
+            .where(AccessScan.access_code_id.in_(access_ids))
+            .group_by(AccessScan.access_code_id)
+        )
+        return {aid: (n, last) for aid, n, last in rows}
+
     @staticmethod
     def get_by_id(event_id: int, access_id: int):
         a = EventAccessCode.query.filter_by(id=access_id, event_id=event_id).first()
         return a
 
     @classmethod
-    def qr_png_for_access(cls, event_id: int, access_id: int) -> bytes:
-        import qrcode
-
+    def qr_data_for_access(cls, event_id: int, access_id: int) -> str:
         a = cls.get_by_id(event_id, access_id)
         if not a:
             raise ValueError("NOT_FOUND")
 
-        url = cls._access_url(a.access_code)
-        img = qrcode.make(url)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-        return buf.read()
+        return cls._access_url(a.access_code)
+
+    @classmethod
+    def qr_png_for_access(cls, event_id: int, access_id: int) -> bytes:
+        url = cls.qr_data_for_access(event_id, access_id)
+        png, _ = get_qr_cache().get(url, profile="access")
+        return png
 
     @classmethod
-    def check_access_atomic(cls, access_code: str):
+    def check_access_atomic(cls, access_code: str, scanned_by_user_id: int | None = None):
         """
         Autoriza siempre si:
         - code existe
         - code habilitado
         - evento status == active
-        y aumenta scan_count (atómico con lock).
+        Sin lock sobre el código: cada escaneo es un INSERT en access_scans.
+        scan_count = agregado + pendientes (calculado en el mismo SELECT), con costo acotado
+        aunque la agregación venga atrasada: se cuentan a lo sumo ACCESS_SCAN_PENDING_CAP
+        pendientes y el último se toma por id (una entrada del índice (access_code_id, id)).
         """
-        a = (
-            EventAccessCode.query
-            .filter_by(access_code=access_code)
-            .with_for_update()
-            .first()
+        # base32 o token_urlsafe legacy; cualquier otra cosa no puede existir
+        access_code = canonical(access_code, "urlsafe")
+        if access_code is None:
+            return False, None, None, "NOT_FOUND"
+
+        cap = int(current_app.config.get("ACCESS_SCAN_PENDING_CAP", 1000))
+        pending_ids = select(AccessScan.id).where(cls._pending_filter()).limit(cap).correlate(EventAccessCode)
+        pending = select(func.count()).select_from(pending_ids.subquery()).scalar_subquery()
+        last_pending = (
+            select(AccessScan.scanned_at)
+            .where(cls._pending_filter())
+            .order_by(AccessScan.id.desc())
+            .limit(1)
+            .scalar_subquery()
         )
-        if not a:
+
+        row = db.session.execute(
+            select(
+                EventAccessCode.id,
+                EventAccessCode.event_id,
+                EventAccessCode.label,
+                EventAccessCode.is_enabled,
+                EventAccessCode.scan_count,
+                EventAccessCode.last_scan_at,
+                pending.label("pending"),
+                last_pending.label("last_pending"),
+                Event,
+            )
+            .join(Event, Event.id == EventAccessCode.event_id, isouter=True)
+            .where(EventAccessCode.access_code == access_code)
+        ).first()
+        if not row:
             return False, None, None, "NOT_FOUND"
 
-        ev = db.session.get(Event, a.event_id)
+        ev = row.Event
         if not ev:
             return False, None, None, "EVENT_NOT_FOUND"
 
+        scan_count, last_scan_at = cls._with_pending(row.scan_count, row.last_scan_at, (row.pending, row.last_pending))
+        a = EventAccessCode(
+            id=row.id,
+            event_id=row.event_id,
+            access_code=access_code,
+            label=row.label,
+            is_enabled=row.is_enabled,
+            scan_count=scan_count,
+            last_scan_at=last_scan_at,
+        )
+
         if not a.is_enabled:
             return False, ev, a, "CODE_DISABLED"
 
         if ev.status.value != "active":
             return False, ev, a, "EVENT_NOT_ACTIVE"
 
-
-        a.scan_count = int(a.scan_count or 0) + 1
-        a.last_scan_at = datetime.utcnow()
+        now = datetime.utcnow()
+        db.session.execute(insert(AccessScan).values(
+            access_code_id=a.id,
+            event_id=a.event_id,
+            scanned_at=now,
+            scanned_by_user_id=scanned_by_user_id,
+        ))
         db.session.commit()
+        publish_live(a.event_id)
 
+        a.scan_count += 1
+        a.last_scan_at = now
         return True, ev, a, "ACCESS_GRANTED"
+
+    @staticmethod
+    def aggregate_scans(grace_seconds: int) -> tuple[int, int | None]:
+        """
+        Pliega access_scans en event_access_codes (scan_count, last_scan_at, watermark)
+        con un UPDATE ... FROM (SELECT ... GROUP BY access_code_id).
+        Toma los escaneos con id en (último agregado, hi], donde hi es el último
+        escaneo más viejo que el grace: un INSERT que todavía no commiteó no queda atrás.
+        Devuelve (códigos actualizados, hi).
+        """
+        if db.session.get_bind().dialect.name == "postgresql":
+            db.session.execute(select(func.pg_advisory_xact_lock(_AGGREGATE_LOCK_ID)))
+
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        lo = db.session.execute(
+            select(func.coalesce(func.max(EventAccessCode.scans_aggregated_through), 0))
+        ).scalar_one()
+        hi = db.session.execute(
+            select(func.max(AccessScan.id)).where(AccessScan.id > lo).where(AccessScan.scanned_at < cutoff)
+        ).scalar_one()
+        if hi is None:
+            db.session.commit()
+            return 0, None
+
+        agg = (
+            select(
+                AccessScan.access_code_id.label("access_code_id"),
+                func.count(AccessScan.id).label("n"),
+                func.max(AccessScan.scanned_at).label("last"),
+                func.max(AccessScan.id).label("max_id"),
+            )
+            .where(AccessScan.id > lo)
+            .where(AccessScan.id <= hi)
+            .group_by(AccessScan.access_code_id)
+            .subquery()
+        )
+        updated = db.session.execute(
+            update(EventAccessCode)
+            .where(EventAccessCode.id == agg.c.access_code_id)
+            .values(
+                scan_count=EventAccessCode.scan_count + agg.c.n,
+                last_scan_at=case(
+                    (or_(EventAccessCode.last_scan_at.is_(None), agg.c.last > EventAccessCode.last_scan_at), agg.c.last),
+                    else_=EventAccessCode.last_scan_at,
+                ),
+                scans_aggregated_through=agg.c.max_id,
+            )
+        ).rowcount
+        db.session.commit()
+        return updated, hi
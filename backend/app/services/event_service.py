@@ -1,7 +1,43 @@
 import secrets
+from dataclasses import dataclass
+from datetime import datetime
 from flask import current_app
+from sqlalchemy import select, func
 from ..extensions import db
-from ..models import Event, EventStatus
+from ..models import Event, EventStatus, Reservation, ReservationStatus
+from ..common.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class EventLookup:
+    """
+    Lo mínimo para aceptar una reserva, sin hidratar el Event completo.
+    capacity no se cachea, solo si tiene límite: sin límite no se reclama cupo
+    (ni se lockea la fila del evento); con límite el cupo se decide en el UPDATE de _claim_seat.
+    """
+    id: int
+    name: str
+    status: EventStatus
+    end_at: datetime
+    limited: bool
+
+
+# public_code → EventLookup (por proceso, TTL corto)
+_lookup_cache = TTLCache(ttl_seconds=10, max_entries=1024)
+
+# columnas de EventSchema para las vistas de lectura (filas Core, sin hidratar Event)
+ROW_COLUMNS = (
+    Event.id,
+    Event.name,
+    Event.description,
+    Event.start_at,
+    Event.end_at,
+    Event.status,
+    Event.public_code,
+    Event.capacity,
+    Event.reserved_count,
+)
+
 
 class EventService:
     @staticmethod
@@ -39,18 +75,58 @@ class EventService:
             end_at=data["end_at"],
             status=status,
             public_code=code,
+            email_template=(data.get("email_template") or None),
+            capacity=data.get("capacity"),
+            reserved_count=0,
         )
         db.session.add(ev)
         db.session.commit()
         return ev
 
+    @staticmethod
+    def lookup_by_public_code(public_code: str) -> EventLookup | None:
+        hit = _lookup_cache.get(public_code)
+        if hit is not None:
+            return hit
+
+        row = db.session.execute(
+            select(Event.id, Event.name, Event.status, Event.end_at, Event.capacity.is_not(None).label("limited"))
+            .where(Event.public_code == public_code)
+        ).first()
+        if not row:
+            return None
+
+        hit = EventLookup(
+            id=row.id,
+            name=row.name,
+            status=row.status,
+            end_at=row.end_at,
+            limited=bool(row.limited),
+        )
+        ttl = float(current_app.config.get("EVENT_CACHE_TTL_SECONDS", 10))
+        _lookup_cache.set(public_code, hit, ttl=ttl)
+        return hit
+
+    @staticmethod
+    def invalidate_lookup(ev: Event) -> None:
+        _lookup_cache.pop(ev.public_code)
+
     @staticmethod
     def get(event_id: int) -> Event | None:
         return db.session.get(Event, event_id)
 
     @staticmethod
-    def list() -> list[Event]:
-        return Event.query.order_by(Event.start_at.desc()).all()
+    def list_rows() -> list:
+        return db.session.execute(select(*ROW_COLUMNS).order_by(Event.start_at.desc())).all()
+
+    @staticmethod
+    def get_row(event_id: int | None = None, public_code: str | None = None):
+        stmt = select(*ROW_COLUMNS)
+        if event_id is not None:
+            stmt = stmt.where(Event.id == event_id)
+        else:
+            stmt = stmt.where(Event.public_code == public_code)
+        return db.session.execute(stmt).first()
 
     @staticmethod
     def update(ev: Event, data: dict) -> Event:
@@ -65,18 +141,48 @@ class EventService:
             ev.end_at = data["end_at"]
         if "status" in data:
             ev.status = EventService._parse_status(data["status"])
+        if "email_template" in data:
+            ev.email_template = data["email_template"] or None
+        if "capacity" in data and data["capacity"] != ev.capacity:
+            # sin cupo no se lleva la cuenta → al activarlo se recalcula
+            if ev.capacity is None:
+                ev.reserved_count = EventService._count_reserved(ev.id)
+            ev.capacity = data["capacity"]
+
+            # más cupo (o sin límite) → entra gente de la lista de espera.
+            # Edición de admin (rara): acá sí se lockea la fila para leer el contador real.
+            db.session.flush()
+            db.session.refresh(ev, attribute_names=["reserved_count"], with_for_update=True)
+            free = None if ev.capacity is None else ev.capacity - ev.reserved_count
+            if free is None or free > 0:
+                # import local: reservation_service ya importa este módulo
+                from .reservation_service import ReservationService
+
+                promoted = ReservationService.promote_waitlist(ev.id, free)
+                if ev.capacity is not None:
+                    ev.reserved_count += len(promoted)
 
         # validación final de fechas (por si llega solo start o solo end)
         if ev.end_at <= ev.start_at:
             raise ValueError("end_at must be greater than start_at")
 
         db.session.commit()
+        EventService.invalidate_lookup(ev)
         return ev
 
+    @staticmethod
+    def _count_reserved(event_id: int) -> int:
+        return db.session.execute(
+            select(func.count(Reservation.id))
+            .where(Reservation.event_id == event_id)
+            .where(Reservation.status.in_([ReservationStatus.created, ReservationStatus.checked_in]))
+        ).scalar_one()
+
     @staticmethod
     def delete(ev: Event) -> None:
         db.session.delete(ev)
         db.session.commit()
+        EventService.invalidate_lookup(ev)
 
     @staticmethod
     def serialize(ev: Event) -> dict:
@@ -85,3 +191,19 @@ class EventService:
             "public_url": EventService._public_url(ev.public_code),
             "qr_url": f"/api/events/{ev.id}/qr",
         }
+
+    @staticmethod
+    def row_serializer():
+        """
+        fn(fila de ROW_COLUMNS) → dict de EventSchema; el prefijo de public_url se resuelve una vez.
+        Fechas y Enum quedan para el encoder (app.common.fastjson), igual que to_dict().
+        """
+        public_prefix = EventService._public_url("")
+
+        def dump(row) -> dict:
+            d = row._asdict()
+            d["public_url"] = public_prefix + row.public_code
+            d["qr_url"] = f"/api/events/{row.id}/qr"
+            return d
+
+        return dump
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models import Event, EventStats, Reservation, ReservationStatus
+
+COUNTERS = ("reserved", "checked_in", "cancelled", "waitlisted")
+
+
+class EventStatsService:
+    @staticmethod
+    def _upsert(values: list[dict], increment: bool):
+        """
+        INSERT ... ON CONFLICT (event_id) DO UPDATE:
+        increment=True suma los deltas, False pisa los valores.
+        """
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.session.execute(EventStatsService._on_conflict(insert(EventStats).values(values), increment))
+
+    @staticmethod
+    def _on_conflict(stmt, increment: bool):
+        table = EventStats.__table__
+        set_ = {
+            col: (table.c[col] + stmt.excluded[col]) if increment else stmt.excluded[col]
+            for col in COUNTERS
+        }
+        set_["updated_at"] = stmt.excluded.updated_at
+        return stmt.on_conflict_do_update(index_elements=[table.c.event_id], set_=set_)
+
+    @staticmethod
+    def bump_from(rows):
+        """
+        Statement (sin ejecutar) que suma deltas desde un SELECT con columnas
+        event_id, COUNTERS..., updated_at. Para armar CTEs en Postgres
+        (ej. la reserva entera en un statement, ver ReservationService).
+        """
+        stmt = postgresql.insert(EventStats).from_select(["event_id", *COUNTERS, "updated_at"], rows)
+        return EventStatsService._on_conflict(stmt, increment=True)
+
+    @staticmethod
+    def bump(event_id: int, **deltas: int):
+        """
+        Suma deltas a los contadores del evento dentro de la transacción actual (sin commit).
+        Ej: bump(ev_id, reserved=1) / bump(ev_id, reserved=-1, cancelled=1)
+        """
+        deltas = {k: v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+        unknown = set(deltas) - set(COUNTERS)
+        if unknown:
+            raise ValueError(f"UNKNOWN_COUNTER: {', '.join(sorted(unknown))}")
+
+        row = {col: int(deltas.get(col, 0)) for col in COUNTERS}
+        EventStatsService._upsert([{"event_id": event_id, **row, "updated_at": datetime.utcnow()}], increment=True)
+
+    @staticmethod
+    def get(event_id: int) -> dict:
+        """
+        Una fila (evento + contadores), sin importar cuántas reservas tenga.
+        """
+        row = db.session.execute(
+            select(Event.id, Event.capacity, EventStats)
+            .outerjoin(EventStats, EventStats.event_id == Event.id)
+            .where(Event.id == event_id)
+        ).first()
+        if row is None:
+            raise ValueError("EVENT_NOT_FOUND")
+
+        stats = row.EventStats
+        return {
+            "event_id": event_id,
+            "capacity": row.capacity,
+            **{col: int(getattr(stats, col) or 0) if stats else 0 for col in COUNTERS},
+            "updated_at": stats.updated_at if stats else None,
+        }
+
+    @staticmethod
+    def compute(event_id: int | None = None) -> dict[int, dict]:
+        """
+        Contadores desde cero (GROUP BY sobre reservations).
+        """
+        stmt = select(
+            Event.id,
+            func.count(Reservation.id).filter(
+                Reservation.status.in_([ReservationStatus.created, ReservationStatus.checked_in])
+            ),
+            func.count(Reservation.id).filter(Reservation.status == ReservationStatus.checked_in),
+            func.count(Reservation.id).filter(Reservation.status == ReservationStatus.cancelled),
+            func.count(Reservation.id).filter(Reservation.status == ReservationStatus.waitlisted),
+        ).outerjoin(Reservation, Reservation.event_id == Event.id).group_by(Event.id)
+        if event_id is not None:
+            stmt = stmt.where(Event.id == event_id)
+
+        return {
+            eid: dict(zip(COUNTERS, (int(n) for n in counts)))
+            for eid, *counts in db.session.execute(stmt)
+        }
+
+    @staticmethod
+    def reconcile(event_id: int | None = None) -> dict[int, dict]:
+        """
+        Recalcula y pisa event_stats. Devuelve las diferencias encontradas
+        {event_id: {contador: (guardado, real)}}.
+        Lockea las filas de stats antes de contar: un bump concurrente o ya está
+        commiteado (y se cuenta) o espera y suma después.
+        """
+        stored_stmt = select(EventStats).with_for_update()
+        if event_id is not None:
+            stored_stmt = stored_stmt.where(EventStats.event_id == event_id)
+        stored = {s.event_id: s for s in db.session.execute(stored_stmt).scalars()}
+
+        actual = EventStatsService.compute(event_id)
+        if not actual:
+            db.session.rollback()
+            return {}
+
+        drift = {}
+        for eid, counts in actual.items():
+            s = stored.get(eid)
+            diff = {
+                col: (getattr(s, col) if s else 0, counts[col])
+                for col in COUNTERS
+                if (getattr(s, col) if s else 0) != counts[col]
+            }
+            if diff:
+                drift[eid] = diff
+
+        now = datetime.utcnow()
+        EventStatsService._upsert(
+            [{"event_id": eid, **counts, "updated_at": now} for eid, counts in actual.items()],
+            increment=False,
+        )
+        db.session.commit()
+        return drift
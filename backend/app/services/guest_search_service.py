@@ -0,0 +1,180 @@
+import threading
+
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from ..common.search_text import query_tokens, search_key, search_terms
+from ..extensions import db
+from ..models import Reservation, ReservationSearchTerm
+
+# columnas que necesita seguridad para identificar y hacer el check-in
+_COLUMNS = (
+    Reservation.id,
+    Reservation.first_name,
+    Reservation.last_name,
+    Reservation.email,
+    Reservation.phone,
+    Reservation.instagram,
+    Reservation.reservation_code,
+    Reservation.status,
+    Reservation.used_at,
+)
+
+_backend_lock = threading.Lock()
+
+
+class GuestSearchService:
+    @staticmethod
+    def backend() -> str:
+        """
+        trigram (Postgres con pg_trgm: índice GIN sobre reservations.search_key)
+        o prefix (reservation_search_terms). GUEST_SEARCH_BACKEND=auto lo detecta una vez por proceso.
+        """
+        app = current_app._get_current_object()
+        backend = app.extensions.get("guest_search_backend")
+        if backend is not None:
+            return backend
+
+        with _backend_lock:
+            backend = app.extensions.get("guest_search_backend")
+            if backend is None:
+                backend = app.config.get("GUEST_SEARCH_BACKEND", "auto")
+                if backend == "auto":
+                    backend = "prefix"
+                    if db.session.get_bind().dialect.name == "postgresql":
+                        has_trgm = db.session.execute(
+                            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                        ).first()
+                        if has_trgm:
+                            backend = "trigram"
+                app.extensions["guest_search_backend"] = backend
+            return backend
+
+    @staticmethod
+    def index(reservation_id: int, event_id: int, values: dict):
+        """
+        Términos de prefijo de una reserva nueva, en la transacción actual (sin commit).
+        Con trigram alcanza con search_key: no hace nada.
+        """
+        if GuestSearchService.backend() != "prefix":
+            return
+        terms = search_terms(
+            values["first_name"], values["last_name"], values["email"], values["phone"], values.get("instagram")
+        )
+        if terms:
+            db.session.execute(
+                insert(ReservationSearchTerm),
+                [{"reservation_id": reservation_id, "event_id": event_id, "term": t} for t in terms],
+            )
+
+    @staticmethod
+    def index_from(reservation_id, event_id: int, values: dict):
+        """
+        Como index() pero devuelve el INSERT ... SELECT unnest(:terms) sin ejecutarlo, con
+        reservation_id como columna (CTE de la reserva nueva). Solo Postgres.
+        None si no hay nada que indexar.
+        """
+        if GuestSearchService.backend() != "prefix":
+            return None
+        terms = search_terms(
+            values["first_name"], values["last_name"], values["email"], values["phone"], values.get("instagram")
+        )
+        if not terms:
+            return None
+        term_type = ReservationSearchTerm.term.type
+        return insert(ReservationSearchTerm).from_select(
+            ["reservation_id", "event_id", "term"],
+            select(reservation_id, literal(event_id), func.unnest(literal(terms, ARRAY(term_type)))),
+        )
+
+    @staticmethod
+    def search(event_id: int, q: str, limit: int = 10) -> list:
+        """
+        Top-N del evento para lo que escribió seguridad.
+        - trigram: search_key contiene el texto o word_similarity alta, ordenado por similitud
+        - prefix: cada token es prefijo de algún término de la reserva (INTERSECT por token)
+        Filas Core (sin hidratar Reservation) con .score (None en prefix).
+        """
+        tokens = query_tokens(q)[:5]
+        if not tokens:
+            return []
+
+        if GuestSearchService.backend() == "trigram":
+            needle = " ".join(tokens)
+            score = func.word_similarity(needle, Reservation.search_key)
+            stmt = (
+                select(*_COLUMNS, score.label("score"))
+                .where(Reservation.event_id == event_id)
+                .where(
+                    Reservation.search_key.contains(needle, autoescape=True)
+                    | literal(needle).op("<%")(Reservation.search_key)
+                )
+                .order_by(score.desc(), Reservation.id)
+            )
+        else:
+            term = ReservationSearchTerm
+            matches = None
+            for token in tokens:
+                part = (
+                    select(term.reservation_id)
+                    .where(term.event_id == event_id)
+                    .where(term.term.startswith(token, autoescape=True))
+                )
+                matches = part if matches is None else matches.intersect(part)
+            stmt = (
+                select(*_COLUMNS, literal(None).label("score"))
+                .where(Reservation.id.in_(matches))
+                .order_by(Reservation.last_name, Reservation.first_name, Reservation.id)
+            )
+
+        return db.session.execute(stmt.limit(limit)).all()
+
+    @staticmethod
+    def reindex(event_id: int | None = None, batch_size: int = 2000) -> int:
+        """
+        Recalcula search_key (y los términos en modo prefix) por lotes. Devuelve reservas procesadas.
+        """
+        prefix = GuestSearchService.backend() == "prefix"
+        last_id, done = 0, 0
+        while True:
+            stmt = (
+                select(
+                    Reservation.id,
+                    Reservation.event_id,
+                    Reservation.first_name,
+                    Reservation.last_name,
+                    Reservation.email,
+                    Reservation.phone,
+                    Reservation.instagram,
+                )
+                .where(Reservation.id > last_id)
+                .order_by(Reservation.id)
+                .limit(batch_size)
+            )
+            if event_id is not None:
+                stmt = stmt.where(Reservation.event_id == event_id)
+            rows = db.session.execute(stmt).all()
+            if not rows:
+                return done
+
+            db.session.execute(
+                Reservation.__table__.update()
+                .where(Reservation.__table__.c.id == bindparam("rid"))
+                .values(search_key=bindparam("key")),
+                [{"rid": r.id, "key": search_key(r.first_name, r.last_name, r.email, r.phone, r.instagram)} for r in rows],
+            )
+            if prefix:
+                ids = [r.id for r in rows]
+                db.session.execute(ReservationSearchTerm.__table__.delete().where(ReservationSearchTerm.reservation_id.in_(ids)))
+                terms = [
+                    {"reservation_id": r.id, "event_id": r.event_id, "term": t}
+                    for r in rows
+                    for t in search_terms(r.first_name, r.last_name, r.email, r.phone, r.instagram)
+                ]
+                if terms:
+                    db.session.execute(insert(ReservationSearchTerm), terms)
+            db.session.commit()
+
+            last_id = rows[-1].id
+            done += len(rows)
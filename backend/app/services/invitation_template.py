@@ -0,0 +1,277 @@
+import base64
+import html as html_lib
+import threading
+import uuid
+from collections import OrderedDict
+from email.header import Header
+from email.utils import formataddr, parseaddr
+
+# Marcadores del template (el resto del HTML es estático)
+GUEST_NAME = "{{guest_name}}"
+EVENT_NAME = "{{event_name}}"
+
+# IMPORTANTE: CID fijo que coincide con el mensaje (qr-image)
+QR_CID = "qr-image"
+
+PLAIN_TEXT = "Tu invitación está lista. Si no ves el contenido, abre el correo en HTML."
+
+DEFAULT_TEMPLATE = """
+        <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#0b0b0b;padding:24px 0;">
+          <tr>
+            <td align="center">
+              <table role="presentation" width="640" cellpadding="0" cellspacing="0" style="width:640px;max-width:92%;background:#0f0f0f;border:1px solid #222;border-radius:18px;overflow:hidden;">
+
+                <!-- Top bar -->
+                <tr>
+                  <td style="background:#ffd400;padding:18px 22px;">
+                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
+                      <tr>
+                        <td align="left">
+                          <div style="font-size:12px;letter-spacing:3px;font-weight:800;color:#1a1a1a;text-transform:uppercase;">
+                            Bee Concert Club
+                          </div>
+                          <div style="font-size:20px;font-weight:900;color:#0b0b0b;line-height:1.2;margin-top:4px;">
+                            Tu invitación está lista!
+                          </div>
+                        </td>
+                        <td align="right">
+                          <div style="display:inline-block;background:#0b0b0b;color:#ffd400;font-weight:900;font-size:12px;padding:8px 12px;border-radius:999px;">
+                            QR · 1 SOLO USO
+                          </div>
+                        </td>
+                      </tr>
+                    </table>
+                  </td>
+                </tr>
+
+                <!-- Body -->
+                <tr>
+                  <td style="padding:22px 22px 10px 22px;color:#f5f5f5;">
+                    <p style="margin:0 0 10px 0;font-size:15px;line-height:1.6;color:#eaeaea;">
+                      Hola <b style="color:#ffffff;">{{guest_name}}</b>, tu reserva fue registrada.
+                    </p>
+
+                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="margin-top:10px;background:#141414;border:1px solid #242424;border-radius:14px;">
+                      <tr>
+                        <td style="padding:14px 14px;">
+                          <div style="font-size:12px;letter-spacing:2px;font-weight:800;color:#ffd400;text-transform:uppercase;">
+                            Evento
+                          </div>
+                          <div style="font-size:18px;font-weight:900;color:#ffffff;margin-top:4px;line-height:1.3;">
+                            {{event_name}}
+                          </div>
+                        </td>
+                      </tr>
+                    </table>
+
+                    <p style="margin:16px 0 12px 0;font-size:14px;line-height:1.6;color:#dcdcdc;">
+                      Presenta este QR en la entrada:
+                    </p>
+
+                    <!-- QR box -->
+                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#0b0b0b;border:1px solid #242424;border-radius:14px;">
+                      <tr>
+                        <td align="center" style="padding:16px;">
+                          <img src="cid:qr-image" alt="QR Bee Concert Club"
+                               width="260" height="260"
+                               style="display:block;width:260px;height:260px;border-radius:16px;border:1px solid #2b2b2b;background:#ffffff;padding:10px;" />
+                        </td>
+                      </tr>
+                    </table>
+
+                    <p style="margin:12px 0 0 0;font-size:12px;color:#bdbdbd;line-height:1.5;">
+                      *El QR es de un solo uso. Una vez escaneado, queda marcado como utilizado.
+                    </p>
+
+                    <!-- Rules -->
+                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="margin-top:16px;background:#141414;border:1px solid #242424;border-radius:14px;">
+                      <tr>
+                        <td style="padding:14px 14px;">
+                          <div style="font-size:13px;font-weight:900;color:#ffd400;">
+                            ¡Recuerda!
+                          </div>
+
+                          <div style="margin-top:10px;font-size:13px;line-height:1.6;color:#e6e6e6;">
+                            <div style="margin:0 0 8px 0;">
+                              • Ingreso con documento <b>FÍSICO OBLIGATORIO</b> ⚠️:<br/>
+                              <span style="color:#cfcfcf;">Nacionales:</span> Cédula / Licencia de conducir.<br/>
+                              <span style="color:#cfcfcf;">Extranjeros:</span> Pasaporte.
+                            </div>
+
+                            <div style="margin:0 0 8px 0;">
+                              • Está prohibido el ingreso de menores de edad 🚫.
+                            </div>
+
+                            <div style="margin:10px 0 0 0;color:#cfcfcf;">
+                              Recuerda presentarlo al ingresar.<br/>
+                              <b style="color:#ffd400;">⚠️: Tu reserva no garantiza el ingreso!</b> Recuerda cumplir las politicas.
+                            </div>
+
+                            <div style="margin-top:10px;color:#eaeaea;">
+                              Gracias por confiar en nosotros.
+                            </div>
+
+                            <div style="margin-top:10px;color:#eaeaea;">
+                              Atentamente,<br/>
+                              <b>Equipo de Bee Concert Club 🐝</b>
+                            </div>
+                          </div>
+                        </td>
+                      </tr>
+                    </table>
+
+                  </td>
+                </tr>
+
+                <!-- Footer -->
+                <tr>
+                  <td style="padding:14px 22px 18px 22px;">
+                    <div style="border-top:1px solid #242424;padding-top:12px;color:#9a9a9a;font-size:11px;line-height:1.5;text-align:center;">
+                      Desarrollado por <b style="color:#cfcfcf;">Nivusoftware SAS.</b> · <span style="color:#cfcfcf;">@nivu.soft</span>
+                    </div>
+                  </td>
+                </tr>
+
+              </table>
+            </td>
+          </tr>
+        </table>
+"""
+
+
+def _header(value: str) -> str:
+    # encoded-words plegados con CRLF (el default de Header es "\n" pelado: viola RFC 5322)
+    return Header(value, "utf-8").encode(linesep="\r\n")
+
+
+def _address(value: str) -> str:
+    """
+    "Nombre <addr>" → solo el nombre como encoded-word; la dirección queda tal cual.
+    """
+    name, addr = parseaddr(value)
+    if not name:
+        return addr or value
+    if name.isascii():
+        return formataddr((name, addr))
+    return f"{_header(name)} <{addr}>"
+
+
+def _b64_lines(data: bytes) -> bytes:
+    # base64 en líneas de 76 con CRLF (RFC 2045)
+    return base64.encodebytes(data).replace(b"\n", b"\r\n")
+
+
+class CompiledInvitation:
+    """
+    Template de un evento ya resuelto: solo falta el nombre del invitado.
+    """
+
+    __slots__ = ("fragments", "subject_header", "plain_part")
+
+    def __init__(self, template: str, event_name: str):
+        resolved = template.replace(EVENT_NAME, html_lib.escape(event_name))
+        self.fragments = resolved.split(GUEST_NAME)
+        self.subject_header = _header(f"Tu invitación - {event_name}")
+        self.plain_part = _b64_lines(PLAIN_TEXT.encode("utf-8"))
+
+    def render(self, first_name: str, last_name: str) -> str:
+        guest = html_lib.escape(f"{first_name} {last_name}")
+        return guest.join(self.fragments)
+
+
+class InvitationTemplates:
+    """
+    Cache por proceso de templates compilados, clave (event_id, updated_at).
+    Si el evento cambia, cambia updated_at y se recompila solo.
+    """
+
+    _max_entries = 256
+    _cache: "OrderedDict[tuple, CompiledInvitation]" = OrderedDict()
+    _lock = threading.Lock()
+
+    # boundaries fijos: '-' no existe en base64, no pueden chocar con el contenido
+    _boundary = uuid.uuid4().hex
+    _related = f"bee-related-{_boundary}"
+    _alternative = f"bee-alt-{_boundary}"
+
+    @classmethod
+    def compiled(cls, ev) -> CompiledInvitation:
+        key = (ev.id, ev.updated_at)
+        with cls._lock:
+            c = cls._cache.get(key)
+            if c is not None:
+                cls._cache.move_to_end(key)
+                return c
+
+        c = CompiledInvitation(ev.email_template or DEFAULT_TEMPLATE, ev.name)
+
+        with cls._lock:
+            cls._cache[key] = c
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls._max_entries:
+                cls._cache.popitem(last=False)
+        return c
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def build_compact_message(
+        cls,
+        compiled: CompiledInvitation,
+        sender: str,
+        to_email: str,
+        html: str,
+        qr_png: bytes,
+    ) -> bytes:
+        """
+        Mismo árbol MIME que la versión con email.mime
+        (related → alternative(plain, html) + QR inline + QR adjunto),
+        pero armado directo en bytes: el QR se codifica en base64 una sola vez
+        y se reutiliza en la parte inline y en el adjunto.
+        """
+        qr_b64 = _b64_lines(qr_png)
+        html_b64 = _b64_lines(html.encode("utf-8"))
+        rel = cls._related.encode()
+        alt = cls._alternative.encode()
+
+        return b"".join((
+            b"Content-Type: multipart/related; boundary=\"", rel, b"\"\r\n",
+            b"MIME-Version: 1.0\r\n",
+            b"Subject: ", compiled.subject_header.encode("ascii"), b"\r\n",
+            b"From: ", _address(sender).encode("ascii"), b"\r\n",
+            b"To: ", _address(to_email).encode("ascii"), b"\r\n",
+            b"\r\n",
+            b"--", rel, b"\r\n",
+            b"Content-Type: multipart/alternative; boundary=\"", alt, b"\"\r\n",
+            b"MIME-Version: 1.0\r\n",
+            b"\r\n",
+            b"--", alt, b"\r\n",
+            b"Content-Type: text/plain; charset=\"utf-8\"\r\n",
+            b"Content-Transfer-Encoding: base64\r\n",
+            b"\r\n",
+            compiled.plain_part,
+            b"--", alt, b"\r\n",
+            b"Content-Type: text/html; charset=\"utf-8\"\r\n",
+            b"Content-Transfer-Encoding: base64\r\n",
+            b"\r\n",
+            html_b64,
+            b"--", alt, b"--\r\n",
+            b"\r\n",
+            b"--", rel, b"\r\n",
+            b"Content-Type: image/png\r\n",
+            b"Content-Transfer-Encoding: base64\r\n",
+            b"Content-ID: <", QR_CID.encode(), b">\r\n",
+            b"Content-Disposition: inline; filename=\"qr.png\"\r\n",
+            b"\r\n",
+            qr_b64,
+            b"--", rel, b"\r\n",
+            b"Content-Type: image/png\r\n",
+            b"Content-Transfer-Encoding: base64\r\n",
+            b"Content-Disposition: attachment; filename=\"qr.png\"\r\n",
+            b"\r\n",
+            qr_b64,
+            b"--", rel, b"--\r\n",
+        ))
@@ -0,0 +1,217 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models import AccessScan, EventStats, Reservation
+
+
+class LiveBroadcaster:
+    """
+    Un hilo por worker que calcula los contadores de cada evento con suscriptores
+    y los reparte a todas sus colas: 20 dashboards = 1 agregación, no 20.
+    - publish(event_id) desde check-in / acceso / reservas → se recalcula en el próximo tick
+      (una ráfaga de escaneos = una agregación por tick)
+    - además refresca cada `refresh_seconds` (cambios hechos en otros workers, scans/min)
+    """
+
+    def __init__(self, app, tick_seconds: float, refresh_seconds: float, max_subscribers: int):
+        self.app = app
+        self.tick_seconds = tick_seconds
+        self.refresh_seconds = refresh_seconds
+        self.max_subscribers = max_subscribers
+
+        self._subs: dict[int, set[queue.Queue]] = {}
+        self._dirty: set[int] = set()
+        self._last: dict[int, tuple[float, dict]] = {}
+        # eventos cuyo último counters() falló (DB caída): se loguea una vez por racha
+        self._failed: dict[int, float] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, event_id: int) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=16)
+        with self._cond:
+            if sum(len(s) for s in self._subs.values()) >= self.max_subscribers:
+                raise RuntimeError("TOO_MANY_SUBSCRIBERS")
+
+            self._subs.setdefault(event_id, set()).add(q)
+            last = self._last.get(event_id)
+            if last is not None:
+                q.put_nowait(last[1])
+            self._dirty.add(event_id)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="live-broadcaster", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return q
+
+    def unsubscribe(self, event_id: int, q: queue.Queue):
+        with self._cond:
+            subs = self._subs.get(event_id)
+            if subs is None:
+                return
+            subs.discard(q)
+            if not subs:
+                del self._subs[event_id]
+                self._last.pop(event_id, None)
+                self._failed.pop(event_id, None)
+                self._dirty.discard(event_id)
+
+    def publish(self, event_id: int):
+        with self._cond:
+            if event_id in self._subs:
+                self._dirty.add(event_id)
+
+    @staticmethod
+    def counters(event_id: int) -> dict:
+        """
+        Totales desde event_stats (una fila); scans/min cuenta solo el último minuto.
+        """
+        now = datetime.utcnow()
+        minute_ago = now - timedelta(minutes=1)
+
+        stats = db.session.execute(
+            select(EventStats.checked_in, EventStats.reserved).where(EventStats.event_id == event_id)
+        ).first()
+        checked_in, reserved = stats if stats is not None else (0, 0)
+        recent = db.session.execute(
+            select(func.count(Reservation.id))
+            .where(Reservation.event_id == event_id)
+            .where(Reservation.used_at >= minute_ago)
+        ).scalar_one()
+        access_recent = db.session.execute(
+            select(func.count(AccessScan.id))
+            .where(AccessScan.event_id == event_id)
+            .where(AccessScan.scanned_at >= minute_ago)
+        ).scalar_one()
+
+        return {
+            "event_id": event_id,
+            "checked_in": int(checked_in or 0),
+            "reserved": int(reserved or 0),
+            "scans_per_min": int(recent or 0) + int(access_recent or 0),
+        }
+
+    def _due(self) -> set[int]:
+        now = time.monotonic()
+        due = set(self._dirty)
+        for event_id in self._subs:
+            last = self._last.get(event_id)
+            if last is None or now - last[0] >= self.refresh_seconds:
+                due.add(event_id)
+        return due
+
+    def _broadcast(self, event_id: int, snapshot: dict):
+        with self._cond:
+            previous = self._last.get(event_id)
+            self._last[event_id] = (time.monotonic(), snapshot)
+            if previous is not None and previous[1] == snapshot:
+                return
+            targets = list(self._subs.get(event_id, ()))
+
+        for q in targets:
+            try:
+                q.put_nowait(snapshot)
+            except queue.Full:
+                # dashboard lento: se descarta lo viejo, lo que importa es el último valor
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(snapshot)
+
+    def _run(self):
+        with self.app.app_context():
+            failed = False
+            while True:
+                with self._cond:
+                    if not self._subs:
+                        self._thread = None
+                        return
+                    # dashboard recién conectado sin snapshot → sin esperar el tick
+                    # (salvo que la vuelta anterior haya fallado: no reintentar en loop)
+                    if failed or all(event_id in self._last for event_id in self._subs):
+                        self._cond.wait(timeout=self.tick_seconds)
+                    due = self._due()
+                    self._dirty.clear()
+
+                failed = False
+                for event_id in due:
+                    try:
+                        snapshot = self.counters(event_id)
+                    except Exception:
+                        db.session.rollback()
+                        failed = True
+                        if event_id not in self._failed:
+                            current_app.logger.exception("LIVE counters error (event %s)", event_id)
+                        self._failed[event_id] = time.monotonic()
+                        continue
+                    if self._failed.pop(event_id, None) is not None:
+                        current_app.logger.info("LIVE counters recovered (event %s)", event_id)
+                    self._broadcast(event_id, snapshot)
+
+                # no retener la conexión entre ticks
+                db.session.remove()
+
+    def stream(self, event_id: int, heartbeat_seconds: float, max_seconds: float):
+        """
+        Generador SSE. Corta a los max_seconds (el cliente reconecta solo)
+        para no retener hilos de gunicorn para siempre.
+        """
+        q = self.subscribe(event_id)
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    snapshot = q.get(timeout=min(heartbeat_seconds, remaining))
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: counters\ndata: {json.dumps(snapshot)}\n\n"
+        finally:
+            self.unsubscribe(event_id, q)
+
+
+_broadcaster_lock = threading.Lock()
+
+
+def get_live_broadcaster() -> LiveBroadcaster:
+    app = current_app._get_current_object()
+    broadcaster = app.extensions.get("live")
+    if broadcaster is not None:
+        return broadcaster
+
+    with _broadcaster_lock:
+        broadcaster = app.extensions.get("live")
+        if broadcaster is None:
+            cfg = app.config
+            broadcaster = LiveBroadcaster(
+                app,
+                tick_seconds=float(cfg.get("LIVE_TICK_SECONDS", 1)),
+                refresh_seconds=float(cfg.get("LIVE_REFRESH_SECONDS", 5)),
+                max_subscribers=int(cfg.get("LIVE_MAX_SUBSCRIBERS", 20)),
+            )
+            app.extensions["live"] = broadcaster
+        return broadcaster
+
+
+def publish_live(*event_ids: int):
+    """
+    Avisa al broadcaster de este worker (no hace nada si nadie está mirando).
+    """
+    broadcaster = current_app.extensions.get("live")
+    if broadcaster is None:
+        return
+    for event_id in event_ids:
+        broadcaster.publish(event_id)
@@ -0,0 +1,232 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+
+class _PooledSession:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SMTPSessionPool:
+    """
+    Pool chico de sesiones SMTP autenticadas (EHLO/STARTTLS/LOGIN una sola vez).
+    - NOOP antes de reusar una sesión que estuvo quieta
+    - reconecta si el servidor cortó
+    - recicla la sesión tras max_messages (Gmail corta ~100 por conexión)
+    """
+
+    # reconexiones por mensaje en send_many antes de darlo por fallido
+    MAX_RETRIES = 2
+
+    def __init__(
+        self,
+        server: str,
+        port: int,
+        use_tls: bool,
+        username: str,
+        password: str,
+        size: int = 4,
+        keepalive_seconds: int = 30,
+        max_idle_seconds: int = 240,
+        max_messages: int = 100,
+        timeout: int = 30,
+    ):
+        self.server = server
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages = max_messages
+        self.timeout = timeout
+
+        self._idle: queue.LifoQueue[_PooledSession] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> _PooledSession:
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        return _PooledSession(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _alive(self, s: _PooledSession) -> bool:
+        idle_for = time.monotonic() - s.last_used
+        if idle_for > self.max_idle_seconds:
+            return False
+        if idle_for < self.keepalive_seconds:
+            return True
+        try:
+            code, _ = s.smtp.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _PooledSession:
+        while True:
+            try:
+                s = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._alive(s):
+                return s
+            self._close(s.smtp)
+
+    def _checkin(self, s: _PooledSession):
+        s.last_used = time.monotonic()
+        if s.messages >= self.max_messages:
+            self._close(s.smtp)
+            return
+        self._idle.put(s)
+
+    @contextmanager
+    def session(self):
+        self._slots.acquire()
+        s = None
+        try:
+            s = self._checkout()
+            yield s
+        except Exception:
+            # sesión en estado desconocido → no vuelve al pool
+            if s is not None:
+                self._close(s.smtp)
+                s = None
+            raise
+        finally:
+            if s is not None:
+                self._checkin(s)
+            self._slots.release()
+
+    def send(self, sender: str, to_addrs: list[str], message: bytes):
+        """
+        Envía un mensaje; si la sesión estaba muerta reintenta una vez con otra.
+        """
+        for attempt in range(2):
+            try:
+                with self.session() as s:
+                    s.smtp.sendmail(sender, to_addrs, message)
+                    s.messages += 1
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                if attempt == 1:
+                    raise
+
+    def send_many(self, messages: list[tuple[str, list[str], bytes]]) -> list[Exception | None]:
+        """
+        Varios mensajes sobre la misma sesión (re-envíos, anuncios).
+        Devuelve un error (o None) por mensaje, en el mismo orden.
+        """
+        results: list[Exception | None] = []
+        pending = list(messages)
+        retries = 0
+
+        while pending:
+            connected = False
+            try:
+                with self.session() as s:
+                    connected = True
+                    while pending and s.messages < self.max_messages:
+                        sender, to_addrs, message = pending[0]
+                        try:
+                            s.smtp.sendmail(sender, to_addrs, message)
+                            results.append(None)
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                            # error del mensaje, la sesión sigue sana
+                            s.smtp.rset()
+                            results.append(e)
+                        s.messages += 1
+                        pending.pop(0)
+                        retries = 0
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                if not connected:
+                    # no hay sesión posible → falla el resto
+                    results.extend([e] * len(pending))
+                    pending = []
+                    continue
+                # el servidor cortó en medio del mensaje: se reabre sesión y se reintenta;
+                # un mensaje que corta siempre queda fallido (lo reintenta el backoff del outbox)
+                retries += 1
+                if retries > self.MAX_RETRIES:
+                    results.append(e)
+                    pending.pop(0)
+                    retries = 0
+            except Exception as e:
+                # login/conexión imposible → falla el resto
+                results.extend([e] * len(pending))
+                pending = []
+
+        return results
+
+    def close_all(self):
+        while True:
+            try:
+                s = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(s.smtp)
+
+
+_pool_lock = threading.Lock()
+
+
+def get_mail_transport() -> SMTPSessionPool:
+    """
+    Pool por proceso, guardado en app.extensions.
+    """
+    app = current_app._get_current_object()
+    pool = app.extensions.get("mail_transport")
+    if pool is not None:
+        return pool
+
+    with _pool_lock:
+        pool = app.extensions.get("mail_transport")
+        if pool is not None:
+            return pool
+
+        cfg = app.config
+        server = cfg.get("MAIL_SERVER")
+        port = int(cfg.get("MAIL_PORT", 587))
+        username = cfg.get("MAIL_USERNAME")
+        password = cfg.get("MAIL_PASSWORD")
+
+        if not (server and port and username and password):
+            raise RuntimeError("MAIL_CONFIG_MISSING")
+
+        pool = SMTPSessionPool(
+            server=server,
+            port=port,
+            use_tls=bool(cfg.get("MAIL_USE_TLS", True)),
+            username=username,
+            password=password,
+            size=int(cfg.get("MAIL_SMTP_POOL_SIZE", 4)),
+            keepalive_seconds=int(cfg.get("MAIL_SMTP_KEEPALIVE_SECONDS", 30)),
+            max_idle_seconds=int(cfg.get("MAIL_SMTP_MAX_IDLE_SECONDS", 240)),
+            max_messages=int(cfg.get("MAIL_SMTP_MAX_MESSAGES_PER_SESSION", 100)),
+            timeout=int(cfg.get("MAIL_SMTP_TIMEOUT", 30)),
+        )
+        app.extensions["mail_transport"] = pool
+        return pool
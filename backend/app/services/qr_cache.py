@@ -0,0 +1,223 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+from . import qr_render
+
+
+class QRCache:
+    """
+    Cache de QRs direccionado por contenido (sha256 de lo codificado + formato):
+    - LRU acotado en memoria (por proceso)
+    - store en disco compartido por todos los workers de gunicorn
+    El mismo texto siempre da la misma imagen, así que la entrada nunca se invalida.
+    """
+
+    def __init__(self, disk_dir: str | None, max_entries: int = 1024, render_processes: int = 0):
+        self.disk_dir = disk_dir
+        self.max_entries = max_entries
+        self.render_processes = render_processes
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: str, fmt: str = "png", size: int | None = None, profile: str = "default") -> str:
+        # "NxN": ?size= es el tamaño exacto de la imagen (antes: múltiplo de módulos)
+        tag = f"{qr_render.profile_tag(profile)}|{fmt}|{f'{size}x{size}' if size else ''}|{data}"
+        return hashlib.sha256(tag.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str, fmt: str) -> str | None:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, key[:2], f"{key}.{fmt}")
+
+    def _remember(self, key: str, body: bytes):
+        with self._lock:
+            self._lru[key] = body
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _read_disk(self, key: str, fmt: str) -> bytes | None:
+        path = self._disk_path(key, fmt)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, fmt: str, body: bytes):
+        path = self._disk_path(key, fmt)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # escritura atómica: otro worker nunca ve un archivo a medias
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError:
+            current_app.logger.warning("QR cache: no se pudo escribir %s", path)
+
+    def get(self, data: str, fmt: str = "png", size: int | None = None, profile: str = "default") -> tuple[bytes, str]:
+        """
+        Devuelve (imagen, etag). Orden: memoria → disco → render.
+        """
+        key = self.key(data, fmt, size, profile)
+
+        with self._lock:
+            body = self._lru.get(key)
+            if body is not None:
+                self._lru.move_to_end(key)
+                return body, key
+
+        body = self._read_disk(key, fmt)
+        if body is None:
+            body = qr_render.render_in_pool(self.render_processes, data, fmt, size, profile)
+            self._write_disk(key, fmt, body)
+
+        self._remember(key, body)
+        return body, key
+
+    # --- alias por id (para X-Accel-Redirect) ---
+
+    def alias_path(self, alias: str) -> str | None:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, alias)
+
+    def alias_exists(self, alias: str) -> bool:
+        path = self.alias_path(alias)
+        return bool(path) and os.path.exists(path)
+
+    def _alias_target(self, alias: str, key: str, fmt: str) -> str:
+        return os.path.relpath(self._disk_path(key, fmt), os.path.dirname(self.alias_path(alias)))
+
+    def _linked(self, alias: str, key: str, fmt: str) -> bool:
+        # el alias apunta a este contenido y el archivo sigue en disco
+        path = self.alias_path(alias)
+        try:
+            return os.readlink(path) == self._alias_target(alias, key, fmt) and os.path.exists(path)
+        except OSError:
+            return False
+
+    def _link(self, alias: str, key: str, fmt: str):
+        path = self.alias_path(alias)
+        target = self._alias_target(alias, key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # symlink atómico: se crea con otro nombre y se renombra encima
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.symlink(target, tmp)
+        os.replace(tmp, path)
+
+    def link_alias(self, alias: str, data: str, fmt: str = "png", size: int | None = None, profile: str = "default"):
+        """
+        Asegura el archivo direccionado por contenido y apunta `alias` a él.
+        Si el contenido cambió (formato del código, clave de firma) el alias se re-apunta;
+        si ya apunta al contenido actual no hace nada.
+        """
+        if not self.disk_dir or self._linked(alias, self.key(data, fmt, size, profile), fmt):
+            return
+        body, key = self.get(data, fmt, size, profile)
+        if not os.path.exists(self._disk_path(key, fmt)):
+            # estaba solo en memoria (disco limpiado)
+            self._write_disk(key, fmt, body)
+        self._link(alias, key, fmt)
+
+    def prewarm(self, items: list[tuple[str, str, str, int | None, str]], processes: int = 0, force: bool = False) -> int:
+        """
+        Render masivo a disco + alias. items = [(alias, data, fmt, size, profile), ...]
+        Devuelve cuántos QRs hubo que renderizar.
+        """
+        if not self.disk_dir:
+            return 0
+
+        todo = []
+        for alias, data, fmt, size, profile in items:
+            key = self.key(data, fmt, size, profile)
+            if force or not os.path.exists(self._disk_path(key, fmt)):
+                todo.append((alias, key, data, fmt, size, profile))
+            elif not self._linked(alias, key, fmt):
+                self._link(alias, key, fmt)
+
+        bodies = qr_render.render_many([(d, f, sz, p) for _, _, d, f, sz, p in todo], processes=processes)
+        for (alias, key, _, fmt, _, _), body in zip(todo, bodies):
+            self._write_disk(key, fmt, body)
+            self._link(alias, key, fmt)
+
+        return len(todo)
+
+
+_cache_lock = threading.Lock()
+
+
+def get_qr_cache() -> QRCache:
+    """
+    Cache por proceso, guardado en app.extensions.
+    """
+    app = current_app._get_current_object()
+    cache = app.extensions.get("qr_cache")
+    if cache is not None:
+        return cache
+
+    with _cache_lock:
+        cache = app.extensions.get("qr_cache")
+        if cache is None:
+            cache = QRCache(
+                disk_dir=app.config.get("QR_CACHE_DIR") or None,
+                max_entries=int(app.config.get("QR_CACHE_MAX_ENTRIES", 1024)),
+                render_processes=int(app.config.get("QR_RENDER_PROCESSES", 0)),
+            )
+            app.extensions["qr_cache"] = cache
+        return cache
+
+
+def qr_response(
+    data: str,
+    download_name: str,
+    profile: str = "default",
+    fmt: str = "png",
+    size: int | None = None,
+    private: bool = False,
+):
+    """
+    QR (png 1-bit con paleta o svg) para `data` con ETag = hash del contenido: un
+    If-None-Match repetido se responde con 304 sin renderizar nada.
+    """
+    from ..common.http_cache import conditional_response
+
+    cache = get_qr_cache()
+    return conditional_response(
+        etag=cache.key(data, fmt, size, profile),
+        build_body=lambda: cache.get(data, fmt, size, profile)[0],
+        mimetype=qr_render.MIMETYPES[fmt],
+        download_name=f"{download_name}.{fmt}",
+        max_age=int(current_app.config.get("QR_CACHE_MAX_AGE", 86400)),
+        private=private,
+    )
+
+
+def qr_accel_response(alias: str, download_name: str, private: bool = False):
+    """
+    Respuesta vacía con X-Accel-Redirect: nginx sirve el archivo con sendfile,
+    los bytes no pasan por el worker de Python.
+    """
+    from flask import Response
+
+    prefix = (current_app.config.get("QR_ACCEL_PREFIX") or "").rstrip("/")
+    max_age = int(current_app.config.get("QR_CACHE_MAX_AGE", 86400))
+    scope = "private" if private else "public"
+
+    resp = Response(status=200, mimetype=qr_render.MIMETYPES["png"])
+    resp.headers["X-Accel-Redirect"] = f"{prefix}/{alias}"
+    resp.headers["Content-Disposition"] = f'inline; filename="{download_name}.png"'
+    # la URL es por id, no por contenido: sin immutable, nginx pone ETag/Last-Modified del archivo
+    resp.headers["Cache-Control"] = f"{scope}, max-age={max_age}"
+    return resp
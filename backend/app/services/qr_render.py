@@ -0,0 +1,178 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H
+from qrcode.exceptions import DataOverflowError
+
+FORMATS = ("png", "svg")
+MIMETYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# PNG con paleta de 2 colores (índice 0 blanco, 1 negro), 1 bit por píxel
+_PALETTE = [255, 255, 255, 0, 0, 0]
+
+MIN_SIZE = 64
+MAX_SIZE = 2048
+DEFAULT_BOX = 10
+BORDER = 4
+
+
+@dataclass(frozen=True)
+class QRProfile:
+    version: int | None
+    error_correction: int
+    # máscara fija: evita evaluar las 8 máscaras en cada render (~6x más rápido)
+    mask_pattern: int | None = 2
+
+
+# Versión, corrección de errores y máscara fijas por tipo de código
+# (alcanza para las URLs actuales; si alguna no entra, se cae al auto-fit de qrcode).
+PROFILES = {
+    # {base}/checkin/{reservation_code}: código base32 (26, modo alfanumérico)
+    "reservation": QRProfile(version=4, error_correction=ERROR_CORRECT_M),
+    # {base}/evento/{public_code}
+    "event": QRProfile(version=5, error_correction=ERROR_CORRECT_M),
+    # {base}/security/access/{access_code}: código base32 (16)
+    "access": QRProfile(version=4, error_correction=ERROR_CORRECT_M),
+    # cualquier otro texto
+    "default": QRProfile(version=None, error_correction=ERROR_CORRECT_M, mask_pattern=None),
+}
+
+_EC_NAMES = {ERROR_CORRECT_L: "L", ERROR_CORRECT_M: "M", ERROR_CORRECT_Q: "Q", ERROR_CORRECT_H: "H"}
+
+
+def _matrix(data: str, profile: QRProfile) -> list[list[bool]]:
+    qr = qrcode.QRCode(
+        version=profile.version,
+        error_correction=profile.error_correction,
+        border=BORDER,
+        mask_pattern=profile.mask_pattern,
+    )
+    qr.add_data(data)
+    try:
+        qr.make(fit=profile.version is None)
+    except DataOverflowError:
+        qr = qrcode.QRCode(
+            error_correction=profile.error_correction,
+            border=BORDER,
+            mask_pattern=profile.mask_pattern,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def _box(modules: int, size: int | None) -> int:
+    # módulos enteros (sin escalado fraccional): el resto hasta `size` es margen blanco
+    if not size:
+        return DEFAULT_BOX
+    return max(1, size // modules)
+
+
+def _png(matrix: list[list[bool]], size: int | None) -> bytes:
+    from PIL import Image
+
+    n = len(matrix)
+    box = _box(n, size)
+
+    # 1 byte (índice de paleta) por módulo → imagen n×n y escalado NEAREST
+    # (sin dibujar rectángulo por rectángulo)
+    raw = bytes(1 if dark else 0 for row in matrix for dark in row)
+    img = Image.frombytes("P", (n, n), raw)
+    if box > 1:
+        img = img.resize((n * box, n * box), Image.NEAREST)
+    if size and img.width != size:
+        # ?size=N exacto: centrado sobre blanco (se suma al quiet zone)
+        canvas = Image.new("P", (size, size), 0)
+        offset = (size - img.width) // 2
+        canvas.paste(img, (offset, offset))
+        img = canvas
+    img.putpalette(_PALETTE)
+
+    buf = io.BytesIO()
+    # bits=1: PLTE de 2 entradas y 1 bit por píxel
+    img.save(buf, format="PNG", bits=1)
+    return buf.getvalue()
+
+
+def _svg(matrix: list[list[bool]], size: int | None) -> bytes:
+    n = len(matrix)
+    # vectorial: el viewBox escala a exactamente size px
+    px = size or n * DEFAULT_BOX
+
+    # un subpath por racha horizontal de módulos oscuros
+    parts = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                parts.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{px}" height="{px}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path d="{"".join(parts)}" fill="#000"/></svg>'
+    ).encode("ascii")
+
+
+def render(data: str, fmt: str = "png", size: int | None = None, profile: str = "default") -> bytes:
+    """
+    Render puro (sin app context): se puede mandar a un proceso aparte.
+    """
+    p = PROFILES.get(profile, PROFILES["default"])
+    matrix = _matrix(data, p)
+    if fmt == "svg":
+        return _svg(matrix, size)
+    return _png(matrix, size)
+
+
+def profile_tag(profile: str) -> str:
+    p = PROFILES.get(profile, PROFILES["default"])
+    return f"{profile}:v{p.version or 'auto'}{_EC_NAMES[p.error_correction]}m{p.mask_pattern}"
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool(processes: int) -> ProcessPoolExecutor | None:
+    """
+    Pool de procesos por worker (se crea después del fork de gunicorn).
+    processes <= 0 → sin pool, se renderiza en el hilo actual.
+    """
+    global _pool, _pool_pid
+    if processes <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=processes)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def render_in_pool(processes: int, data: str, fmt: str = "png", size: int | None = None, profile: str = "default") -> bytes:
+    pool = get_render_pool(processes)
+    if pool is None:
+        return render(data, fmt, size, profile)
+    return pool.submit(render, data, fmt, size, profile).result()
+
+
+def render_many(items: list[tuple[str, str, int | None, str]], processes: int = 0) -> list[bytes]:
+    """
+    Render masivo (prewarm, benchmarks). items = [(data, fmt, size, profile), ...]
+    """
+    pool = get_render_pool(processes)
+    if pool is None:
+        return [render(*it) for it in items]
+    return list(pool.map(render, *zip(*items), chunksize=32))
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import re
+import zlib
+from collections.abc import Iterator
+
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Event, Reservation
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "instagram",
+    "reservation_code",
+    "status",
+    "used_at",
+    "email_send_status",
+    "created_at",
+)
+
+# se entrega al cliente cada ~64KB
+_CHUNK = 64 * 1024
+_YIELD_PER = 2000
+
+# Excel/Sheets interpretan como fórmula lo que empieza así (nombres / instagram cargados por el público)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# teléfonos (+54 9 ...) no son fórmulas
+_PHONE = re.compile(r"[+-]?[\d\s().-]+")
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    s = str(value)
+    return "'" + s if s.startswith(_FORMULA_PREFIXES) and not _PHONE.fullmatch(s) else s
+
+
+def _json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+class ReservationExportService:
+    @staticmethod
+    def stream(event_id: int, fmt: str = "csv", compress: bool = False) -> Iterator[bytes]:
+        """
+        Lista de invitados completa como generador de bytes (CSV o NDJSON, opcional gzip).
+        Cursor del lado del servidor (yield_per → stream_results): memoria constante
+        sin importar la cantidad de reservas; nada de objetos ORM.
+        """
+        if fmt not in FORMATS:
+            raise ValueError("INVALID_FORMAT")
+        if db.session.get(Event, event_id) is None:
+            raise ValueError("EVENT_NOT_FOUND")
+
+        rows = db.session.execute(
+            select(*(getattr(Reservation, c) for c in COLUMNS))
+            .where(Reservation.event_id == event_id)
+            .order_by(Reservation.id)
+            .execution_options(yield_per=_YIELD_PER)
+        )
+
+        def lines() -> Iterator[str]:
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerow(COLUMNS)
+                for row in rows:
+                    writer.writerow([_csv_cell(v) for v in row])
+                    if buf.tell() >= _CHUNK:
+                        yield buf.getvalue()
+                        buf.seek(0)
+                        buf.truncate()
+                yield buf.getvalue()
+            else:
+                parts, size = [], 0
+                for row in rows:
+                    line = json.dumps({c: _json_value(v) for c, v in zip(COLUMNS, row)}, ensure_ascii=False) + "\n"
+                    parts.append(line)
+                    size += len(line)
+                    if size >= _CHUNK:
+                        yield "".join(parts)
+                        parts, size = [], 0
+                yield "".join(parts)
+
+        def generate() -> Iterator[bytes]:
+            try:
+                if not compress:
+                    for text in lines():
+                        if text:
+                            yield text.encode("utf-8")
+                    return
+
+                comp = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                for text in lines():
+                    out = comp.compress(text.encode("utf-8"))
+                    if out:
+                        yield out
+                yield comp.flush()
+            finally:
+                rows.close()
+
+        return generate()
@@ -1,38 +1,89 @@
-import io
-import secrets
-import smtplib
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-import qrcode
 from flask import current_app
-from sqlalchemy import update
+from sqlalchemy import update, insert, select, literal, cast, case, null, any_, or_, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
 
 from ..extensions import db
-from ..models import Event, Reservation, ReservationStatus
+from ..common import checkin_token
+from ..common.search_text import search_key
+from ..models import Event, EventStatus, Reservation, ReservationStatus, EmailOutbox, EmailOutboxStatus
+from ..models.compact_code import canonical, new_code
+from .mail_transport import get_mail_transport
+from .invitation_template import InvitationTemplates, CompiledInvitation, QR_CID
+from .qr_cache import get_qr_cache
+from .event_service import EventService
+from .live_service import publish_live
+from .event_stats_service import EventStatsService
+from .guest_search_service import GuestSearchService
+
+# columnas de ReservationSchema para los listados (filas Core, sin hidratar Reservation)
+LIST_COLUMNS = (
+    Reservation.id,
+    Reservation.event_id,
+    Reservation.first_name,
+    Reservation.last_name,
+    Reservation.email,
+    Reservation.phone,
+    Reservation.instagram,
+    Reservation.reservation_code,
+    Reservation.status,
+    Reservation.used_at,
+    Reservation.scan_count,
+    Reservation.last_scan_at,
+    Reservation.email_sent_at,
+    Reservation.email_send_status,
+    Reservation.created_at,
+)
+
+
+# sin cupo asignado (en espera) o cancelada: sin QR ni URL de check-in
+NO_QR_STATUSES = (ReservationStatus.waitlisted, ReservationStatus.cancelled)
+
+# violaciones esperables al crear una reserva (nombres de Postgres, ver migrations/)
+_CODE_UNIQUE = "ix_reservations_reservation_code"
+_EVENT_FKS = frozenset({
+    "reservations_event_id_fkey",
+    "event_stats_event_id_fkey",
+    "reservation_search_terms_event_id_fkey",
+})
+
+
+def _violated_constraint(e: IntegrityError) -> str | None:
+    # psycopg2 trae el nombre; sqlite solo el mensaje (y sin FK: foreign_keys está apagado)
+    name = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+    if name:
+        return name
+    if str(e.orig) == "UNIQUE constraint failed: reservations.reservation_code":
+        return _CODE_UNIQUE
+    return None
 
 
 class ReservationService:
     @staticmethod
     def _generate_code() -> str:
-        return secrets.token_hex(16)
+        return new_code()
 
     @staticmethod
-    def _checkin_url(reservation_code: str) -> str:
+    def _checkin_url(r) -> str:
+        """
+        r: Reservation o fila con id, event_id y reservation_code.
+        Con CHECKIN_SIGNING_KEY el QR lleva el payload firmado (r1.<evento>.<reserva>.<firma>).
+        """
         base = (current_app.config.get("PUBLIC_BASE_URL") or "").rstrip("/")
-        return f"{base}/checkin/{reservation_code}"
+        return f"{base}/checkin/{checkin_token.payload_for(r.event_id, r.id, r.reservation_code)}"
 
     @staticmethod
     def _qr_png_bytes(data: str) -> bytes:
-        img = qrcode.make(data)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        return buf.getvalue()
+        png, _ = get_qr_cache().get(data, profile="reservation")
+        return png
 
     @staticmethod
-    def _send_email_with_qr(to_email: str, subject: str, html: str, qr_png: bytes):
+    def _build_email_with_qr(to_email: str, subject: str, html: str, qr_png: bytes) -> tuple[str, bytes]:
         """
         Gmail + Outlook friendly:
         - multipart/related (inline images)
@@ -40,15 +91,9 @@ class ReservationService:
         - QR inline via CID and also attached as file
         """
         cfg = current_app.config
+        sender = cfg.get("MAIL_DEFAULT_SENDER") or cfg.get("MAIL_USERNAME")
 
-        server = cfg.get("MAIL_SERVER")
-        port = int(cfg.get("MAIL_PORT", 587))
-        use_tls = bool(cfg.get("MAIL_USE_TLS", True))
-        username = cfg.get("MAIL_USERNAME")
-        password = cfg.get("MAIL_PASSWORD")
-        sender = cfg.get("MAIL_DEFAULT_SENDER") or username
-
-        if not (server and port and username and password and sender):
+        if not sender:
             raise RuntimeError("MAIL_CONFIG_MISSING")
 
         # Root container
@@ -71,7 +116,7 @@ class ReservationService:
         alt.attach(MIMEText(html, "html", "utf-8"))
 
         # Inline QR (CID)
-        qr_cid = "qr-image"
+        qr_cid = QR_CID
         img = MIMEImage(qr_png, _subtype="png")
         img.add_header("Content-ID", f"<{qr_cid}>")
         img.add_header("Content-Disposition", "inline", filename="qr.png")
@@ -82,17 +127,214 @@ class ReservationService:
         attach.add_header("Content-Disposition", "attachment", filename="qr.png")
         msg.attach(attach)
 
-        with smtplib.SMTP(server, port) as smtp:
-            smtp.ehlo()
-            if use_tls:
-                smtp.starttls()
-                smtp.ehlo()
-            smtp.login(username, password)
-            smtp.sendmail(sender, [to_email], msg.as_string())
+        return sender, msg.as_bytes()
+
+    @staticmethod
+    def _invitation_message(
+        to_email: str,
+        subject: str,
+        html: str,
+        qr_png: bytes,
+        compiled: CompiledInvitation | None = None,
+    ) -> tuple[str, bytes]:
+        """
+        (sender, mensaje) listo para el transport.
+        Con template compilado + MAIL_COMPACT_MIME arma el mensaje en modo compacto.
+        """
+        cfg = current_app.config
+        if compiled is not None and cfg.get("MAIL_COMPACT_MIME", True):
+            sender = cfg.get("MAIL_DEFAULT_SENDER") or cfg.get("MAIL_USERNAME")
+            if not sender:
+                raise RuntimeError("MAIL_CONFIG_MISSING")
+            return sender, InvitationTemplates.build_compact_message(compiled, sender, to_email, html, qr_png)
+        return ReservationService._build_email_with_qr(to_email, subject, html, qr_png)
+
+    @staticmethod
+    def _send_email_with_qr(
+        to_email: str,
+        subject: str,
+        html: str,
+        qr_png: bytes,
+        compiled: CompiledInvitation | None = None,
+    ):
+        """
+        Envía usando el pool de sesiones SMTP (sin handshake por mensaje).
+        """
+        sender, message = ReservationService._invitation_message(to_email, subject, html, qr_png, compiled)
+        get_mail_transport().send(sender, [to_email], message)
+
+    @staticmethod
+    def build_invitation(r: Reservation) -> dict:
+        """
+        Payload listo para _send_email_with_qr (lo usa el worker del outbox).
+        """
+        ev: Event | None = db.session.get(Event, r.event_id)
+        if not ev:
+            raise ValueError("EVENT_NOT_FOUND")
+
+        # template del evento compilado una vez; por invitado solo el nombre
+        compiled = InvitationTemplates.compiled(ev)
+        checkin_url = ReservationService._checkin_url(r)
+
+        # el QR no cambia nunca: queda como asset para GET /<id>/qr
+        ReservationService.write_qr_asset(r)
+
+        return {
+            "to_email": r.email,
+            "subject": f"Tu invitación - {ev.name}",
+            "html": compiled.render(r.first_name, r.last_name),
+            "qr_png": ReservationService._qr_png_bytes(checkin_url),
+            "compiled": compiled,
+        }
+
+    @staticmethod
+    def _queue_invitation(reservation_id, now: datetime, *where):
+        """
+        INSERT ... SELECT de la invitación en el outbox.
+        reservation_id puede ser una columna (CTE / reservations + where) o un literal.
+        """
+        return insert(EmailOutbox).from_select(
+            ["reservation_id", "kind", "status", "attempts", "next_attempt_at", "created_at"],
+            select(
+                reservation_id,
+                literal("invitation"),
+                cast(literal(EmailOutboxStatus.pending, EmailOutbox.status.type), EmailOutbox.status.type),
+                literal(0),
+                literal(now),
+                literal(now),
+            ).where(*where),
+        )
+
+    @staticmethod
+    def _insert_with_invitation(values: dict, now: datetime) -> int:
+        """
+        INSERT de la reserva + su invitación en el outbox (dos INSERT en la misma transacción),
+        devuelve el id. En Postgres va todo junto en _insert_pipeline.
+        """
+        rid = db.session.execute(
+            insert(Reservation).values(**values).returning(Reservation.id)
+        ).scalar_one()
+        db.session.execute(ReservationService._queue_invitation(literal(rid), now))
+        return rid
+
+    @staticmethod
+    def _insert_waitlisted(values: dict) -> int:
+        # en espera: sin invitación (sale cuando se promueve)
+        values.update(status=ReservationStatus.waitlisted, email_send_status=None)
+        return db.session.execute(
+            insert(Reservation).values(**values).returning(Reservation.id)
+        ).scalar_one()
+
+    @staticmethod
+    def _lock_event(event_id: int):
+        """
+        SELECT ... FOR UPDATE de la fila del evento. Create (eventos con límite) y cancel lo toman
+        antes de decidir cupo / lista de espera: un "lleno → waitlisted" y una liberación de cupo
+        concurrentes no pueden cruzarse (quedaría un cupo libre con alguien esperando).
+        """
+        db.session.execute(select(Event.id).where(Event.id == event_id).with_for_update())
+
+    @staticmethod
+    def _claim_seat(event_id: int) -> bool:
+        """
+        Reclama un cupo sin COUNT(*), siempre contra el capacity actual de la DB (no el cacheado):
+        UPDATE events SET reserved_count = CASE WHEN capacity IS NULL THEN reserved_count ELSE reserved_count + 1 END
+        WHERE id=:id AND (capacity IS NULL OR reserved_count < capacity) RETURNING id
+        False = lleno (o el evento ya no existe). Se corre con el lock de _lock_event tomado
+        (dura hasta el commit de la reserva), así también "lleno" es una decisión bajo lock.
+        Solo para eventos con límite (EventLookup.limited); el CASE cubre un límite recién quitado.
+        """
+        return db.session.execute(ReservationService._claim_seat_stmt(event_id)).first() is not None
+
+    @staticmethod
+    def _claim_seat_stmt(event_id: int):
+        return (
+            update(Event)
+            .where(Event.id == event_id)
+            .where(or_(Event.capacity.is_(None), Event.reserved_count < Event.capacity))
+            # updated_at explícito: no es una edición del evento (no invalida templates)
+            .values(
+                reserved_count=case(
+                    (Event.capacity.is_(None), Event.reserved_count),
+                    else_=Event.reserved_count + 1,
+                ),
+                updated_at=Event.updated_at,
+            )
+            .returning(Event.id)
+        )
+
+    @staticmethod
+    def _insert_pipeline(ev, values: dict, now: datetime) -> tuple[int, ReservationStatus]:
+        """
+        Postgres: la reserva entera en un solo statement (WITH ... SELECT id, status):
+          seat            UPDATE events (_claim_seat_stmt), solo si el evento tiene límite
+          new_reservation INSERT ... SELECT, created si hubo cupo / waitlisted si no
+          new_invitation  INSERT en el outbox, solo si quedó created
+          stats           upsert de event_stats (+1 reserved o waitlisted)
+          terms           términos de búsqueda (GUEST_SEARCH_BACKEND=prefix)
+        Con límite, _lock_event va antes (otro statement): seat ve el reserved_count ya commiteado
+        y la fila del evento queda lockeada antes que la de event_stats (mismo orden que cancel).
+        """
+        cols = Reservation.__table__.c
+        # cast explícito: un CASE entre dos literales queda text y no entra en la columna enum
+        created = cast(literal(ReservationStatus.created, cols.status.type), cols.status.type)
+        status, email_send_status = created, literal("queued", cols.email_send_status.type)
+        if ev.limited:
+            seat = ReservationService._claim_seat_stmt(ev.id).cte("seat")
+            has_seat = select(seat.c.id).exists()
+            # lleno → lista de espera, sin invitación (sale cuando se promueve)
+            waitlisted = cast(literal(ReservationStatus.waitlisted, cols.status.type), cols.status.type)
+            status = case((has_seat, created), else_=waitlisted)
+            email_send_status = case((has_seat, email_send_status), else_=null())
+
+        row = {k: literal(v, cols[k].type) for k, v in values.items()}
+        row.update(status=status, email_send_status=email_send_status)
+        new_r = (
+            insert(Reservation)
+            .from_select(list(row), select(*row.values()))
+            .returning(Reservation.id, Reservation.status)
+            .cte("new_reservation")
+        )
+        is_created = new_r.c.status == ReservationStatus.created
+
+        ctes = [
+            ReservationService._queue_invitation(new_r.c.id, now, is_created).cte("new_invitation"),
+            EventStatsService.bump_from(select(
+                literal(ev.id).label("event_id"),
+                case((is_created, 1), else_=0).label("reserved"),
+                literal(0).label("checked_in"),
+                literal(0).label("cancelled"),
+                case((is_created, 0), else_=1).label("waitlisted"),
+                literal(now).label("updated_at"),
+            ).select_from(new_r)).cte("stats"),
+        ]
+        terms = GuestSearchService.index_from(new_r.c.id, ev.id, values)
+        if terms is not None:
+            ctes.append(terms.cte("terms"))
+
+        row = db.session.execute(select(new_r.c.id, new_r.c.status).add_cte(*ctes)).one()
+        return row.id, row.status
+
+    @staticmethod
+    def _insert_steps(ev, values: dict, now: datetime) -> tuple[int, ReservationStatus]:
+        """
+        Lo mismo que _insert_pipeline en varios statements (sqlite en dev).
+        """
+        # sin límite: ni UPDATE ni lock de la fila del evento
+        if ev.limited and not ReservationService._claim_seat(ev.id):
+            # lleno → lista de espera (no toca la fila del evento)
+            rid = ReservationService._insert_waitlisted(values)
+            EventStatsService.bump(ev.id, waitlisted=1)
+        else:
+            rid = ReservationService._insert_with_invitation(values, now)
+            EventStatsService.bump(ev.id, reserved=1)
+        GuestSearchService.index(rid, ev.id, values)
+        return rid, values["status"]
 
     @staticmethod
     def create_public_reservation(public_code: str, data: dict) -> Reservation:
-        ev: Event | None = Event.query.filter_by(public_code=public_code).first()
+        # lookup cacheado (sin ir a la DB en cada POST)
+        ev = EventService.lookup_by_public_code(public_code)
         if not ev:
             raise ValueError("EVENT_NOT_FOUND")
 
@@ -100,250 +342,565 @@ class ReservationService:
         if ev.end_at <= now:
             raise ValueError("EVENT_ENDED")
 
-        if getattr(ev, "status", None) and ev.status.value in ("ended", "cancelled"):
+        if ev.status.value in ("ended", "cancelled"):
             raise ValueError("EVENT_NOT_AVAILABLE")
 
-        # reservation_code único
+        values = {
+            "event_id": ev.id,
+            "first_name": data["first_name"].strip(),
+            "last_name": data["last_name"].strip(),
+            "email": data["email"].strip().lower(),
+            "phone": data["phone"].strip(),
+            "instagram": (data.get("instagram") or None),
+            "status": ReservationStatus.created,
+            "scan_count": 0,
+            # el email sale por el outbox (flask email-worker), en la misma transacción
+            "email_send_status": "queued",
+            "created_at": now,
+        }
+        # búsqueda en puerta (ver GuestSearchService)
+        values["search_key"] = search_key(
+            values["first_name"], values["last_name"], values["email"], values["phone"], values["instagram"]
+        )
+
+        # Postgres: un statement + commit; otros motores: un statement por paso
+        if db.session.get_bind().dialect.name == "postgresql":
+            insert_reservation = ReservationService._insert_pipeline
+        else:
+            insert_reservation = ReservationService._insert_steps
+
+        # reservation_code único: lo garantiza el índice unique,
+        # si choca (casi imposible con 128 bits) se reintenta con otro
         for _ in range(8):
-            code = ReservationService._generate_code()
-            exists = Reservation.query.filter_by(reservation_code=code).first()
-            if not exists:
+            row = {**values, "reservation_code": ReservationService._generate_code()}
+            try:
+                if ev.limited:
+                    ReservationService._lock_event(ev.id)
+                rid, status = insert_reservation(ev, row, now)
+                db.session.commit()
                 break
+            except IntegrityError as e:
+                db.session.rollback()
+                constraint = _violated_constraint(e)
+                if constraint == _CODE_UNIQUE:
+                    continue
+                if constraint in _EVENT_FKS:
+                    # el evento ya no existe (lookup cacheado viejo)
+                    raise ValueError("EVENT_NOT_FOUND")
+                raise
         else:
             raise ValueError("RESERVATION_CODE_GENERATION_FAILED")
 
-        r = Reservation(
-            event_id=ev.id,
-            first_name=data["first_name"].strip(),
-            last_name=data["last_name"].strip(),
-            email=data["email"].strip().lower(),
-            phone=data["phone"].strip(),
-            instagram=(data.get("instagram") or None),
-            reservation_code=code,
-            status=ReservationStatus.created,
-        )
-        db.session.add(r)
-        db.session.commit()
-
-        checkin_url = ReservationService._checkin_url(r.reservation_code)
-        qr_png = ReservationService._qr_png_bytes(checkin_url)
-
-        # IMPORTANTE: CID fijo que coincide con _send_email_with_qr (qr-image)
-        html = f"""
-        <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#0b0b0b;padding:24px 0;">
-          <tr>
-            <td align="center">
-              <table role="presentation" width="640" cellpadding="0" cellspacing="0" style="width:640px;max-width:92%;background:#0f0f0f;border:1px solid #222;border-radius:18px;overflow:hidden;">
-
-                <!-- Top bar -->
-                <tr>
-                  <td style="background:#ffd400;padding:18px 22px;">
-                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
-                      <tr>
-                        <td align="left">
-                          <div style="font-size:12px;letter-spacing:3px;font-weight:800;color:#1a1a1a;text-transform:uppercase;">
-                            Bee Concert Club
-                          </div>
-                          <div style="font-size:20px;font-weight:900;color:#0b0b0b;line-height:1.2;margin-top:4px;">
-                            Tu invitación está lista!
-                          </div>
-                        </td>
-                        <td align="right">
-                          <div style="display:inline-block;background:#0b0b0b;color:#ffd400;font-weight:900;font-size:12px;padding:8px 12px;border-radius:999px;">
-                            QR · 1 SOLO USO
-                          </div>
-                        </td>
-                      </tr>
-                    </table>
-                  </td>
-                </tr>
-
-                <!-- Body -->
-                <tr>
-                  <td style="padding:22px 22px 10px 22px;color:#f5f5f5;">
-                    <p style="margin:0 0 10px 0;font-size:15px;line-height:1.6;color:#eaeaea;">
-                      Hola <b style="color:#ffffff;">{r.first_name} {r.last_name}</b>, tu reserva fue registrada.
-                    </p>
-
-                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="margin-top:10px;background:#141414;border:1px solid #242424;border-radius:14px;">
-                      <tr>
-                        <td style="padding:14px 14px;">
-                          <div style="font-size:12px;letter-spacing:2px;font-weight:800;color:#ffd400;text-transform:uppercase;">
-                            Evento
-                          </div>
-                          <div style="font-size:18px;font-weight:900;color:#ffffff;margin-top:4px;line-height:1.3;">
-                            {ev.name}
-                          </div>
-                        </td>
-                      </tr>
-                    </table>
-
-                    <p style="margin:16px 0 12px 0;font-size:14px;line-height:1.6;color:#dcdcdc;">
-                      Presenta este QR en la entrada:
-                    </p>
-
-                    <!-- QR box -->
-                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#0b0b0b;border:1px solid #242424;border-radius:14px;">
-                      <tr>
-                        <td align="center" style="padding:16px;">
-                          <img src="cid:qr-image" alt="QR Bee Concert Club"
-                               width="260" height="260"
-                               style="display:block;width:260px;height:260px;border-radius:16px;border:1px solid #2b2b2b;background:#ffffff;padding:10px;" />
-                        </td>
-                      </tr>
-                    </table>
-
-                    <p style="margin:12px 0 0 0;font-size:12px;color:#bdbdbd;line-height:1.5;">
-                      *El QR es de un solo uso. Una vez escaneado, queda marcado como utilizado.
-                    </p>
-
-                    <!-- Rules -->
-                    <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="margin-top:16px;background:#141414;border:1px solid #242424;border-radius:14px;">
-                      <tr>
-                        <td style="padding:14px 14px;">
-                          <div style="font-size:13px;font-weight:900;color:#ffd400;">
-                            ¡Recuerda!
-                          </div>
-
-                          <div style="margin-top:10px;font-size:13px;line-height:1.6;color:#e6e6e6;">
-                            <div style="margin:0 0 8px 0;">
-                              • Ingreso con documento <b>FÍSICO OBLIGATORIO</b> ⚠️:<br/>
-                              <span style="color:#cfcfcf;">Nacionales:</span> Cédula / Licencia de conducir.<br/>
-                              <span style="color:#cfcfcf;">Extranjeros:</span> Pasaporte.
-                            </div>
-
-                            <div style="margin:0 0 8px 0;">
-                              • Está prohibido el ingreso de menores de edad 🚫.
-                            </div>
-
-                            <div style="margin:10px 0 0 0;color:#cfcfcf;">
-                              Recuerda presentarlo al ingresar.<br/>
-                              <b style="color:#ffd400;">⚠️: Tu reserva no garantiza el ingreso!</b> Recuerda cumplir las politicas.
-                            </div>
-
-                            <div style="margin-top:10px;color:#eaeaea;">
-                              Gracias por confiar en nosotros.
-                            </div>
-
-                            <div style="margin-top:10px;color:#eaeaea;">
-                              Atentamente,<br/>
-                              <b>Equipo de Bee Concert Club 🐝</b>
-                            </div>
-                          </div>
-                        </td>
-                      </tr>
-                    </table>
-
-                  </td>
-                </tr>
-
-                <!-- Footer -->
-                <tr>
-                  <td style="padding:14px 22px 18px 22px;">
-                    <div style="border-top:1px solid #242424;padding-top:12px;color:#9a9a9a;font-size:11px;line-height:1.5;text-align:center;">
-                      Desarrollado por <b style="color:#cfcfcf;">Nivusoftware SAS.</b> · <span style="color:#cfcfcf;">@nivu.soft</span>
-                    </div>
-                  </td>
-                </tr>
-
-              </table>
-            </td>
-          </tr>
-        </table>
-        """
-
-        try:
-            ReservationService._send_email_with_qr(
-                to_email=r.email,
-                subject=f"Tu invitación - {ev.name}",
-                html=html,
-                qr_png=qr_png,
-            )
-            r.email_sent_at = datetime.utcnow()
-            r.email_send_status = "sent"
-            r.email_error = None
-        except Exception as e:
-            r.email_send_status = "failed"
-            r.email_error = str(e)
-
-        db.session.commit()
-        return r
+        if status == ReservationStatus.waitlisted:
+            row.update(email_send_status=None)
+        row["status"] = status
+        publish_live(ev.id)
+        return Reservation(id=rid, **row)
 
     @staticmethod
     def serialize(r: Reservation) -> dict:
+        if r.status in NO_QR_STATUSES:
+            return {**r.to_dict(), "checkin_url": None, "qr_url": None}
         return {
             **r.to_dict(),
-            "checkin_url": ReservationService._checkin_url(r.reservation_code),
+            "checkin_url": ReservationService._checkin_url(r),
             "qr_url": f"/api/reservations/{r.id}/qr",
         }
 
     @staticmethod
-    def qr_png_for_reservation(reservation_id: int) -> bytes:
+    def row_serializer(event_id: int):
+        """
+        fn(fila de LIST_COLUMNS) → dict de ReservationSchema, para listados de un evento.
+        Prefijos de URL y clave de firma se resuelven una vez; fechas y Enum quedan
+        para el encoder (app.common.fastjson), igual que to_dict().
+        """
+        base = (current_app.config.get("PUBLIC_BASE_URL") or "").rstrip("/")
+        checkin_prefix = f"{base}/checkin/"
+        payload = checkin_token.payload_builder(event_id)
+
+        def dump(row) -> dict:
+            d = row._asdict()
+            if row.status in NO_QR_STATUSES:
+                d["checkin_url"] = d["qr_url"] = None
+            else:
+                d["checkin_url"] = checkin_prefix + payload(row.id, row.reservation_code)
+                d["qr_url"] = f"/api/reservations/{row.id}/qr"
+            return d
+
+        return dump
+
+    @staticmethod
+    def qr_asset_alias(reservation_id: int) -> str:
+        return f"reservations/{reservation_id}.png"
+
+    @staticmethod
+    def write_qr_asset(r: Reservation):
+        """
+        Deja el PNG en el directorio de assets (direccionado por contenido)
+        + alias por id para servirlo con X-Accel-Redirect.
+        """
+        checkin_url = ReservationService._checkin_url(r)
+        get_qr_cache().link_alias(
+            ReservationService.qr_asset_alias(r.id),
+            checkin_url,
+            profile="reservation",
+        )
+
+    @staticmethod
+    def qr_data_for_reservation(reservation_id: int) -> str:
         r: Reservation | None = db.session.get(Reservation, reservation_id)
-        if not r:
+        # en espera (sin cupo) o cancelada: no hay QR que sirva
+        if not r or r.status in NO_QR_STATUSES:
             raise ValueError("NOT_FOUND")
-        checkin_url = ReservationService._checkin_url(r.reservation_code)
+        return ReservationService._checkin_url(r)
+
+    @staticmethod
+    def qr_png_for_reservation(reservation_id: int) -> bytes:
+        checkin_url = ReservationService.qr_data_for_reservation(reservation_id)
         return ReservationService._qr_png_bytes(checkin_url)
 
     @staticmethod
-    def list_by_event(event_id: int) -> list[Reservation]:
-        ev = db.session.get(Event, event_id)
-        if not ev:
-            raise ValueError("EVENT_NOT_FOUND")
+    def encode_page_cursor(r) -> str:
+        # "<created_at en µs desde epoch>_<id>": opaco para el cliente
+        return f"{(r.created_at - datetime(1970, 1, 1)) // timedelta(microseconds=1)}_{r.id}"
 
-        return (
-            Reservation.query
-            .filter_by(event_id=event_id)
-            .order_by(Reservation.created_at.desc())
-            .all()
+    @staticmethod
+    def decode_page_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            us, rid = cursor.split("_")
+            return datetime(1970, 1, 1) + timedelta(microseconds=int(us)), int(rid)
+        except (AttributeError, ValueError, OverflowError):
+            raise ValueError("INVALID_CURSOR")
+
+    @staticmethod
+    def list_page(
+        event_id: int,
+        limit: int = 100,
+        cursor: str | None = None,
+        status: str | None = None,
+        checked_in: bool | None = None,
+        email_send_status: str | None = None,
+    ) -> tuple[list, str | None]:
+        """
+        Página ordenada por (created_at, id) DESC con keyset (índice event_id, created_at, id):
+        cada página cuesta lo mismo, sin OFFSET ni traer la lista entera.
+        Devuelve (filas de LIST_COLUMNS, cursor de la siguiente página o None).
+        """
+        stmt = select(*LIST_COLUMNS).where(Reservation.event_id == event_id)
+        if cursor:
+            created_at, rid = ReservationService.decode_page_cursor(cursor)
+            stmt = stmt.where(tuple_(Reservation.created_at, Reservation.id) < tuple_(created_at, rid))
+        if status:
+            stmt = stmt.where(Reservation.status == ReservationStatus(status))
+        if checked_in is not None:
+            stmt = stmt.where(Reservation.used_at.is_not(None) if checked_in else Reservation.used_at.is_(None))
+        if email_send_status:
+            stmt = stmt.where(Reservation.email_send_status == email_send_status)
+
+        rows = db.session.execute(
+            stmt.order_by(Reservation.created_at.desc(), Reservation.id.desc()).limit(limit + 1)
+        ).all()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, ReservationService.encode_page_cursor(rows[-1])
+        return rows, None
+
+    @staticmethod
+    def page_total(stats: dict, status: str | None, checked_in: bool | None) -> int:
+        """
+        Total de los filtros desde los contadores de event_stats (sin COUNT sobre reservations).
+        checked_in=True ⇔ status checked_in (solo se cancela lo que no entró).
+        """
+        by_status = {
+            "created": stats["reserved"] - stats["checked_in"],
+            "checked_in": stats["checked_in"],
+            "cancelled": stats["cancelled"],
+            "waitlisted": stats["waitlisted"],
+        }
+        if status is not None:
+            if checked_in is None or checked_in == (status == "checked_in"):
+                return by_status[status]
+            return 0
+
+        total = sum(by_status.values())
+        if checked_in is None:
+            return total
+        return by_status["checked_in"] if checked_in else total - by_status["checked_in"]
+
+    @staticmethod
+    def promote_waitlist(event_id: int, slots: int | None = 1) -> list[int]:
+        """
+        Pasa los primeros `slots` (None = todos) de la lista de espera a created y encola sus invitaciones.
+        No hace commit: corre dentro de la transacción de quien libera el cupo, con la fila
+        del evento ya lockeada (_lock_event / update de capacity) para ver los waitlisted recién commiteados.
+        SKIP LOCKED: no espera por filas que otra transacción está tocando (ej. cancelando).
+        """
+        now = datetime.utcnow()
+        next_ids = (
+            select(Reservation.id)
+            .where(Reservation.event_id == event_id)
+            .where(Reservation.status == ReservationStatus.waitlisted)
+            .order_by(Reservation.id)
+            .limit(slots)
+            .with_for_update(skip_locked=True)
+        )
+        promoted = list(db.session.execute(
+            update(Reservation)
+            .where(Reservation.id.in_(next_ids.scalar_subquery()))
+            .values(status=ReservationStatus.created, email_send_status="queued", email_error=None)
+            .returning(Reservation.id)
+        ).scalars())
+
+        if promoted:
+            db.session.execute(
+                ReservationService._queue_invitation(Reservation.id, now, Reservation.id.in_(promoted))
+            )
+            EventStatsService.bump(event_id, reserved=len(promoted), waitlisted=-len(promoted))
+        return promoted
+
+    @staticmethod
+    def cancel(reservation_id: int) -> tuple[Reservation, int | None]:
+        """
+        Cancela una reserva (created o waitlisted) en una sola transacción.
+        Si liberaba un cupo, el cupo pasa al siguiente en espera (reserved_count no cambia);
+        si no hay nadie esperando se devuelve al contador del evento.
+        Devuelve (reserva, id del promovido o None).
+        """
+        row = db.session.execute(
+            select(Reservation.event_id, Reservation.status)
+            .where(Reservation.id == reservation_id)
+            .with_for_update()
+        ).first()
+        if not row:
+            raise ValueError("NOT_FOUND")
+
+        event_id, prev_status = row
+        if prev_status not in (ReservationStatus.created, ReservationStatus.waitlisted):
+            db.session.rollback()
+            raise ValueError("CANNOT_CANCEL")
+
+        db.session.execute(
+            update(Reservation)
+            .where(Reservation.id == reservation_id)
+            .values(status=ReservationStatus.cancelled)
         )
 
+        # orden de locks igual que create_public_reservation: events → event_stats (bump al final)
+        promoted_id = None
+        if prev_status == ReservationStatus.created:
+            # la lista de espera se mira con el lock del evento: un create que decidió
+            # "lleno" ya commiteó su waitlisted (se promueve) o espera y ve el cupo libre
+            ReservationService._lock_event(event_id)
+            promoted = ReservationService.promote_waitlist(event_id)
+            if promoted:
+                promoted_id = promoted[0]
+            else:
+                db.session.execute(
+                    update(Event)
+                    .where(Event.id == event_id)
+                    .where(Event.capacity.is_not(None))
+                    .where(Event.reserved_count > 0)
+                    .values(reserved_count=Event.reserved_count - 1, updated_at=Event.updated_at)
+                )
+            EventStatsService.bump(event_id, reserved=-1, cancelled=1)
+        else:
+            EventStatsService.bump(event_id, waitlisted=-1, cancelled=1)
+
+        db.session.commit()
+        publish_live(event_id)
+        return db.session.get(Reservation, reservation_id), promoted_id
+
     @staticmethod
     def checkin_atomic(
-        reservation_code: str, scanned_by_user_id: int | None
+        reservation_code: str, scanned_by_user_id: int | None, event_id: int | None = None
     ) -> tuple[bool, Reservation | None, str]:
         """
-        Solo 1 uso:
-        UPDATE reservations
-        SET used_at=now, status='checked_in'
+        Solo 1 uso, en un solo statement (con el estado del evento adentro):
+        UPDATE reservations SET used_at=now, status='checked_in', ...
+        FROM events
         WHERE reservation_code=:code AND used_at IS NULL AND status='created'
+          AND events.id = reservations.event_id
+          AND events.end_at > now AND events.status NOT IN ('ended', 'cancelled')
+        RETURNING ...
+        Si no actualizó nada, una sola lectura (reserva + evento) explica por qué.
+        QR firmado: firma y evento (event_id = puerta que escanea) se validan antes
+        de cualquier consulta, y la reserva se busca por id.
         """
+        if checkin_token.is_signed(reservation_code):
+            try:
+                signed_event_id, reservation_id = checkin_token.verify(reservation_code)
+            except ValueError as e:
+                return False, None, str(e)
+            if event_id is not None and signed_event_id != event_id:
+                return False, None, "WRONG_EVENT"
+            match = (Reservation.id == reservation_id, Reservation.event_id == signed_event_id)
+        else:
+            # base32 o hex legacy; cualquier otra cosa no puede existir
+            code = canonical(reservation_code, "hex")
+            if code is None:
+                return False, None, "NOT_FOUND"
+            match = (Reservation.reservation_code == code,)
+
         now = datetime.utcnow()
 
-        r = Reservation.query.filter_by(reservation_code=reservation_code).first()
-        if not r:
-            return False, None, "NOT_FOUND"
+        stmt = (
+            update(Reservation)
+            .where(*match)
+            .where(Reservation.used_at.is_(None))
+            .where(Reservation.status == ReservationStatus.created)
+            .where(Reservation.event_id == Event.id)
+            .where(Event.end_at > now)
+            .where(Event.status.not_in([EventStatus.ended, EventStatus.cancelled]))
+            .values(
+                used_at=now,
+                status=ReservationStatus.checked_in,
+                scanned_by_user_id=scanned_by_user_id,
+                scan_count=Reservation.scan_count + 1,
+                last_scan_at=now,
+            )
+            .returning(Reservation.id, Reservation.event_id, Reservation.first_name, Reservation.last_name)
+        )
+        if event_id is not None:
+            stmt = stmt.where(Reservation.event_id == event_id)
 
-        ev = db.session.get(Event, r.event_id)
-        if not ev:
-            return False, r, "EVENT_NOT_FOUND"
+        row = db.session.execute(stmt).first()
+        if row is not None:
+            EventStatsService.bump(row.event_id, checked_in=1)
+        db.session.commit()
 
-        if ev.end_at <= now:
-            return False, r, "EVENT_ENDED"
+        if row is not None:
+            publish_live(row.event_id)
+            return True, Reservation(
+                id=row.id,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                status=ReservationStatus.checked_in,
+                used_at=now,
+            ), "OK"
+
+        found = db.session.execute(
+            select(
+                Reservation.id,
+                Reservation.event_id,
+                Reservation.first_name,
+                Reservation.last_name,
+                Reservation.status,
+                Reservation.used_at,
+                Event.end_at,
+                Event.status.label("event_status"),
+            )
+            .join(Event, Event.id == Reservation.event_id)
+            .where(*match)
+        ).first()
+        if found is None:
+            return False, None, "NOT_FOUND"
+        if event_id is not None and found.event_id != event_id:
+            return False, None, "WRONG_EVENT"
 
-        if getattr(ev, "status", None) and ev.status.value in ("ended", "cancelled"):
+        r = Reservation(
+            id=found.id,
+            first_name=found.first_name,
+            last_name=found.last_name,
+            status=found.status,
+            used_at=found.used_at,
+        )
+        if found.end_at <= now:
+            return False, r, "EVENT_ENDED"
+        if found.event_status in (EventStatus.ended, EventStatus.cancelled):
             return False, r, "EVENT_NOT_AVAILABLE"
+        return False, r, "ALREADY_USED"
+
+
+    @staticmethod
+    def _naive_utc(dt: datetime | None, now: datetime) -> datetime:
+        if dt is None:
+            return now
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        # reloj del dispositivo adelantado → no se aceptan escaneos "del futuro"
+        return min(dt, now)
+
+    @staticmethod
+    def _code_in(codes: list[str]):
+        # Postgres: = ANY(:codes) con un solo parámetro array (mismo SQL para cualquier tamaño de lote)
+        if db.session.get_bind().dialect.name == "postgresql":
+            return Reservation.reservation_code == any_(literal(codes, ARRAY(Reservation.reservation_code.type)))
+        return Reservation.reservation_code.in_(codes)
+
+    @staticmethod
+    def _code_case(values: dict):
+        # CASE reservation_code WHEN ... : literales con el tipo de la columna (se bindean como binario)
+        col = Reservation.reservation_code
+        return case({literal(code, col.type): v for code, v in values.items()}, value=col)
+
+    @staticmethod
+    def _resolve_codes(raw_codes, event_id: int | None) -> tuple[dict[str, str], dict[str, str]]:
+        """
+        Lo escaneado → reservation_code canónico (base32).
+        Legacy (hex) se convierte sin DB; QR firmados con una sola lectura por id.
+        Devuelve (escaneado → reservation_code, escaneado → resultado de rechazo).
+        Firma inválida / otro evento / código mal formado se rechazan sin tocar la DB.
+        """
+        resolved: dict[str, str] = {}
+        rejected: dict[str, str] = {}
+        signed: dict[str, tuple[int, int]] = {}
+        for raw in raw_codes:
+            if not checkin_token.is_signed(raw):
+                code = canonical(raw, "hex")
+                if code is None:
+                    rejected[raw] = "NOT_FOUND"
+                else:
+                    resolved[raw] = code
+                continue
+            try:
+                signed_event_id, reservation_id = checkin_token.verify(raw)
+            except ValueError as e:
+                rejected[raw] = str(e)
+                continue
+            if event_id is not None and signed_event_id != event_id:
+                rejected[raw] = "WRONG_EVENT"
+                continue
+            signed[raw] = (signed_event_id, reservation_id)
+
+        if signed:
+            rows = db.session.execute(
+                select(Reservation.id, Reservation.event_id, Reservation.reservation_code)
+                .where(Reservation.id.in_({rid for _, rid in signed.values()}))
+            )
+            by_id = {row.id: row for row in rows}
+            for raw, (signed_event_id, reservation_id) in signed.items():
+                row = by_id.get(reservation_id)
+                if row is not None and row.event_id == signed_event_id:
+                    resolved[raw] = row.reservation_code
+                else:
+                    rejected[raw] = "NOT_FOUND"
+        return resolved, rejected
+
+    @staticmethod
+    def checkin_batch(
+        entries: list[dict], scanned_by_user_id: int | None, event_id: int | None = None
+    ) -> list[dict]:
+        """
+        Check-in de un lote (escaneos offline / encolados) en una sola transacción:
+        - un UPDATE ... FROM events con CASE por código para used_at (hora del escaneo)
+        - un SELECT para clasificar los que no entraron
+        entries = [{reservation_code, scanned_at?, device_id?}, ...]
+        reservation_code puede ser base32, el hex legacy o el QR firmado (r1.…).
+        Con event_id solo se aceptan códigos de ese evento.
+        Devuelve un resultado por entrada, en el mismo orden.
+        """
+        now = datetime.utcnow()
+        resolved, rejected = ReservationService._resolve_codes(
+            {e["reservation_code"] for e in entries}, event_id
+        )
+
+        # mismo código repetido en el lote → cuenta el escaneo más temprano (no el primero del lote)
+        scanned: dict[str, datetime] = {}
+        devices: dict[str, str | None] = {}
+        earliest: dict[str, int] = {}
+        for i, e in enumerate(entries):
+            if e["reservation_code"] in rejected:
+                continue
+            code = resolved[e["reservation_code"]]
+            at = ReservationService._naive_utc(e.get("scanned_at"), now)
+            if code not in scanned or at < scanned[code]:
+                scanned[code] = at
+                devices[code] = e.get("device_id")
+                earliest[code] = i
+
+        if not scanned:
+            # todo el lote rechazado por firma / evento
+            return [
+                {"reservation_code": e["reservation_code"], "result": rejected[e["reservation_code"]], "reservation_id": None, "used_at": None}
+                for e in entries
+            ]
+
+        codes = list(scanned)
+        used_at = ReservationService._code_case(scanned)
+        device_ids = {code: d for code, d in devices.items() if d}
 
         stmt = (
             update(Reservation)
-            .where(Reservation.reservation_code == reservation_code)
+            .where(ReservationService._code_in(codes))
             .where(Reservation.used_at.is_(None))
             .where(Reservation.status == ReservationStatus.created)
+            .where(Reservation.event_id == Event.id)
+            .where(Event.end_at > used_at)
+            .where(Event.status.not_in([EventStatus.ended, EventStatus.cancelled]))
             .values(
-                used_at=now,
+                used_at=used_at,
                 status=ReservationStatus.checked_in,
                 scanned_by_user_id=scanned_by_user_id,
                 scan_count=Reservation.scan_count + 1,
                 last_scan_at=now,
+                checkin_device_id=ReservationService._code_case(device_ids) if device_ids else None,
             )
+            .returning(Reservation.reservation_code, Reservation.id, Reservation.event_id)
         )
+        if event_id is not None:
+            stmt = stmt.where(Reservation.event_id == event_id)
+
+        ok = {}
+        per_event: dict[int, int] = {}
+        for code, rid, eid in db.session.execute(stmt):
+            ok[code] = rid
+            per_event[eid] = per_event.get(eid, 0) + 1
+        for eid, n in per_event.items():
+            EventStatsService.bump(eid, checked_in=n)
+
+        others = {}
+        rest = [c for c in codes if c not in ok]
+        if rest:
+            rows = db.session.execute(
+                select(
+                    Reservation.reservation_code,
+                    Reservation.id,
+                    Reservation.event_id,
+                    Reservation.used_at,
+                    Event.end_at,
+                    Event.status.label("event_status"),
+                )
+                .join(Event, Event.id == Reservation.event_id)
+                .where(ReservationService._code_in(rest))
+            )
+            others = {row.reservation_code: row for row in rows}
 
-        result = db.session.execute(stmt)
         db.session.commit()
-
-        if result.rowcount == 1:
-            updated = Reservation.query.filter_by(reservation_code=reservation_code).first()
-            return True, updated, "OK"
-
-        r = Reservation.query.filter_by(reservation_code=reservation_code).first()
-        return False, r, "ALREADY_USED"
+        publish_live(*per_event)
+
+        results = []
+        for i, e in enumerate(entries):
+            raw = e["reservation_code"]
+            if raw in rejected:
+                results.append({"reservation_code": raw, "result": rejected[raw], "reservation_id": None, "used_at": None})
+                continue
+
+            code = resolved[raw]
+            if code in ok:
+                # el mismo QR varias veces en el lote: los demás escaneos ya son re-escaneo
+                result = "OK" if earliest[code] == i else "ALREADY_USED"
+                results.append({"reservation_code": raw, "result": result, "reservation_id": ok[code], "used_at": scanned[code]})
+                continue
+
+            row = others.get(code)
+            if row is None:
+                result = "NOT_FOUND"
+            elif event_id is not None and row.event_id != event_id:
+                # igual que checkin_atomic (sin datos de la reserva del otro evento)
+                result = "WRONG_EVENT"
+            elif row.end_at <= scanned[code]:
+                result = "EVENT_ENDED"
+            elif row.event_status in (EventStatus.ended, EventStatus.cancelled):
+                result = "EVENT_NOT_AVAILABLE"
+            else:
+                result = "ALREADY_USED"
+
+            found = result not in ("NOT_FOUND", "WRONG_EVENT")
+            results.append({
+                "reservation_code": raw,
+                "result": result,
+                "reservation_id": row.id if found else None,
+                "used_at": row.used_at if found else None,
+            })
+        return results
@@ -0,0 +1,86 @@
+"""
+Ráfaga de reservas concurrentes contra un evento con cupo: nunca debe sobrevenderse
+(el excedente queda en lista de espera).
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_capacity.py [--requests 500] [--capacity 100]
+
+Sin DATABASE_URL usa un sqlite temporal (serializa escrituras, sirve como smoke test).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--capacity", type=int, default=100)
+    ap.add_argument("--threads", type=int, default=64)
+    args = ap.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}?timeout=30"
+
+    from sqlalchemy import func, select
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Event, EventStatus, Reservation, ReservationStatus
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        ev = Event(
+            name="Bench capacity",
+            start_at=datetime.utcnow() + timedelta(days=1),
+            end_at=datetime.utcnow() + timedelta(days=2),
+            status=EventStatus.active,
+            public_code=os.urandom(16).hex(),
+            capacity=args.capacity,
+            reserved_count=0,
+        )
+        db.session.add(ev)
+        db.session.commit()
+        event_id, public_code = ev.id, ev.public_code
+
+    def one(i: int) -> str:
+        client = app.test_client()
+        resp = client.post(
+            f"/api/reservations/public/{public_code}",
+            json={"first_name": "Bench", "last_name": f"G{i}", "email": f"g{i}@example.com", "phone": "0999999999"},
+        )
+        if resp.status_code != 201:
+            return str(resp.status_code)
+        return resp.get_json()["status"]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        statuses = Counter(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - t0
+
+    with app.app_context():
+        rows = db.session.execute(
+            select(func.count(Reservation.id))
+            .where(Reservation.event_id == event_id)
+            .where(Reservation.status == ReservationStatus.created)
+        ).scalar_one()
+        reserved = db.session.get(Event, event_id).reserved_count
+
+    print(f"responses: {dict(statuses)} in {elapsed:.2f}s")
+    print(f"capacity={args.capacity} reserved_count={reserved} confirmed={rows}")
+    if rows > args.capacity or reserved != rows:
+        print("OVERSOLD / COUNTER MISMATCH")
+        sys.exit(1)
+    print("OK: no oversell")
+
+
+if __name__ == "__main__":
+    main()
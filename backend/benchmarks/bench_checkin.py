@@ -0,0 +1,150 @@
+"""
+Check-ins por segundo: implementación anterior (SELECT + get(Event) + UPDATE + re-SELECT)
+contra el UPDATE ... FROM events ... RETURNING actual.
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_checkin.py [--n 2000] [--threads 4]
+
+Sin DATABASE_URL usa un sqlite temporal. --threads simula varios de seguridad escaneando a la vez.
+Cada escaneo válido va seguido de un re-escaneo (ALREADY_USED), como pasa en la puerta.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def legacy_checkin(reservation_code: str, scanned_by_user_id: int | None):
+    """
+    checkin_atomic antes del cambio (hasta 5 idas a la DB por escaneo).
+    """
+    from sqlalchemy import update
+
+    from app.extensions import db
+    from app.models import Event, Reservation, ReservationStatus
+
+    now = datetime.utcnow()
+
+    r = Reservation.query.filter_by(reservation_code=reservation_code).first()
+    if not r:
+        return False, None, "NOT_FOUND"
+
+    ev = db.session.get(Event, r.event_id)
+    if not ev:
+        return False, r, "EVENT_NOT_FOUND"
+    if ev.end_at <= now:
+        return False, r, "EVENT_ENDED"
+    if getattr(ev, "status", None) and ev.status.value in ("ended", "cancelled"):
+        return False, r, "EVENT_NOT_AVAILABLE"
+
+    result = db.session.execute(
+        update(Reservation)
+        .where(Reservation.reservation_code == reservation_code)
+        .where(Reservation.used_at.is_(None))
+        .where(Reservation.status == ReservationStatus.created)
+        .values(
+            used_at=now,
+            status=ReservationStatus.checked_in,
+            scanned_by_user_id=scanned_by_user_id,
+            scan_count=Reservation.scan_count + 1,
+            last_scan_at=now,
+        )
+    )
+    db.session.commit()
+
+    if result.rowcount == 1:
+        return True, Reservation.query.filter_by(reservation_code=reservation_code).first(), "OK"
+    return False, Reservation.query.filter_by(reservation_code=reservation_code).first(), "ALREADY_USED"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000, help="reservas por implementación")
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}?timeout=30"
+
+    from sqlalchemy import event, insert
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Event, EventStatus, Reservation, ReservationStatus
+    from app.services.reservation_service import ReservationService
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        ev = Event(
+            name="Bench checkin",
+            start_at=datetime.utcnow() - timedelta(hours=1),
+            end_at=datetime.utcnow() + timedelta(days=1),
+            status=EventStatus.active,
+            public_code=os.urandom(16).hex(),
+        )
+        db.session.add(ev)
+        db.session.commit()
+        event_id = ev.id
+
+        counts = {"statements": 0}
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def _count_stmt(*_):
+            counts["statements"] += 1
+
+    def seed() -> list[str]:
+        codes = [os.urandom(16).hex() for _ in range(args.n)]
+        now = datetime.utcnow()
+        with app.app_context():
+            db.session.execute(insert(Reservation), [
+                {
+                    "event_id": event_id,
+                    "first_name": "Bench",
+                    "last_name": f"G{i}",
+                    "email": f"g{i}@example.com",
+                    "phone": "0999999999",
+                    "reservation_code": code,
+                    "status": ReservationStatus.created,
+                    "scan_count": 0,
+                    "created_at": now,
+                }
+                for i, code in enumerate(codes)
+            ])
+            db.session.commit()
+        return codes
+
+    def run(name: str, fn):
+        codes = seed()
+        # escaneo + re-escaneo del mismo QR
+        scans = [c for code in codes for c in (code, code)]
+
+        def one(code: str) -> str:
+            with app.app_context():
+                return fn(code, None)[2]
+
+        counts["statements"] = 0
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(one, scans))
+        elapsed = time.perf_counter() - t0
+
+        ok = results.count("OK")
+        assert ok == len(codes), f"{name}: {ok} OK de {len(codes)}"
+        print(f"{name:8s} {len(scans) / elapsed:8.0f} scans/s  "
+              f"{counts['statements'] / len(scans):.2f} statements/scan  "
+              f"({len(scans)} scans, {args.threads} threads, {elapsed:.2f}s)")
+
+    with app.app_context():
+        print(f"dialect: {db.engine.dialect.name}")
+    run("legacy", legacy_checkin)
+    run("current", ReservationService.checkin_atomic)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Encode de las respuestas JSON: DefaultJSONProvider de Flask contra FastJSONProvider (orjson).
+
+    python benchmarks/bench_json_provider.py [--events 200] [--reservations 500] [--repeat 200]
+
+Arma payloads ya dumpeados con EventListSchema y ReservationListSchema (lo que le llega
+a jsonify desde flask-smorest) y mide provider.response() — dumps + Response — por payload.
+No necesita base de datos.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _per_call(fn, repeat: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=200)
+    ap.add_argument("--reservations", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from flask.json.provider import DefaultJSONProvider
+
+    from app import create_app
+    from app.common.fastjson import orjson
+    from app.common.json_provider import FastJSONProvider
+    from app.schemas.event_schemas import EventListSchema
+    from app.schemas.reservation_schemas import ReservationListSchema
+
+    app = create_app()
+    now = datetime.utcnow()
+
+    events = EventListSchema().dump({"items": [
+        {
+            "id": i,
+            "name": f"Evento {i} · Bee Concert Club",
+            "description": "Noche de bandas en vivo, barra abierta hasta las 2.",
+            "start_at": (now + timedelta(days=i)).isoformat(),
+            "end_at": (now + timedelta(days=i, hours=6)).isoformat(),
+            "status": "active",
+            "public_code": os.urandom(16).hex(),
+            "capacity": 500,
+            "reserved_count": i,
+            "public_url": f"https://example.com/evento/{i}",
+            "qr_url": f"/api/events/{i}/qr",
+        }
+        for i in range(args.events)
+    ]})
+    reservations = ReservationListSchema().dump({
+        "total": args.reservations,
+        "items": [
+            {
+                "id": i,
+                "event_id": 1,
+                "first_name": "José",
+                "last_name": f"Pérez {i}",
+                "email": f"guest{i}@example.com",
+                "phone": "+54 9 11 5555-1234",
+                "instagram": "@guest" if i % 3 else None,
+                "reservation_code": "MYW35VDUGCVJI3YJUI6VIPIHG4",
+                "status": "created",
+                "used_at": None,
+                "scan_count": 0,
+                "last_scan_at": None,
+                "email_sent_at": now.isoformat(),
+                "email_send_status": "sent",
+                "created_at": (now - timedelta(seconds=i)).isoformat(),
+                "checkin_url": "https://example.com/checkin/MYW35VDUGCVJI3YJUI6VIPIHG4",
+                "qr_url": f"/api/reservations/{i}/qr",
+            }
+            for i in range(args.reservations)
+        ],
+        "next_cursor": "1760000000000000_1",
+        "stats": {"event_id": 1, "capacity": None, "reserved": args.reservations, "checked_in": 0,
+                  "cancelled": 0, "waitlisted": 0, "updated_at": now},
+    })
+
+    providers = {"flask default": DefaultJSONProvider(app), "FastJSONProvider": FastJSONProvider(app)}
+    print(f"encoder: {'orjson' if orjson else 'json (orjson no instalado)'}, repeat: {args.repeat}")
+    with app.app_context():
+        for label, payload in (
+            (f"EventListSchema ({args.events} eventos)", events),
+            (f"ReservationListSchema ({args.reservations} reservas)", reservations),
+        ):
+            bodies, times = {}, {}
+            for name, provider in providers.items():
+                times[name] = _per_call(lambda: provider.response(payload), args.repeat)
+                bodies[name] = provider.loads(provider.response(payload).get_data())
+            assert bodies["flask default"] == bodies["FastJSONProvider"], "salida distinta"
+
+            base, fast = times["flask default"], times["FastJSONProvider"]
+            print(f"{label}:")
+            print(f"  flask default     {base * 1000:7.2f} ms")
+            print(f"  FastJSONProvider  {fast * 1000:7.2f} ms  ({base / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
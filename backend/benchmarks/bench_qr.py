@@ -0,0 +1,61 @@
+"""
+Benchmark de QR: camino anterior (qrcode.make + PNG RGB/auto-fit) vs motor nuevo.
+
+    python benchmarks/bench_qr.py [--n 300] [--processes 4]
+
+Mide bytes y milisegundos por QR para una URL de check-in típica.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import qrcode  # noqa: E402
+
+from app.services import qr_render  # noqa: E402
+
+URL = "https://beeconcertclub.com/checkin/3f9a6c0e2b7d4a1f8e5c9b0a6d2f4e71"
+
+
+def legacy(data: str) -> bytes:
+    img = qrcode.make(data)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def bench(label: str, fn, n: int):
+    out = fn(URL)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(URL)
+    ms = (time.perf_counter() - t0) * 1000 / n
+    print(f"{label:<28} {len(out):>7} bytes  {ms:>8.3f} ms/qr")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=300)
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = ap.parse_args()
+
+    bench("legacy qrcode.make png", legacy, args.n)
+    bench("engine png (default size)", lambda d: qr_render.render(d, "png", None, "reservation"), args.n)
+    bench("engine png size=256", lambda d: qr_render.render(d, "png", 256, "reservation"), args.n)
+    bench("engine svg", lambda d: qr_render.render(d, "svg", None, "reservation"), args.n)
+
+    # bulk: distintos códigos, en el hilo vs en pool de procesos
+    items = [(f"{URL[:-4]}{i:04x}", "png", None, "reservation") for i in range(args.n)]
+    for procs in (0, args.processes):
+        qr_render.render_many(items[:8], processes=procs)  # warm-up del pool
+        t0 = time.perf_counter()
+        qr_render.render_many(items, processes=procs)
+        ms = (time.perf_counter() - t0) * 1000 / len(items)
+        print(f"{'bulk png processes=' + str(procs):<28} {'':>7}        {ms:>8.3f} ms/qr")
+
+
+if __name__ == "__main__":
+    main()
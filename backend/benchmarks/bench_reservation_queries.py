@@ -0,0 +1,85 @@
+"""
+Cuenta statements SQL y commits por POST /api/reservations/public/<public_code>.
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_reservation_queries.py [--n 200] [--capacity N]
+
+En Postgres la reserva es un solo statement (cupo + reserva + outbox + event_stats +
+términos de búsqueda en un CTE) y un commit. Sin DATABASE_URL usa un sqlite temporal,
+donde cada paso es un statement aparte.
+--capacity: evento con límite (reclama cupo; pasado el límite las reservas van a la lista de espera).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200)
+    ap.add_argument("--capacity", type=int, default=None)
+    args = ap.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}"
+
+    from sqlalchemy import event
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Event, EventStatus
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        ev = Event(
+            name="Bench",
+            start_at=datetime.utcnow() + timedelta(days=1),
+            end_at=datetime.utcnow() + timedelta(days=2),
+            status=EventStatus.active,
+            public_code=os.urandom(16).hex(),
+            capacity=args.capacity,
+            reserved_count=0,
+        )
+        db.session.add(ev)
+        db.session.commit()
+        public_code = ev.public_code
+
+        counts = {"statements": 0, "commits": 0}
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def _count_stmt(*_):
+            counts["statements"] += 1
+
+        @event.listens_for(db.engine, "commit")
+        def _count_commit(*_):
+            counts["commits"] += 1
+
+        client = app.test_client()
+        payload = {"first_name": "Bench", "last_name": "Guest", "email": "bench@example.com", "phone": "0999999999"}
+
+        # primer request: llena el cache de eventos
+        client.post(f"/api/reservations/public/{public_code}", json=payload)
+        first = dict(counts)
+
+        counts.update(statements=0, commits=0)
+        t0 = time.perf_counter()
+        for _ in range(args.n):
+            resp = client.post(f"/api/reservations/public/{public_code}", json=payload)
+            assert resp.status_code == 201, resp.get_json()
+        elapsed = time.perf_counter() - t0
+
+        print(f"dialect: {db.engine.dialect.name}, capacity: {args.capacity}")
+        print(f"cold request:  {first['statements']} statements, {first['commits']} commits")
+        print(f"warm requests: {counts['statements'] / args.n:.2f} statements/req, "
+              f"{counts['commits'] / args.n:.2f} commits/req, "
+              f"{elapsed * 1000 / args.n:.2f} ms/req")
+
+
+if __name__ == "__main__":
+    main()
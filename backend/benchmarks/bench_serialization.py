@@ -0,0 +1,113 @@
+"""
+Serialización de un listado de reservas: camino ORM + to_dict() + ReservationListSchema.dump() + jsonify
+contra filas Core + row_serializer() + fastjson.
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_serialization.py [--rows 10000] [--repeat 5]
+
+Sin DATABASE_URL usa un sqlite temporal. Mide query + serialización + encode JSON
+(lo que hace la vista, sin HTTP) y verifica que los dos caminos den el mismo JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _timed(fn, repeat: int) -> tuple[float, float, object]:
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), statistics.median(times), out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}"
+
+    from flask import jsonify
+    from sqlalchemy import insert, select
+
+    from app import create_app
+    from app.common import fastjson
+    from app.extensions import db
+    from app.models import Event, EventStatus, Reservation, ReservationStatus
+    from app.models.compact_code import new_code
+    from app.schemas.reservation_schemas import ReservationListSchema
+    from app.services.reservation_service import ReservationService
+
+    app = create_app()
+    with app.test_request_context():
+        db.create_all()
+        now = datetime.utcnow()
+        ev = Event(
+            name="Bench",
+            start_at=now + timedelta(days=1),
+            end_at=now + timedelta(days=2),
+            status=EventStatus.active,
+            public_code=os.urandom(16).hex(),
+        )
+        db.session.add(ev)
+        db.session.commit()
+        event_id = ev.id
+
+        db.session.execute(insert(Reservation), [
+            {
+                "event_id": event_id,
+                "first_name": f"Guest{i}",
+                "last_name": "Benchmark",
+                "email": f"guest{i}@example.com",
+                "phone": "0999999999",
+                "instagram": "@bench" if i % 3 else None,
+                "reservation_code": new_code(),
+                "status": ReservationStatus.checked_in if i % 4 == 0 else ReservationStatus.created,
+                "used_at": now if i % 4 == 0 else None,
+                "scan_count": 1 if i % 4 == 0 else 0,
+                "email_send_status": "sent",
+                "email_sent_at": now,
+                "created_at": now - timedelta(seconds=i),
+            }
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        order = (Reservation.created_at.desc(), Reservation.id.desc())
+
+        def orm_path() -> bytes:
+            db.session.expunge_all()
+            items = db.session.execute(
+                select(Reservation).where(Reservation.event_id == event_id).order_by(*order)
+            ).scalars().all()
+            payload = {"items": [ReservationService.serialize(r) for r in items], "next_cursor": None}
+            return jsonify(ReservationListSchema().dump(payload)).get_data()
+
+        def fast_path() -> bytes:
+            rows, _ = ReservationService.list_page(event_id, limit=args.rows)
+            dump = ReservationService.row_serializer(event_id)
+            return fastjson.json_response({"items": [dump(row) for row in rows], "next_cursor": None}).get_data()
+
+        orm_best, orm_med, orm_body = _timed(orm_path, args.repeat)
+        fast_best, fast_med, fast_body = _timed(fast_path, args.repeat)
+        assert json.loads(orm_body) == json.loads(fast_body), "los dos caminos no dan el mismo JSON"
+
+        print(f"dialect: {db.engine.dialect.name}, rows: {args.rows}, encoder: {'orjson' if fastjson.orjson else 'json'}")
+        print(f"orm + schema.dump + jsonify: best {orm_best * 1000:8.1f} ms  median {orm_med * 1000:8.1f} ms")
+        print(f"core rows + fastjson:        best {fast_best * 1000:8.1f} ms  median {fast_med * 1000:8.1f} ms")
+        print(f"speedup (best): {orm_best / fast_best:.1f}x, body {len(fast_body) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
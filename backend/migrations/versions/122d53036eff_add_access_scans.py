@@ -0,0 +1,47 @@
+"""add access_scans log and event_access_codes.scans_aggregated_through
+
+Revision ID: 122d53036eff
+Revises: 9497365f0698
+Create Date: 2026-10-18 18:14:39.208871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '122d53036eff'
+down_revision = '9497365f0698'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('access_scans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('access_code_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('scanned_at', sa.DateTime(), nullable=False),
+    sa.Column('scanned_by_user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['access_code_id'], ['event_access_codes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['scanned_by_user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('access_scans', schema=None) as batch_op:
+        batch_op.create_index('ix_access_scans_access_code_id_id', ['access_code_id', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_access_scans_event_id'), ['event_id'], unique=False)
+
+    with op.batch_alter_table('event_access_codes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scans_aggregated_through', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('event_access_codes', schema=None) as batch_op:
+        batch_op.drop_column('scans_aggregated_through')
+
+    with op.batch_alter_table('access_scans', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_access_scans_event_id'))
+        batch_op.drop_index('ix_access_scans_access_code_id_id')
+
+    op.drop_table('access_scans')
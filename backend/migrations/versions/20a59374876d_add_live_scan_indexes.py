@@ -0,0 +1,35 @@
+"""add (event_id, used_at) / (event_id, scanned_at) indexes for live scans per minute
+
+Revision ID: 20a59374876d
+Revises: 32b338fbe21f
+Create Date: 2026-10-18 22:41:07.518263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20a59374876d'
+down_revision = '32b338fbe21f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_reservations_event_used_at', ['event_id', 'used_at'], unique=False)
+
+    # (event_id, scanned_at) reemplaza al índice solo por event_id (mismo prefijo, un índice menos por INSERT)
+    with op.batch_alter_table('access_scans', schema=None) as batch_op:
+        batch_op.create_index('ix_access_scans_event_id_scanned_at', ['event_id', 'scanned_at'], unique=False)
+        batch_op.drop_index('ix_access_scans_event_id')
+
+
+def downgrade():
+    with op.batch_alter_table('access_scans', schema=None) as batch_op:
+        batch_op.create_index('ix_access_scans_event_id', ['event_id'], unique=False)
+        batch_op.drop_index('ix_access_scans_event_id_scanned_at')
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_event_used_at')
@@ -0,0 +1,148 @@
+"""add guest search (search_key + trigram / prefix index)
+
+Revision ID: 32b338fbe21f
+Revises: 85bc9b9c5726
+Create Date: 2026-10-18 20:58:31.204617
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '32b338fbe21f'
+down_revision = '85bc9b9c5726'
+branch_labels = None
+depends_on = None
+
+
+# copia congelada de app/common/search_text.py (la migración no depende del código de la app)
+_NON_WORD = re.compile(r"[^a-z0-9@._+-]+")
+_NON_DIGIT = re.compile(r"\D+")
+
+
+def _normalize(text):
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def _fields(first_name, last_name, email, phone, instagram):
+    return (
+        _normalize(first_name),
+        _normalize(last_name),
+        _normalize(email),
+        _NON_DIGIT.sub('', phone or ''),
+        _normalize(instagram).lstrip('@'),
+    )
+
+
+def _terms(first, last, mail, phone, ig):
+    terms = set(first.split()) | set(last.split())
+    mail = mail.replace(' ', '')
+    if mail:
+        terms.update((mail, mail.split('@', 1)[0]))
+    terms.update(phone[-n:] for n in (10, 8, 4) if len(phone) > n)
+    terms.update(t for t in (phone, ig) if t)
+    return {t[:120] for t in terms if t}
+
+
+def _enable_trgm(conn):
+    # CREATE EXTENSION necesita permisos: si falla queda el índice de prefijos
+    if conn.dialect.name != 'postgresql':
+        return False
+    try:
+        with conn.begin_nested():
+            conn.execute(sa.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    except sa.exc.DBAPIError:
+        return False
+    return True
+
+
+def upgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_key', sa.String(length=400), nullable=True))
+
+    op.create_table(
+        'reservation_search_terms',
+        sa.Column('reservation_id', sa.Integer(), nullable=False),
+        sa.Column('term', sa.String(length=120), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['reservation_id'], ['reservations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('reservation_id', 'term'),
+    )
+    with op.batch_alter_table('reservation_search_terms', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_reservation_search_terms_event_term',
+            ['event_id', 'term'],
+            unique=False,
+            postgresql_ops={'term': 'text_pattern_ops'},
+        )
+
+    conn = op.get_bind()
+    trigram = _enable_trgm(conn)
+
+    # backfill por lotes
+    r = sa.table(
+        'reservations',
+        sa.column('id', sa.Integer),
+        sa.column('event_id', sa.Integer),
+        sa.column('first_name', sa.String),
+        sa.column('last_name', sa.String),
+        sa.column('email', sa.String),
+        sa.column('phone', sa.String),
+        sa.column('instagram', sa.String),
+        sa.column('search_key', sa.String),
+    )
+    terms_t = sa.table(
+        'reservation_search_terms',
+        sa.column('reservation_id', sa.Integer),
+        sa.column('term', sa.String),
+        sa.column('event_id', sa.Integer),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(r.c.id, r.c.event_id, r.c.first_name, r.c.last_name, r.c.email, r.c.phone, r.c.instagram)
+            .where(r.c.id > last_id)
+            .order_by(r.c.id)
+            .limit(2000)
+        ).fetchall()
+        if not rows:
+            break
+
+        keys, terms = [], []
+        for row in rows:
+            fields = _fields(row.first_name, row.last_name, row.email, row.phone, row.instagram)
+            keys.append({'rid': row.id, 'key': ' '.join(f for f in fields if f)})
+            if not trigram:
+                terms.extend({'reservation_id': row.id, 'event_id': row.event_id, 'term': t} for t in _terms(*fields))
+
+        conn.execute(
+            sa.update(r).where(r.c.id == sa.bindparam('rid')).values(search_key=sa.bindparam('key')),
+            keys,
+        )
+        if terms:
+            conn.execute(sa.insert(terms_t), terms)
+        last_id = rows[-1].id
+
+    if trigram:
+        # CONCURRENTLY no corre dentro de la transacción de alembic
+        op.execute('CREATE INDEX ix_reservations_search_key_trgm ON reservations USING gin (search_key gin_trgm_ops)')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_reservations_search_key_trgm')
+
+    with op.batch_alter_table('reservation_search_terms', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservation_search_terms_event_term')
+    op.drop_table('reservation_search_terms')
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_column('search_key')
@@ -0,0 +1,33 @@
+"""add events.email_template and events.updated_at
+
+Revision ID: 3fade35da45c
+Revises: becbd21da370
+Create Date: 2026-10-18 10:02:17.551904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3fade35da45c'
+down_revision = 'becbd21da370'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_template', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE events SET updated_at = created_at")
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('email_template')
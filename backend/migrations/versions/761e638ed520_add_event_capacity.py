@@ -0,0 +1,28 @@
+"""add events.capacity and events.reserved_count
+
+Revision ID: 761e638ed520
+Revises: 3fade35da45c
+Create Date: 2026-10-18 11:26:03.117492
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '761e638ed520'
+down_revision = '3fade35da45c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('capacity', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('reserved_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('reserved_count')
+        batch_op.drop_column('capacity')
@@ -0,0 +1,34 @@
+"""add reservations.updated_at for door manifest deltas
+
+Revision ID: 78a23ccc03ed
+Revises: 4dcff97c3624
+Create Date: 2026-10-18 17:31:27.554019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '78a23ccc03ed'
+down_revision = '4dcff97c3624'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # filas existentes: último cambio conocido
+    op.execute("UPDATE reservations SET updated_at = COALESCE(used_at, created_at)")
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_reservations_event_updated_at', ['event_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_event_updated_at')
+        batch_op.drop_column('updated_at')
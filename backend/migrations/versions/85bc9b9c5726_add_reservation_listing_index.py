@@ -0,0 +1,26 @@
+"""add (event_id, created_at, id) index for keyset listing
+
+Revision ID: 85bc9b9c5726
+Revises: beab39717deb
+Create Date: 2026-10-18 20:17:05.391842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85bc9b9c5726'
+down_revision = 'beab39717deb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_reservations_event_created_at_id', ['event_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_event_created_at_id')
@@ -0,0 +1,47 @@
+"""add event_stats counters table
+
+Revision ID: 912285cfc6eb
+Revises: 122d53036eff
+Create Date: 2026-10-18 19:02:11.537204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '912285cfc6eb'
+down_revision = '122d53036eff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_stats',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('reserved', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('checked_in', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('cancelled', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('waitlisted', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+
+    # backfill desde las reservas existentes
+    op.execute("""
+        INSERT INTO event_stats (event_id, reserved, checked_in, cancelled, waitlisted, updated_at)
+        SELECT e.id,
+               SUM(CASE WHEN r.status IN ('created', 'checked_in') THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.status = 'checked_in' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.status = 'cancelled' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.status = 'waitlisted' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM events e
+        LEFT JOIN reservations r ON r.event_id = e.id
+        GROUP BY e.id
+    """)
+
+
+def downgrade():
+    op.drop_table('event_stats')
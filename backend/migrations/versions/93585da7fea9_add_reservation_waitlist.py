@@ -0,0 +1,40 @@
+"""add waitlisted reservation status and waitlist index
+
+Revision ID: 93585da7fea9
+Revises: 761e638ed520
+Create Date: 2026-10-18 16:42:10.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '93585da7fea9'
+down_revision = '761e638ed520'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # el valor nuevo no se puede usar en la misma transacción que lo agrega
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE reservation_status_enum ADD VALUE IF NOT EXISTS 'waitlisted'")
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_reservations_waitlist',
+            ['event_id', 'id'],
+            unique=False,
+            postgresql_where=sa.text("status = 'waitlisted'"),
+            sqlite_where=sa.text("status = 'waitlisted'"),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_waitlist')
+
+    # Postgres no permite quitar valores de un enum: 'waitlisted' queda en el tipo
+    op.execute("UPDATE reservations SET status = 'cancelled' WHERE status = 'waitlisted'")
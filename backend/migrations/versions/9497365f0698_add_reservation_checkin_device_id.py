@@ -0,0 +1,26 @@
+"""add reservations.checkin_device_id
+
+Revision ID: 9497365f0698
+Revises: 78a23ccc03ed
+Create Date: 2026-10-18 17:52:06.671390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9497365f0698'
+down_revision = '78a23ccc03ed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checkin_device_id', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_column('checkin_device_id')
@@ -0,0 +1,74 @@
+"""store reservation_code and access_code as binary
+
+Revision ID: beab39717deb
+Revises: 912285cfc6eb
+Create Date: 2026-10-18 19:41:52.806113
+
+"""
+import base64
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'beab39717deb'
+down_revision = '912285cfc6eb'
+branch_labels = None
+depends_on = None
+
+
+# (tabla, columna, texto legacy → bytes, bytes → texto legacy)
+COLUMNS = [
+    ('reservations', 'reservation_code', bytes.fromhex, lambda raw: raw.hex()),
+    (
+        'event_access_codes',
+        'access_code',
+        lambda s: base64.urlsafe_b64decode(s + '=' * (-len(s) % 4)),
+        lambda raw: base64.urlsafe_b64encode(raw).decode('ascii').rstrip('='),
+    ),
+]
+
+# Postgres: conversión en el mismo ALTER (los índices unique se reconstruyen solos)
+PG_TO_BINARY = {
+    'reservation_code': "decode(reservation_code, 'hex')",
+    'access_code': "decode(rpad(translate(access_code, '-_', '+/'), ((length(access_code) + 3) / 4) * 4, '='), 'base64')",
+}
+PG_TO_TEXT = {
+    'reservation_code': "encode(reservation_code, 'hex')",
+    'access_code': "rtrim(translate(encode(access_code, 'base64'), '+/', '-_'), '=')",
+}
+
+
+def _convert_rows(table, column, fn, new_type, old_type):
+    conn = op.get_bind()
+    t = sa.table(table, sa.column('id', sa.Integer), sa.column(column, old_type))
+    rows = conn.execute(sa.select(t.c.id, t.c[column])).fetchall()
+
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        batch_op.alter_column(column, existing_type=old_type, type_=new_type, existing_nullable=False)
+
+    t = sa.table(table, sa.column('id', sa.Integer), sa.column(column, new_type))
+    for rid, value in rows:
+        conn.execute(sa.update(t).where(t.c.id == rid).values({column: fn(value)}))
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column, _, _ in COLUMNS:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea USING {PG_TO_BINARY[column]}")
+        return
+
+    for table, column, to_binary, _ in COLUMNS:
+        _convert_rows(table, column, to_binary, sa.LargeBinary(length=16), sa.String(length=64))
+
+
+def downgrade():
+    # los códigos nuevos vuelven como hex / urlsafe: los QR en base32 ya enviados dejan de servir
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column, _, _ in COLUMNS:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar(64) USING {PG_TO_TEXT[column]}")
+        return
+
+    for table, column, _, to_text in COLUMNS:
+        _convert_rows(table, column, lambda v: to_text(bytes(v)), sa.String(length=64), sa.LargeBinary(length=16))
@@ -10,12 +10,16 @@ import { EventsService } from "../../services/events.service";
 import type { ReservationDTO } from "../../types/reservation";
 import type { EventDTO } from "../../types/event";
 
+const PAGE_SIZE = 100;
+
 export default function AdminReservasPage() {
   const navigate = useNavigate();
 
   const [events, setEvents] = useState<EventDTO[]>([]);
   const [eventId, setEventId] = useState<number | "">("");
   const [items, setItems] = useState<ReservationDTO[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loadingEvents, setLoadingEvents] = useState(false);
   const [loadingList, setLoadingList] = useState(false);
 
@@ -56,18 +60,26 @@ export default function AdminReservasPage() {
     }
   }
 
-  async function loadReservationsByEvent(id: number) {
+  // cursor null → primera página (reemplaza la lista); con cursor → agrega la siguiente
+  async function loadReservationsByEvent(id: number, cursor: string | null = null) {
     setLoadingList(true);
     try {
-      const res = await ReservationsService.listByEvent(id);
-      setItems(res.items ?? []);
+      const res = await ReservationsService.listByEvent(id, { limit: PAGE_SIZE, cursor });
+      const page = res.items ?? [];
+      setItems((prev) => (cursor ? [...prev, ...page] : page));
+      setTotal(res.total ?? null);
+      setNextCursor(res.next_cursor ?? null);
     } catch {
       await Swal.fire({
         icon: "error",
         title: "No se pudieron cargar reservas",
         text: "Revisa permisos (admin/seguridad) o el servidor.",
       });
-      setItems([]);
+      if (!cursor) {
+        setItems([]);
+        setTotal(null);
+        setNextCursor(null);
+      }
     } finally {
       setLoadingList(false);
     }
@@ -183,7 +195,9 @@ export default function AdminReservasPage() {
           <div className="mt-8 overflow-hidden rounded-[1.6rem] border border-slate-200 bg-white/80 shadow-[0_14px_35px_rgba(2,6,23,0.08)]">
             <div className="flex items-center justify-between gap-3 border-b border-slate-200 px-6 py-4">
               <div className="text-sm font-extrabold">
-                {loadingList ? "Cargando..." : `${items.length} reservas`}
+                {loadingList && items.length === 0
+                  ? "Cargando..."
+                  : `${items.length}${total !== null ? ` de ${total}` : ""} reservas`}
               </div>
               <div className="text-xs text-slate-500">Solo lectura (por ahora)</div>
             </div>
@@ -240,6 +254,18 @@ export default function AdminReservasPage() {
                 </tbody>
               </table>
             </div>
+
+            {nextCursor && typeof eventId === "number" ? (
+              <div className="border-t border-slate-200 px-6 py-4 text-center">
+                <button
+                  onClick={() => loadReservationsByEvent(eventId, nextCursor)}
+                  disabled={loadingList}
+                  className="rounded-xl border border-slate-200 bg-white px-4 py-2 text-sm font-semibold text-slate-700 hover:bg-slate-50 disabled:opacity-60"
+                >
+                  {loadingList ? "Cargando..." : "Cargar más"}
+                </button>
+              </div>
+            ) : null}
           </div>
 
           <div className="mt-10 text-xs text-slate-500">© 2025 Bee Concert Club · Admin</div>
@@ -42,8 +42,18 @@ export const ReservationsService = {
       method: "POST",
     }),
 
-  listByEvent: (eventId: number) =>
-    apiRequest<ReservationListDTO>(`${RES_BASE}/event/${eventId}`, {
+  /**
+   * ✅ Seguridad/Admin: reservas del evento, paginadas (más nuevas primero)
+   * GET /api/reservations/event/:eventId?limit=&cursor=
+   * cursor = next_cursor de la página anterior (null → no hay más)
+   */
+  listByEvent: (eventId: number, params: { limit?: number; cursor?: string | null } = {}) => {
+    const qs = new URLSearchParams();
+    if (params.limit) qs.set("limit", String(params.limit));
+    if (params.cursor) qs.set("cursor", params.cursor);
+    const query = qs.toString();
+    return apiRequest<ReservationListDTO>(`${RES_BASE}/event/${eventId}${query ? `?${query}` : ""}`, {
       method: "GET",
-    }),
+    });
+  },
 };
@@ -31,13 +31,15 @@ export type ReservationDTO = {
 
   created_at: string;
 
-  checkin_url: string;
-  qr_url: string;
+  // null en espera o cancelada (sin QR)
+  checkin_url: string | null;
+  qr_url: string | null;
 };
 
 export type ReservationListDTO = {
-  total: number;
+  total: number | null;
   items: ReservationDTO[];
+  next_cursor: string | null;
 };
 
 